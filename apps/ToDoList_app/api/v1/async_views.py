@@ -0,0 +1,106 @@
+"""
+Async-путь чтения задач под ASGI: list / retrieve / stats.
+
+DRF-вьюхи синхронные — под ASGI каждый запрос целиком уезжает в sync_to_async-поток
+(проверка JWT, фильтры, сериализация, рендер). Здесь в потоке ORM выполняются только
+сами запросы (async-API ORM), всё остальное — в event loop, и медленные клиенты
+не держат по потоку на запрос. Фильтры, сортировка, пагинация и поля берутся у
+TaskViewSet, поэтому тело ответа совпадает с /api/tasks/. Кэш ответов (ETag) этот путь не использует.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from apps.ToDoList_app import selectors, services
+from apps.ToDoList_app.api.v1 import fast_serializers
+from apps.ToDoList_app.api.v1.authentication import (
+    StatelessJWTAuthentication, active_users, check_user_state, state_checks_enabled, token_user,
+)
+from apps.ToDoList_app.api.v1.serializers import TaskStatsSerializer
+from apps.ToDoList_app.api.v1.views import TaskViewSet
+from apps.ToDoList_app.domain.models import Task
+
+
+async def aauthenticate(request):
+    """StatelessJWTAuthentication для async-пути: claims проверяются в loop, активность — через aload()."""
+    auth = StatelessJWTAuthentication()
+    header = auth.get_header(request)
+    raw = auth.get_raw_token(header) if header is not None else None
+    if raw is None:
+        return None
+    user = token_user(auth.get_validated_token(raw))
+    if state_checks_enabled():
+        check_user_state(user, await active_users.aload(user.id))
+    return user
+
+
+class TaskAsyncReadView(View):
+    viewset_class = TaskViewSet
+    action = "list"  # list | retrieve | stats
+    renderer = JSONRenderer()
+
+    async def get(self, request, *args, **kwargs):
+        drf_request = Request(request)
+        try:
+            user = await aauthenticate(request)
+            if user is None:
+                raise exceptions.NotAuthenticated()
+            drf_request.user = user
+            viewset = self.viewset_class(
+                request=drf_request, args=args, kwargs=kwargs, action=self.action, format_kwarg=None
+            )
+            data = await getattr(self, self.action)(viewset, drf_request, **kwargs)
+        except exceptions.APIException as exc:
+            return self._error(exc)
+        return self._render(data)
+
+    async def list(self, viewset, request):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        archived = viewset.archived_queryset()
+        serializer = fast_serializers.FastTaskSerializer(viewset.fast_fields_for("list"), archived=archived is not None)
+        paginator = viewset.paginator
+        ordering = paginator.get_ordering(request, queryset, viewset)[0].lstrip("-")
+        rows_qs = serializer.values(queryset, extra=["id", ordering])
+        if archived is None:
+            rows = await paginator.apaginate_queryset(rows_qs, request, viewset)
+        else:
+            archived = archived.values(*rows_qs.query.values_select)
+            rows = await paginator.apaginate_querysets([rows_qs, archived], request, viewset)
+        return paginator.get_paginated_response(await serializer.aserialize(rows)).data
+
+    async def retrieve(self, viewset, request, pk):
+        serializer = fast_serializers.FastTaskSerializer(viewset.fast_fields_for("retrieve"))
+        try:
+            row = await serializer.values(viewset.get_queryset().filter(pk=pk)).afirst()
+        except (TypeError, ValueError, DjangoValidationError):
+            raise exceptions.NotFound()
+        if row is None:  # queryset уже ограничен владельцем — объектные пермишены не нужны
+            raise exceptions.NotFound(f"No {Task._meta.object_name} matches the given query.")
+        return (await serializer.aserialize([row]))[0]
+
+    async def stats(self, viewset, request):
+        if getattr(settings, "TASK_STATS_USE_COUNTERS", True):
+            payload = await selectors.acounter_stats(user=request.user)
+            if payload is None:  # первый запрос — заводим счётчик
+                await sync_to_async(services.rebuild_task_counters)(user_ids=[request.user.id])
+                payload = await selectors.acounter_stats(user=request.user)
+        else:
+            payload = await selectors.atask_stats(
+                viewset.get_queryset(), archived=selectors.archived_for_user(user=request.user)
+            )
+        return TaskStatsSerializer(instance=payload).data
+
+    def _render(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(self.renderer.render(data), status=status_code, content_type="application/json")
+
+    def _error(self, exc):
+        detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+        response = self._render(detail, exc.status_code)
+        if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+            response["WWW-Authenticate"] = 'Bearer realm="api"'
+        return response
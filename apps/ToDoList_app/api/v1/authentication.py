@@ -0,0 +1,142 @@
+"""
+JWT без загрузки auth.User на каждый запрос.
+
+JWTAuthentication делает SELECT по auth_user на каждый вызов API, хотя дальше нужен только
+user.id. StatelessJWTAuthentication собирает пользователя из проверенных claims (TaskTokenUser),
+а активность аккаунта проверяет по маленькому in-process кэшу с TTL и LRU-вытеснением:
+отключённый пользователь отсекается максимум через TASK_AUTH_ACTIVE_TTL секунд (в своём
+процессе — сразу, см. signals.evict_user_state). TASK_AUTH_ACTIVE_TTL = None — проверку не делать.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# (is_active, md5 хэша пароля для CHECK_REVOKE_TOKEN, is_staff); None — пользователя нет
+UserState = Optional[Tuple[bool, str, bool]]
+
+
+class TaskTokenUser(TokenUser):
+    """TokenUser с id, приведённым к типу PK модели: obj.user_id == request.user.id работает как с User."""
+
+    @cached_property
+    def id(self):
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+
+class ActiveStateCache:
+    """Потокобезопасный TTL + LRU кэш {user_id: UserState}."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def ttl() -> Optional[float]:
+        return getattr(settings, "TASK_AUTH_ACTIVE_TTL", 30)
+
+    @staticmethod
+    def max_size() -> int:
+        return getattr(settings, "TASK_AUTH_ACTIVE_CACHE_SIZE", 10_000)
+
+    def get(self, user_id):
+        """(hit, state); протухшие записи выбрасываются при чтении."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return False, None
+            expires, state = entry
+            if expires <= time.monotonic():
+                del self._entries[user_id]
+                return False, None
+            self._entries.move_to_end(user_id)
+            return True, state
+
+    def set(self, user_id, state: UserState) -> None:
+        ttl = self.ttl()
+        if not ttl:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, state)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size():
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def load(self, user_id) -> UserState:
+        hit, state = self.get(user_id)
+        if not hit:
+            state = self._state(self._query(user_id).first())
+            self.set(user_id, state)
+        return state
+
+    async def aload(self, user_id) -> UserState:
+        hit, state = self.get(user_id)
+        if not hit:
+            state = self._state(await self._query(user_id).afirst())
+            self.set(user_id, state)
+        return state
+
+    @staticmethod
+    def _query(user_id):
+        return get_user_model().objects.filter(pk=user_id).values_list("is_active", "password", "is_staff")
+
+    @staticmethod
+    def _state(row) -> UserState:
+        if row is None:
+            return None
+        is_active, password, is_staff = row
+        return is_active, (get_md5_hash_password(password) if api_settings.CHECK_REVOKE_TOKEN else ""), is_staff
+
+
+active_users = ActiveStateCache()
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        user = token_user(validated_token)
+        if state_checks_enabled():
+            check_user_state(user, active_users.load(user.id))
+        return user
+
+
+def token_user(validated_token) -> TaskTokenUser:
+    if api_settings.USER_ID_CLAIM not in validated_token:
+        raise InvalidToken("Token contained no recognizable user identification")
+    user = TaskTokenUser(validated_token)
+    try:
+        user.id  # приводим claim к типу PK сразу: мусор в токене — 401, а не 500 дальше
+    except (TypeError, ValueError, ValidationError):
+        raise InvalidToken("Token contained no recognizable user identification")
+    return user
+
+
+def state_checks_enabled() -> bool:
+    return ActiveStateCache.ttl() is not None
+
+
+def check_user_state(user: TaskTokenUser, state: UserState) -> None:
+    if state is None:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    is_active, password_hash, _ = state
+    if api_settings.CHECK_USER_IS_ACTIVE and not is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    if api_settings.CHECK_REVOKE_TOKEN and user.token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+        raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
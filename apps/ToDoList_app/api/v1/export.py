@@ -0,0 +1,74 @@
+"""
+Потоковая выгрузка задач (NDJSON / CSV) для бэкапов и BI.
+
+Строки идут через .values().iterator(chunk_size) — в памяти держится только текущая пачка;
+теги подтягиваются одним запросом на пачку (fast_serializers.tag_map). Если быстрый путь
+выключен или не поддерживается (fast_serializers.enabled()), пачки сериализует TaskSerializer —
+та же проверка, что у FastReadMixin, поэтому выгрузка и API не расходятся.
+"""
+import csv
+import io
+import json
+from itertools import islice
+from typing import Iterator
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.ToDoList_app.api.v1 import fast_serializers
+from apps.ToDoList_app.api.v1.serializers import TaskSerializer
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+FIELDS = fast_serializers.DETAIL_FIELDS
+
+
+def _serialize_models(chunk: list) -> list:
+    return TaskSerializer(chunk, many=True).data
+
+
+def _chunks(queryset, chunk_size: int) -> Iterator[list]:
+    if fast_serializers.enabled():
+        serializer = fast_serializers.FastTaskSerializer(FIELDS)
+        rows, serialize = serializer.values(queryset).iterator(chunk_size=chunk_size), serializer.serialize
+    else:  # модели; iterator(chunk_size) префетчит теги по пачкам
+        rows, serialize = queryset.prefetch_related("tags").iterator(chunk_size=chunk_size), _serialize_models
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield serialize(chunk)
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return ""
+    if isinstance(value, list):  # теги
+        return ";".join(tag["name"] for tag in value)
+    return value
+
+
+def stream_ndjson(queryset, chunk_size: int = 2000) -> Iterator[str]:
+    for chunk in _chunks(queryset, chunk_size):
+        yield "".join(
+            json.dumps(row, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")) + "\n" for row in chunk
+        )
+
+
+def stream_csv(queryset, chunk_size: int = 2000) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for chunk in _chunks(queryset, chunk_size):
+        writer.writerows([_csv_value(row[name]) for name in FIELDS] for row in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # пустая выгрузка — только заголовок
+        yield buffer.getvalue()
+
+
+STREAMS = {"ndjson": stream_ndjson, "csv": stream_csv}
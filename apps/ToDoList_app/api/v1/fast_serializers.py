@@ -0,0 +1,111 @@
+"""
+Быстрый read-only путь для TaskListSerializer / TaskSerializer.
+
+Строки берутся из .values() (без создания моделей), теги — одной выборкой по through-таблице
+и раскладываются по задачам словарём, поля конвертируются заранее собранными функциями
+вместо диспетчеризации to_representation по каждому полю. JSON на выходе байт-в-байт совпадает
+с обычными сериализаторами (см. TaskFastSerializerParityTests).
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.settings import ISO_8601, api_settings
+
+from apps.ToDoList_app.api.v1.serializers import TaskListSerializer, TaskSerializer
+from apps.ToDoList_app.domain.models import TaskArchiveTag, TaskTag, encode_public_id
+
+LIST_FIELDS = tuple(TaskListSerializer.Meta.fields)
+DETAIL_FIELDS = tuple(TaskSerializer.Meta.fields)
+
+# вычисляемые поля — в .values() их нет
+COMPUTED = {"tags", "public_id"}
+
+
+def supported() -> bool:
+    """Форматы дат переопределены в настройках DRF — тогда только обычные сериализаторы."""
+    return api_settings.DATETIME_FORMAT == ISO_8601 and api_settings.DATE_FORMAT == ISO_8601
+
+
+def enabled() -> bool:
+    """Быстрый путь включён (TASK_FAST_SERIALIZERS) и поддерживается — общая проверка для API и выгрузки."""
+    return getattr(settings, "TASK_FAST_SERIALIZERS", True) and supported()
+
+
+def _tag_rows(task_ids: Iterable[int], archived: bool):
+    """
+    (task_id, tag_id, имя) по возрастанию (task_id, tag_id). archived — страница с архивными задачами
+    (?include_archived=): связи из TaskArchiveTag добавляются тем же запросом через UNION ALL
+    (id у задачи и её архивной копии общий, так что строки не задваиваются).
+    """
+    task_ids = list(task_ids)
+    rows = TaskTag.objects.filter(task_id__in=task_ids).values_list("task_id", "tag_id", "tag__name")
+    if archived:
+        archived_rows = TaskArchiveTag.objects.filter(task_id__in=task_ids).values_list("task_id", "tag_id", "tag__name")
+        rows = rows.union(archived_rows, all=True)
+    return rows.order_by("task_id", "tag_id")
+
+
+def tag_map(task_ids: Iterable[int], archived: bool = False) -> Dict[int, List[dict]]:
+    """{task_id: [{"id", "name"}, ...]} одним запросом; порядок — как у префетча в selectors (по id тега)."""
+    tags = defaultdict(list)
+    for task_id, tag_id, name in _tag_rows(task_ids, archived):
+        tags[task_id].append({"id": tag_id, "name": name})
+    return tags
+
+
+async def atag_map(task_ids: Iterable[int], archived: bool = False) -> Dict[int, List[dict]]:
+    """tag_map для async-вьюх."""
+    tags = defaultdict(list)
+    async for task_id, tag_id, name in _tag_rows(task_ids, archived):
+        tags[task_id].append({"id": tag_id, "name": name})
+    return tags
+
+
+class FastTaskSerializer:
+    def __init__(self, fields: Sequence[str], archived: bool = False):
+        self.fields = tuple(fields)
+        self.archived = archived  # в строках бывают архивные задачи — теги и из TaskArchiveTag
+
+    def columns(self, extra: Sequence[str] = ()) -> List[str]:
+        columns = [name for name in self.fields if name not in COMPUTED]
+        if "tags" in self.fields or "public_id" in self.fields:
+            columns.append("id")
+        return list(dict.fromkeys([*columns, *extra]))
+
+    def values(self, queryset, extra: Sequence[str] = ()):
+        """extra — колонки, нужные помимо полей (например, поле курсора пагинации)."""
+        return queryset.prefetch_related(None).values(*self.columns(extra))
+
+    def serialize(self, rows: Sequence[dict]) -> List[dict]:
+        tags = tag_map((row["id"] for row in rows), self.archived) if "tags" in self.fields else {}
+        return self._convert(rows, tags)
+
+    async def aserialize(self, rows: Sequence[dict]) -> List[dict]:
+        tags = await atag_map((row["id"] for row in rows), self.archived) if "tags" in self.fields else {}
+        return self._convert(rows, tags)
+
+    def _convert(self, rows, tags):
+        converters = [(name, self._converter(name, tags)) for name in self.fields]
+        return [{name: convert(row) for name, convert in converters} for row in rows]
+
+    @staticmethod
+    def _converter(name, tags):
+        if name == "tags":
+            return lambda row: tags.get(row["id"], [])
+        if name == "public_id":
+            return lambda row: encode_public_id(row["id"])
+        if name in ("created_at", "updated_at"):
+            tz = timezone.get_current_timezone()
+
+            def convert_datetime(row):
+                value = row[name]
+                if value is None:
+                    return None
+                value = value.astimezone(tz).isoformat()
+                return value[:-6] + "Z" if value.endswith("+00:00") else value
+            return convert_datetime
+        if name == "due_date":
+            return lambda row: row[name].isoformat() if row[name] is not None else None
+        return lambda row: row[name]
@@ -1,11 +1,43 @@
 import django_filters
+from rest_framework.filters import OrderingFilter, SearchFilter
 from apps.ToDoList_app.domain.models import Task
+from apps.ToDoList_app import search, selectors
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
 
 class TaskFilter(django_filters.FilterSet):
     # диапазон по дате дедлайна: ?due_from=2025-09-01&due_to=2025-09-30
     due_from = django_filters.DateFilter(field_name="due_date", lookup_expr="gte")
     due_to = django_filters.DateFilter(field_name="due_date", lookup_expr="lte")
+    # сочетания тегов: ?tags_all=1,2,3 (все сразу) и ?tags_any=4,5 (хотя бы один) — подзапросами, без дублей строк
+    tags_all = NumberInFilter(method="filter_tags_all")
+    tags_any = NumberInFilter(method="filter_tags_any")
 
     class Meta:
         model = Task
-        fields = ["is_done", "tags__id"]
\ No newline at end of file
+        fields = ["is_done", "tags__id"]
+
+    def filter_tags_all(self, queryset, name, value):
+        return selectors.with_all_tags(queryset, value) if value else queryset
+
+    def filter_tags_any(self, queryset, name, value):
+        return selectors.with_any_tags(queryset, value) if value else queryset
+
+
+class TaskSearchFilter(SearchFilter):
+    """?search= через полнотекстовый бэкенд (search.py) вместо title LIKE '%q%'."""
+
+    def filter_queryset(self, request, queryset, view):
+        return search.search_tasks(queryset, self.get_search_terms(request))
+
+
+class TaskOrderingFilter(OrderingFilter):
+    """При поиске без явного ?ordering= сортируем по релевантности."""
+
+    def get_ordering(self, request, queryset, view):
+        if self.ordering_param not in request.query_params and "search_rank" in queryset.query.annotations:
+            return ["search_rank"]
+        return super().get_ordering(request, queryset, view)
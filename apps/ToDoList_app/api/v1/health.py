@@ -0,0 +1,13 @@
+"""Служебные ручки о состоянии процесса. Метрики — по воркеру, обработавшему запрос (см. dbstats)."""
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.ToDoList_app import dbstats
+from apps.ToDoList_app.api.v1.permissions import IsStaffUser
+
+
+class DatabaseStatsView(APIView):
+    permission_classes = [IsStaffUser]
+
+    def get(self, request):
+        return Response(dbstats.snapshot())
@@ -0,0 +1,70 @@
+"""
+Статус фоновых заданий пользователя (/jobs/<id>/) и выгрузка задач как задание.
+
+Выгрузка с Prefer: respond-async (TaskViewSet.export) собирается воркером в файл в default_storage
+с теми же фильтрами/поиском/сортировкой, что у синхронной: параметры запроса сохраняются в задании,
+и queryset строит тот же TaskViewSet. Готовый файл отдаёт /jobs/<id>/download/.
+"""
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpRequest, QueryDict
+from drf_spectacular.utils import extend_schema
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+
+from apps.ToDoList_app import jobs
+from apps.ToDoList_app.api.v1 import export
+from apps.ToDoList_app.api.v1.mixins import QueryBudgetMixin
+from apps.ToDoList_app.api.v1.serializers import JobSerializer
+from apps.ToDoList_app.api.v1.views import TaskViewSet
+from apps.ToDoList_app.domain.models import Job
+
+
+def export_queryset(job: Job):
+    """Задачи для выгрузки — как их отфильтровал бы TaskViewSet.export по сохранённым параметрам запроса."""
+    http_request = HttpRequest()
+    http_request.method = "GET"
+    http_request.GET = QueryDict(job.payload.get("query", ""))
+    request = Request(http_request)
+    request.user = job.user
+    view = TaskViewSet(request=request, action="export", args=(), kwargs={}, format_kwarg=None)
+    return view.filter_queryset(view.get_queryset())
+
+
+@jobs.register("export")
+def export_tasks(job: Job) -> dict:
+    file_format = QueryDict(job.payload.get("query", "")).get("file_format", "ndjson")
+    content_type, extension = export.FORMATS[file_format]
+    with tempfile.TemporaryFile() as tmp:  # поток пишется на диск: в памяти — только текущая пачка
+        for chunk in export.STREAMS[file_format](export_queryset(job)):
+            tmp.write(chunk.encode("utf-8"))
+        size = tmp.tell()
+        tmp.seek(0)
+        name = default_storage.save(f"exports/tasks-{job.id}.{extension}", File(tmp))
+    return {"file": name, "size": size, "content_type": content_type}
+
+
+class JobViewSet(QueryBudgetMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = []
+    query_budgets = {"retrieve": 1, "download": 1}
+
+    def get_queryset(self):
+        # чужие задания — 404, как и чужие задачи
+        return Job.objects.filter(user_id=self.request.user.id)
+
+    @extend_schema(responses={(200, "application/octet-stream"): str})
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != Job.SUCCEEDED or not (job.result or {}).get("file"):
+            raise NotFound("Job has no file to download.")
+        name = job.result["file"]
+        return FileResponse(default_storage.open(name), as_attachment=True, content_type=job.result["content_type"],
+                            filename=f"tasks.{name.rsplit('.', 1)[-1]}")
@@ -0,0 +1,276 @@
+import time
+from typing import Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.response import Response
+
+from apps.ToDoList_app import caching, jobs, profiling, services
+from apps.ToDoList_app.api.v1 import fast_serializers
+from apps.ToDoList_app.api.v1.permissions import is_staff_user
+from apps.ToDoList_app.api.v1.serializers import JobSerializer
+from apps.ToDoList_app.domain.models import Task
+
+
+class CachedResponseMixin:
+    """
+    Кэш list/retrieve по (пользователь, версия, URL, формат) + ETag/If-None-Match.
+    На попадании в кэш ни queryset, ни сериализатор не запускаются;
+    совпал ETag — отдаём 304 без тела.
+    """
+    cached_actions = ("list", "retrieve")
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+    def _cached_response(self, request, build, *key_parts):
+        """key_parts — то, от чего ответ зависит помимо URL (например, текущий день пользователя)."""
+        if not caching.enabled() or self.action not in self.cached_actions:
+            return build()
+
+        key = caching.response_key(
+            request.user.id, self.action, request.build_absolute_uri(), request.accepted_renderer.format, *key_parts
+        )
+        entry = caching.get_entry(key)
+        if entry is None:
+            response = build()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = {"etag": caching.make_etag(response.data), "data": response.data}
+            caching.set_entry(key, entry)
+        else:
+            response = Response(entry["data"], status=status.HTTP_200_OK)
+
+        if self._etag_matches(request, entry["etag"]):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response["ETag"] = entry["etag"]
+        response["Cache-Control"] = "private, no-cache"  # клиент хранит, но обязан ревалидировать
+        return response
+
+    @staticmethod
+    def _etag_matches(request, etag):
+        tags = {tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")}
+        return "*" in tags or etag in tags
+
+
+class FastReadMixin:
+    """
+    list/retrieve через fast_serializers (values() + карта тегов) вместо ModelSerializer.
+    Выключается settings.TASK_FAST_SERIALIZERS = False.
+    """
+    fast_fields = {"list": fast_serializers.LIST_FIELDS, "retrieve": fast_serializers.DETAIL_FIELDS}
+
+    def fast_enabled(self):
+        return fast_serializers.enabled()
+
+    def archived_queryset(self):
+        """Архивные задачи, которые сливаются в страницу (TaskViewSet: ?include_archived=); None — без архива."""
+        return None
+
+    def fast_fields_for(self, action) -> Tuple[str, ...]:
+        """Поля ответа для action на быстром пути (SparseFieldsMixin сужает их по ?fields=)."""
+        return tuple(self.fast_fields[action])
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_enabled():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.fast_paginated_response(queryset, self.fast_fields_for("list"))
+
+    def fast_paginated_response(self, queryset, fields):
+        serializer = fast_serializers.FastTaskSerializer(fields, archived=self.archived_queryset() is not None)
+        # курсору нужны id и поле сортировки — добираем только их
+        ordering = self.paginator.get_ordering(self.request, queryset, self)[0].lstrip("-")
+        rows = self.paginate_queryset(serializer.values(queryset, extra=["id", ordering]))
+        return self.get_paginated_response(serializer.serialize(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.fast_enabled():
+            return super().retrieve(request, *args, **kwargs)
+        serializer = fast_serializers.FastTaskSerializer(self.fast_fields_for("retrieve"))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.get_queryset().filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            row = serializer.values(queryset, extra=["id", "user"]).first()  # для объектных пермишенов
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        if row is None:  # то же сообщение, что у get_object_or_404
+            raise Http404(f"No {Task._meta.object_name} matches the given query.")
+        # объектные пермишены проверяем на "пустышке" с нужными атрибутами — без загрузки модели
+        self.check_object_permissions(request, Task(id=row["id"], user_id=row["user"]))
+        return Response(serializer.serialize([row])[0])
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=id,title и ?expand=tags для list/retrieve: ответ только с запрошенными полями — и запрос
+    к БД тоже. На быстром пути колонки уходят в values(), на обычном — в only() (get_queryset
+    берёт их из projection()); теги — отдельный запрос, он делается, только если теги попали в ответ.
+    Без параметров — поля действия по умолчанию. Порядок полей в ответе — как в sparse_fields.
+    """
+    sparse_fields = fast_serializers.DETAIL_FIELDS  # допустимые в ?fields=
+    sparse_expand = ("tags",)  # связи для ?expand= (в ?fields= тоже допустимы)
+    sparse_actions = ("list", "retrieve", "by_public_id")
+    sparse_serializer_class = None  # сериализатор со всеми sparse_fields и аргументом fields=
+
+    @staticmethod
+    def _split(raw: Optional[str]) -> Optional[list]:
+        return None if raw is None else [name.strip() for name in raw.split(",") if name.strip()]
+
+    def sparse_requested(self) -> bool:
+        params = self.request.query_params
+        return self.action in self.sparse_actions and ("fields" in params or "expand" in params)
+
+    def response_fields(self, default: Sequence[str]) -> Tuple[str, ...]:
+        """Поля ответа: default, если ?fields= / ?expand= не передали (или действие их не поддерживает)."""
+        if not self.sparse_requested():
+            return tuple(default)
+        fields = self._split(self.request.query_params.get("fields"))
+        expand = self._split(self.request.query_params.get("expand")) or []
+        errors = {}
+        if fields is not None:
+            unknown = [name for name in fields if name not in self.sparse_fields]
+            if unknown or not fields:
+                errors["fields"] = [f"Unknown field(s): {', '.join(unknown)}." if unknown
+                                    else "At least one field is required."]
+        unknown = [name for name in expand if name not in self.sparse_expand]
+        if unknown:
+            errors["expand"] = [f"Can't expand: {', '.join(unknown)}. Available: {', '.join(self.sparse_expand)}."]
+        if errors:
+            raise serializers.ValidationError(errors)
+        if fields is None:  # только ?expand= — поля по умолчанию плюс связи
+            fields = [name for name in default if name not in self.sparse_expand]
+        chosen = {*fields, *expand}
+        return tuple(name for name in self.sparse_fields if name in chosen)
+
+    def fast_fields_for(self, action) -> Tuple[str, ...]:
+        return self.response_fields(super().fast_fields_for(action))
+
+    def projection(self) -> Optional[Tuple[Tuple[str, ...], bool]]:
+        """
+        (колонки для only(), нужны ли теги) для обычного пути; None — действие не сужается.
+        Кроме полей ответа — колонки, без которых не обойтись: владелец (объектные пермишены)
+        и поля сортировки (курсор пагинации читает их из объектов).
+        """
+        if self.action not in self.sparse_actions:
+            return None
+        fields = self.response_fields(self.get_serializer_class().Meta.fields)
+        columns = [name for name in fields if name not in fast_serializers.COMPUTED]
+        columns = dict.fromkeys(["id", "user", *columns, *getattr(self, "ordering_fields", ())])
+        return tuple(columns), "tags" in fields
+
+    def get_serializer(self, *args, **kwargs):
+        if not self.sparse_requested():
+            return super().get_serializer(*args, **kwargs)
+        kwargs.setdefault("context", self.get_serializer_context())
+        fields = self.response_fields(self.get_serializer_class().Meta.fields)
+        return self.sparse_serializer_class(*args, fields=fields, **kwargs)
+
+
+class BackgroundJobMixin:
+    """
+    Prefer: respond-async (RFC 7240) на долгих действиях: вместо работы в потоке запроса — задание
+    в очереди (jobs.py) и сразу 202 с его статусом; Location — ручка статуса /jobs/<id>/.
+    """
+
+    def wants_async(self) -> bool:
+        prefer = self.request.headers.get("Prefer", "")
+        return "respond-async" in {token.split("=")[0].strip().lower() for token in prefer.split(",")}
+
+    def accepted(self, kind: str, payload: dict) -> Response:
+        job = jobs.enqueue(kind, user_id=self.request.user.id, payload=payload)
+        data = JobSerializer(job, context=self.get_serializer_context()).data
+        return Response(data, status=status.HTTP_202_ACCEPTED,
+                        headers={"Location": data["url"], "Preference-Applied": "respond-async"})
+
+
+class QueryBudgetMixin:
+    """Отмечает для QueryBudgetMiddleware начало самого действия (после аутентификации и пермишенов)."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        log = getattr(request._request, "query_log", None)
+        if log is not None:
+            log.start_action()
+
+
+class PhaseTimingMixin:
+    """Фазы auth / filter / serialize для Server-Timing (profiling.py); без профиля — пустые контексты.
+
+    По X-Profile профиль заводится здесь, после аутентификации и только для staff.
+    """
+
+    def perform_authentication(self, request):
+        if not profiling.requested(request):
+            with profiling.phase(request, "auth"):
+                super().perform_authentication(request)
+            return
+        started = time.perf_counter()
+        super().perform_authentication(request)
+        if is_staff_user(request.user):
+            profile = profiling.start(request, started)
+            profile.durations["auth"] += time.perf_counter() - started
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        profile = profiling.get_profile(request)
+        if profile is not None:
+            profile.push("serialize")  # закрывается после рендера, см. finalize_response
+
+    def filter_queryset(self, queryset):
+        with profiling.phase(self.request, "filter"):
+            return super().filter_queryset(queryset)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        profile = profiling.get_profile(request)
+        if profile is not None and hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(lambda rendered: profile.pop("serialize"))
+        return response
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "Task was modified by another request."
+    default_code = "precondition_failed"
+
+
+class WriteContention(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Task is being modified concurrently, retry the request."
+    default_code = "write_contention"
+
+
+class ConditionalWriteMixin:
+    """
+    If-Match для записей задачи. Значение — Task.version из ответа ("3", W/"3" или 3; * — любая версия).
+    Версия уходит в сервис и проверяется в самом UPDATE ... WHERE version = N: параллельный писатель
+    получает 412 вместо потерянного обновления, блокировок строк нет. Без If-Match сервис
+    перечитывает задачу и повторяет запись сам; если попытки кончились — 409.
+    """
+
+    def expected_version(self) -> Optional[int]:
+        header = self.request.headers.get("If-Match")
+        if header is None or header.strip() == "*":
+            return None
+        value = header.strip().removeprefix("W/").strip('"')
+        try:
+            return int(value)
+        except ValueError:
+            raise PreconditionFailed()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, services.VersionConflict):
+            exc = PreconditionFailed()
+        elif isinstance(exc, services.WriteContention):
+            exc = WriteContention()
+        elif isinstance(exc, Task.DoesNotExist):  # удалили между чтением и записью
+            exc = NotFound()
+        return super().handle_exception(exc)
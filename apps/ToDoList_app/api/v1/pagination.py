@@ -0,0 +1,179 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class TaskKeysetPagination(CursorPagination):
+    """
+    Keyset-пагинация: страница = WHERE (<поле>, id) после курсора + LIMIT.
+    Никаких OFFSET, поэтому глубокие страницы стоят столько же, сколько первая.
+
+    Сортировка берётся из OrderingFilter (первое поле), id всегда добавляется
+    как tie-breaker в том же направлении — порядок стабилен даже для
+    неуникальных due_date/created_at. NULL'ы (due_date) всегда в конце.
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "-id"
+    tiebreaker = "id"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self._window(queryset, request, view)
+        return None if window is None else self._take(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """То же для async-вьюх: страница выбирается через async-итерацию queryset'а."""
+        window = self._window(queryset, request, view)
+        return None if window is None else self._take([row async for row in window])
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """
+        Одна страница поверх нескольких queryset'ов с одинаковыми полями (задачи + архив, ?include_archived=).
+        У каждого своё окно (page_size + 1 строк по своему индексу), окна сливаются в Python в том же
+        порядке, что дал бы SQL, — стоимость страницы не зависит от размера архива.
+        """
+        windows = [self._window(queryset, request, view) for queryset in querysets]
+        if windows[0] is None:
+            return None
+        return self._take(self._merge([row for window in windows for row in window]))
+
+    async def apaginate_querysets(self, querysets, request, view=None):
+        windows = [self._window(queryset, request, view) for queryset in querysets]
+        if windows[0] is None:
+            return None
+        return self._take(self._merge([row for window in windows async for row in window]))
+
+    def _merge(self, rows):
+        descending, nulls_last = self._direction
+        nulls_big = nulls_last != descending  # NULL'ы в конце/начале и после разворота для DESC
+
+        def key(row):
+            value, pk = self._position(row)
+            if value is None:
+                return (1 if nulls_big else -1, None, pk)
+            return (0, value, pk)
+
+        return sorted(rows, key=key, reverse=descending)[:self.page_size + 1]
+
+    def _window(self, queryset, request, view):
+        """Queryset страницы (+1 строка на признак "есть ещё"); запрос к БД здесь не выполняется."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        ordering = self.get_ordering(request, queryset, view)
+        self.field = ordering[0].lstrip("-")
+        self.descending = ordering[0].startswith("-")
+        self.model_field = self._model_field(queryset.model, self.field)
+        self.nullable = bool(self.model_field and self.model_field.null)
+
+        cursor = self.cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor["r"])
+        descending = self.descending != reverse  # обратный проход — обратный порядок
+        self._direction = (descending, not reverse)
+
+        queryset = queryset.order_by(*self._order_by(descending, nulls_last=not reverse))
+        if cursor is not None:
+            queryset = queryset.filter(
+                self._after(cursor["v"], cursor["i"], descending, nulls_last=not reverse)
+            )
+        return queryset[:self.page_size + 1]
+
+    def _take(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if self.cursor and self.cursor["r"]:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    # ---- порядок и условие "после курсора" ----
+
+    def _order_by(self, descending, nulls_last):
+        if self.field == self.tiebreaker:
+            return [f"-{self.tiebreaker}" if descending else self.tiebreaker]
+        expr = F(self.field)
+        nulls = {}
+        if self.nullable:
+            nulls = {"nulls_last": True} if nulls_last else {"nulls_first": True}
+        key = expr.desc(**nulls) if descending else expr.asc(**nulls)
+        tie = f"-{self.tiebreaker}" if descending else self.tiebreaker
+        return [key, tie]
+
+    def _after(self, value, pk, descending, nulls_last):
+        op = "lt" if descending else "gt"
+        tie = Q(**{f"{self.tiebreaker}__{op}": pk})
+        if self.field == self.tiebreaker:
+            return tie
+
+        if value is None:
+            in_nulls = Q(**{f"{self.field}__isnull": True}) & tie
+            return in_nulls if nulls_last else in_nulls | Q(**{f"{self.field}__isnull": False})
+
+        cond = Q(**{f"{self.field}__{op}": value}) | (Q(**{self.field: value}) & tie)
+        if self.nullable and nulls_last:
+            cond |= Q(**{f"{self.field}__isnull": True})
+        return cond
+
+    @staticmethod
+    def _model_field(model, name):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    # ---- курсоры ----
+
+    def _position(self, item):
+        if isinstance(item, dict):
+            return item.get(self.field), item[self.tiebreaker]
+        return getattr(item, self.field), getattr(item, self.tiebreaker)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            pk = int(tokens["i"])
+            value = tokens.get("v")
+            if value is not None and self.model_field is not None:
+                value = self.model_field.to_python(value)
+            return {"v": value, "i": pk, "r": bool(tokens.get("r"))}
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        value, pk, reverse = cursor
+        tokens = {"i": pk}
+        if self.field != self.tiebreaker and value is not None:
+            tokens["v"] = value.isoformat() if hasattr(value, "isoformat") else value
+        if reverse:
+            tokens["r"] = 1
+        encoded = b64encode(json.dumps(tokens, separators=(",", ":")).encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        value, pk = self._position(self.page[-1])
+        return self.encode_cursor((value, pk, False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        value, pk = self._position(self.page[0])
+        return self.encode_cursor((value, pk, True))
@@ -1,5 +1,28 @@
+from django.contrib.auth import get_user_model
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from apps.ToDoList_app.api.v1.authentication import active_users, state_checks_enabled
+
+
+def is_staff_user(user) -> bool:
+    if user is None or not user.is_authenticated:
+        return False
+    if isinstance(user, get_user_model()):
+        return user.is_staff
+    # TokenUser: в claims is_staff нет — берём из кэша состояния, который уже прогрела аутентификация
+    if state_checks_enabled():
+        state = active_users.load(user.id)
+        return state is not None and state[2]
+    return get_user_model().objects.filter(pk=user.id, is_staff=True).exists()
+
+
+class IsStaffUser(BasePermission):
+    """IsAdminUser для TokenUser (StatelessJWTAuthentication): is_staff — из кэша состояния или БД."""
+
+    def has_permission(self, request, view):
+        return is_staff_user(request.user)
+
+
 class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
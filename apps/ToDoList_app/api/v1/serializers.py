@@ -1,5 +1,10 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
 from rest_framework import serializers
-from apps.ToDoList_app.domain.models import Task, Tag
+from apps.ToDoList_app.domain.models import Job, Task, Tag
+from apps.ToDoList_app import services
+from apps.ToDoList_app.api.v1.sync import SyncCursor
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -17,27 +22,56 @@ class TaskListSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "is_done"]
 
 
-class TaskSerializer(serializers.ModelSerializer):
+TASK_BULK_MAX_ITEMS = 1000
+
+
+class TaskBulkListSerializer(serializers.ListSerializer):
+    """
+    TaskSerializer(many=True) для bulk-ручки. При обновлении instance — dict {id: Task},
+    и каждый элемент валидируется против своей задачи (validate() смотрит на instance).
+    """
+
+    def run_child_validation(self, data):
+        self.child.instance = None
+        if isinstance(self.instance, dict):
+            task_id = data.get("id") if isinstance(data, dict) else None
+            self.child.instance = self.instance.get(task_id)
+            if self.child.instance is None:
+                raise serializers.ValidationError({"id": ["Task not found"]})
+        return super().run_child_validation(data)
+
+
+class FieldsSubsetMixin:
+    """fields=(...) в конструкторе — оставить в сериализаторе только эти поля (?fields= / ?expand=)."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class TaskSerializer(FieldsSubsetMixin, serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
 
     class Meta:
         model = Task
-        fields = ['user', 'id', 'title', 'is_done', 'created_at', 'updated_at', 'due_date', 'tags', 'public_id']
-        read_only_fields = ['user', 'created_at', 'updated_at']
+        fields = ['user', 'id', 'title', 'is_done', 'created_at', 'updated_at', 'due_date', 'tags', 'public_id',
+                  'version']
+        read_only_fields = ['user', 'created_at', 'updated_at', 'version']
+        list_serializer_class = TaskBulkListSerializer
 
     def create(self, validated_data):
         # user берём из контекста, т.к. он read_only
         request = self.context.get("request")
         if request and request.user and request.user.is_authenticated:
             validated_data.setdefault("user", request.user)
-        return Task.objects.create(**validated_data)
+        return services.create_task(**validated_data)
 
     def update(self, instance, validated_data):
-        # обычное обновление без tags (теги через отдельные ручки)
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        return instance
+        # обычное обновление без tags (теги через отдельные ручки); expected_version — из If-Match (save(...))
+        expected_version = validated_data.pop("expected_version", None)
+        return services.update_task(task=instance, data=validated_data, expected_version=expected_version)
 
     # helper для общей валидации
     def _val(self, attrs, name, default=None):
@@ -87,6 +121,106 @@ class TaskStatsSerializer(serializers.Serializer):
     percent = serializers.FloatField()
 
 
+class TagUsageQuery(serializers.Serializer):
+    prefix = serializers.CharField(required=False, default="", allow_blank=True, max_length=100)
+    limit = serializers.IntegerField(required=False, default=50, min_value=1, max_value=500)
+
+
+class TagUsageSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    total = serializers.IntegerField()
+    done = serializers.IntegerField()
+
+
+class TaskSyncQuery(serializers.Serializer):
+    cursor = serializers.CharField(required=False, default=None, max_length=512)
+    page_size = serializers.IntegerField(required=False, default=200, min_value=1, max_value=1000)
+
+    def validate_cursor(self, value):
+        return SyncCursor.decode(value) if value else None
+
+
+class TaskSyncResultSerializer(serializers.Serializer):
+    changed = TaskSerializer(many=True)
+    deleted = serializers.ListField(child=serializers.IntegerField())
+    cursor = serializers.CharField()
+    has_more = serializers.BooleanField()
+
+
+class TaskBulkInput(serializers.Serializer):
+    create = serializers.ListField(child=serializers.DictField(), required=False, default=list,
+                                   max_length=TASK_BULK_MAX_ITEMS)
+    update = serializers.ListField(child=serializers.DictField(), required=False, default=list,
+                                   max_length=TASK_BULK_MAX_ITEMS)
+    toggle = serializers.ListField(child=serializers.IntegerField(), required=False, default=list,
+                                   max_length=TASK_BULK_MAX_ITEMS)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False, default=list,
+                                   max_length=TASK_BULK_MAX_ITEMS)
+
+    def validate_update(self, items):
+        # type(), а не isinstance: bool — подкласс int, и {"id": true} обновил бы задачу 1
+        if any(type(item.get("id")) is not int for item in items):
+            raise serializers.ValidationError("Every update item needs an integer 'id'.")
+        if any("version" in item and type(item["version"]) is not int for item in items):
+            raise serializers.ValidationError("Update item 'version' must be an integer.")
+        return items
+
+    def validate(self, attrs):
+        ids = [item["id"] for item in attrs["update"]] + attrs["toggle"] + attrs["delete"]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each task may appear in only one operation.")
+        return attrs
+
+    def target_ids(self):
+        data = self.validated_data
+        return {item["id"] for item in data["update"]} | set(data["toggle"]) | set(data["delete"])
+
+
+class TaskBulkResultSerializer(serializers.Serializer):
+    created = TaskSerializer(many=True)
+    updated = TaskSerializer(many=True)
+    toggled = TaskSerializer(many=True)
+    deleted = serializers.ListField(child=serializers.IntegerField())
+
+
+class TaskBulkTagInput(serializers.Serializer):
+    task_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False,
+                                     max_length=TASK_BULK_MAX_ITEMS * 5)
+    tag_ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    tag_names = serializers.ListField(child=serializers.CharField(max_length=100), required=False, default=list)
+
+    def validate(self, attrs):
+        if not attrs["tag_ids"] and not attrs["tag_names"]:
+            raise serializers.ValidationError("Provide 'tag_ids' and/or 'tag_names'.")
+        return attrs
+
+
+class TaskBulkTagResultSerializer(serializers.Serializer):
+    task_ids = serializers.ListField(child=serializers.IntegerField())
+    tags = TagSerializer(many=True)
+
+
+class JobSerializer(serializers.ModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name="jobs-detail")
+
+    class Meta:
+        model = Job
+        fields = ["id", "url", "kind", "status", "attempts", "max_attempts", "created_at", "run_after",
+                  "finished_at", "result", "error"]
+        read_only_fields = fields
+
+
+class TaskPublicIdsInput(serializers.Serializer):
+    public_ids = serializers.ListField(child=serializers.CharField(max_length=32), allow_empty=False,
+                                       max_length=TASK_BULK_MAX_ITEMS * 5)
+
+
+class TaskPublicIdsResultSerializer(serializers.Serializer):
+    results = TaskSerializer(many=True)
+    missing = serializers.ListField(child=serializers.CharField())
+
+
 class TaskAddTagInput(serializers.Serializer):
     tag_id = serializers.IntegerField(required=False)
     tag_name = serializers.CharField(required=False)
@@ -123,4 +257,38 @@ def validate_title(self, v)
 и сериалайзер для создавания нового тэга и добавления его в таск.
 
 
-'''
\ No newline at end of file
+'''
+
+
+class TaskAgendaQuery(serializers.Serializer):
+    tz = serializers.CharField(required=False, default="", allow_blank=True, max_length=64)
+    per_bucket = serializers.IntegerField(required=False, default=5, min_value=1, max_value=50)
+    months = serializers.IntegerField(required=False, default=3, min_value=0, max_value=12)
+
+    def validate_tz(self, value):
+        # границы "сегодня"/"неделя" считаются в часовом поясе пользователя
+        try:
+            return ZoneInfo(value or settings.TIME_ZONE)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError("Unknown time zone.")
+
+
+class AgendaTaskSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    due_date = serializers.DateField(allow_null=True)
+    version = serializers.IntegerField()
+
+
+class AgendaBucketSerializer(serializers.Serializer):
+    key = serializers.CharField()
+    start = serializers.DateField(allow_null=True)
+    end = serializers.DateField(allow_null=True)
+    count = serializers.IntegerField()
+    tasks = AgendaTaskSerializer(many=True)
+
+
+class TaskAgendaSerializer(serializers.Serializer):
+    today = serializers.DateField()
+    timezone = serializers.CharField()
+    buckets = AgendaBucketSerializer(many=True)
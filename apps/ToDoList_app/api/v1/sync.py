@@ -0,0 +1,115 @@
+"""
+Delta-sync задач для мобильных клиентов (/tasks/sync/).
+
+Ответ — всё, что изменилось после курсора: задачи с updated_at позже позиции курсора
+(созданные, изменённые, с привязанными/отвязанными тегами — сервисы трогают updated_at)
+и id удалённых задач из TaskTombstone (туда же попадают задачи, унесённые в архив
+services.archive_done_tasks: для клиента они удалены, читаются через ?include_archived=).
+Оба потока читаются keyset'ом по индексам (user, updated_at, id) и (user, deleted_at, id),
+каждый — не больше limit строк за запрос: трафик и стоимость зависят от числа изменений,
+а не от числа задач.
+
+Курсор — непрозрачный base64(JSON) с позициями обоих потоков. Изменения моложе
+TASK_SYNC_LAG_SECONDS не отдаются: транзакция, начатая раньше, может закоммитить более ранний
+updated_at уже после того, как курсор ушёл вперёд. Курсор старше TASK_SYNC_TOMBSTONE_DAYS —
+410: надгробия за этот период уже могли быть вычищены, нужна полная синхронизация (без курсора).
+"""
+import json
+from base64 import b64decode, b64encode
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from apps.ToDoList_app import services
+
+Position = Tuple[datetime, int]
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Sync cursor expired, full resync required."
+    default_code = "cursor_expired"
+
+
+@dataclass(frozen=True)
+class SyncCursor:
+    changed: Position
+    deleted: Position
+
+    def encode(self) -> str:
+        tokens = {"c": [self.changed[0].isoformat(), self.changed[1]],
+                  "d": [self.deleted[0].isoformat(), self.deleted[1]]}
+        return b64encode(json.dumps(tokens, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+    @classmethod
+    def decode(cls, encoded: str) -> "SyncCursor":
+        try:
+            tokens = json.loads(b64decode(encoded.encode("ascii"), validate=True).decode("utf-8"))
+            positions = [(datetime.fromisoformat(tokens[key][0]), int(tokens[key][1])) for key in ("c", "d")]
+        except (TypeError, ValueError, KeyError, IndexError, UnicodeError):
+            raise serializers.ValidationError("Invalid cursor.")
+        if any(timezone.is_naive(moment) for moment, _ in positions):
+            raise serializers.ValidationError("Invalid cursor.")
+        return cls(*positions)
+
+
+@dataclass
+class SyncPage:
+    changed: list  # строки queryset'а задач (модели или values()-словари) по возрастанию (updated_at, id)
+    deleted: List[int]
+    cursor: SyncCursor
+    has_more: bool
+
+
+def _after(field: str, position: Position) -> Q:
+    moment, pk = position
+    return Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "id__gt": pk})
+
+
+def _position(row, field: str) -> Position:
+    if isinstance(row, dict):
+        return row[field], row["id"]
+    return getattr(row, field), row.id
+
+
+def _window(queryset, field: str, position: Position, upper: datetime, limit: int):
+    rows = list(
+        queryset.filter(_after(field, position), **{f"{field}__lte": upper}).order_by(field, "id")[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    # поток исчерпан — позиция подтягивается к upper, чтобы курсор не "старел" без удалений
+    last = _position(rows[-1], field) if rows else position
+    return rows, (last if has_more else max(last, (upper, 0))), has_more
+
+
+def page(tasks, tombstones, cursor: Optional[SyncCursor], limit: int, now: Optional[datetime] = None) -> SyncPage:
+    """
+    Одна страница изменений. tasks — задачи пользователя (queryset моделей или values() с id/updated_at),
+    tombstones — TaskTombstone пользователя. Первый запрос (cursor=None) отдаёт все задачи;
+    удаления считаются с момента начала синхронизации.
+    """
+    now = now or timezone.now()
+    upper = now - timedelta(seconds=getattr(settings, "TASK_SYNC_LAG_SECONDS", 2))
+    if cursor is None:
+        cursor = SyncCursor(changed=(EPOCH, 0), deleted=(upper, 0))
+    elif cursor.deleted[0] < now - services.tombstone_retention():
+        raise CursorExpired()
+
+    changed, changed_at, more_changed = _window(tasks, "updated_at", cursor.changed, upper, limit)
+    gone, deleted_at, more_deleted = _window(
+        tombstones.only("id", "task_id", "deleted_at"), "deleted_at", cursor.deleted, upper, limit
+    )
+    return SyncPage(
+        changed=changed,
+        deleted=[tombstone.task_id for tombstone in gone],
+        cursor=SyncCursor(changed=changed_at, deleted=deleted_at),
+        has_more=more_changed or more_deleted,
+    )
@@ -1,7 +1,22 @@
+from django.urls import path, re_path
 from rest_framework.routers import DefaultRouter
 from apps.ToDoList_app.api.v1.views import TaskViewSet
+from apps.ToDoList_app.api.v1.async_views import TaskAsyncReadView
+from apps.ToDoList_app.api.v1.health import DatabaseStatsView
+from apps.ToDoList_app.api.v1.jobs import JobViewSet
 router = DefaultRouter()
 
 router.register(r'tasks', TaskViewSet , basename='tasks')
+router.register(r'jobs', JobViewSet, basename='jobs')  # статус фоновых заданий (Prefer: respond-async)
 
-urlpatterns = router.urls
\ No newline at end of file
+# async-чтение для ASGI (тот же вывод, что у tasks-list / tasks-detail / tasks-stats)
+async_urlpatterns = [
+    path('async/tasks/', TaskAsyncReadView.as_view(action='list'), name='tasks-async-list'),
+    path('async/tasks/stats/', TaskAsyncReadView.as_view(action='stats'), name='tasks-async-stats'),
+    re_path(r'^async/tasks/(?P<pk>[^/.]+)/$', TaskAsyncReadView.as_view(action='retrieve'),
+            name='tasks-async-detail'),
+]
+
+urlpatterns = router.urls + async_urlpatterns + [
+    path('health/db/', DatabaseStatsView.as_view(), name='health-db'),  # соединения/пул этого воркера, staff
+]
@@ -1,21 +1,32 @@
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework import viewsets, status
+from django.utils import timezone
+from rest_framework import serializers, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, extend_schema_view
 
-from apps.ToDoList_app.docs import TASK_FILTER_PARAMS, DELETE_TAG_PARAMS
-from apps.ToDoList_app.domain.models import Task, Tag  # Tag может понадобиться для queryset фильтров
+from apps.ToDoList_app.docs import TASK_FILTER_PARAMS, DELETE_TAG_PARAMS, EXPORT_PARAMS, PUBLIC_ID_PARAMS, TAG_USAGE_PARAMS, SYNC_PARAMS, IF_MATCH_PARAMS, AGENDA_PARAMS, ARCHIVE_PARAMS, SPARSE_PARAMS, PREFER_ASYNC_PARAMS
+from apps.ToDoList_app.domain.models import Task, Tag, TaskTombstone, decode_public_id  # Tag может понадобиться для queryset фильтров
 from apps.ToDoList_app.api.v1.serializers import (
     TaskSerializer, TaskListSerializer,
     TaskChangeTitleSerializer, TaskCompleteSerializer, TaskStatsSerializer,
-    TaskAddTagInput, TagSerializer
+    TaskAddTagInput, TagSerializer, TaskBulkInput, TaskBulkResultSerializer,
+    TaskBulkTagInput, TaskBulkTagResultSerializer, TaskPublicIdsInput, TaskPublicIdsResultSerializer,
+    TagUsageQuery, TagUsageSerializer, TaskSyncQuery, TaskSyncResultSerializer,
+    TaskAgendaQuery, TaskAgendaSerializer, JobSerializer,
 )
 from apps.ToDoList_app.api.v1.permissions import IsOwnerOrReadOnly
-from apps.ToDoList_app.api.v1.filters import TaskFilter
+from apps.ToDoList_app.api.v1.filters import TaskFilter, TaskSearchFilter, TaskOrderingFilter
+from apps.ToDoList_app.api.v1.pagination import TaskKeysetPagination
+from apps.ToDoList_app.api.v1.mixins import (
+    BackgroundJobMixin, CachedResponseMixin, ConditionalWriteMixin, FastReadMixin, PhaseTimingMixin, QueryBudgetMixin,
+    SparseFieldsMixin,
+)
+from apps.ToDoList_app.api.v1 import fast_serializers, export, sync
 
 # НОВОЕ: импорт слоёв
 from apps.ToDoList_app import selectors
@@ -23,13 +34,21 @@ from apps.ToDoList_app import services
 
 
 @extend_schema(parameters=[])
-class TaskViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    partial_update=extend_schema(parameters=IF_MATCH_PARAMS),
+    list=extend_schema(parameters=ARCHIVE_PARAMS + SPARSE_PARAMS),
+    retrieve=extend_schema(parameters=SPARSE_PARAMS),
+)
+class TaskViewSet(PhaseTimingMixin, QueryBudgetMixin, ConditionalWriteMixin, CachedResponseMixin, SparseFieldsMixin,
+                  FastReadMixin, BackgroundJobMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all()  # DRF требует атрибут, но фактически используем get_queryset()
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     filterset_class = TaskFilter
+    pagination_class = TaskKeysetPagination
+    sparse_serializer_class = TaskSerializer
 
     # filters
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter, TaskOrderingFilter]
     filterset_fields = {
         "is_done": ["exact"],
         "due_date": ["exact", "gte", "lte"],
@@ -47,6 +66,13 @@ class TaskViewSet(viewsets.ModelViewSet):
         "complete": TaskCompleteSerializer,
         "stats": TaskStatsSerializer,
         "add_tag": TaskAddTagInput,
+        "bulk": TaskBulkInput,
+        "bulk_tag": TaskBulkTagInput,
+        "bulk_untag": TaskBulkTagInput,
+        "by_public_ids": TaskPublicIdsInput,
+        "tag_usage": TagUsageQuery,
+        "sync": TaskSyncQuery,
+        "agenda": TaskAgendaQuery,
     }
 
     # мапа action → пермишены
@@ -61,11 +87,83 @@ class TaskViewSet(viewsets.ModelViewSet):
         "complete": [IsAuthenticated, IsOwnerOrReadOnly],
         "stats": [IsAuthenticated],
         "add_tag": [IsAuthenticated, IsOwnerOrReadOnly],
+        "bulk": [IsAuthenticated],  # задачи берутся только из get_queryset() — чужие не найдутся
+        "bulk_tag": [IsAuthenticated],
+        "bulk_untag": [IsAuthenticated],
+        "export": [IsAuthenticated],
+        "by_public_id": [IsAuthenticated],
+        "by_public_ids": [IsAuthenticated],
+        "tag_usage": [IsAuthenticated],
+        "sync": [IsAuthenticated],
+        "agenda": [IsAuthenticated],
+    }
+
+    # бюджет SQL-запросов на действие (middleware.QueryBudgetMiddleware, TaskQueryBudgetTests);
+    # в мутациях учтён UPDATE TaskCounter, который подписчик событий делает после коммита
+    query_budgets = {
+        "list": 4,  # 1; +1 на теги (?expand=tags); include_archived — вдвое больше
+        "retrieve": 2,
+        "get_all_tasks_and_their_info": 2,
+        "create": 2,
+        "update": 4,
+        "partial_update": 4,
+        "destroy": 5,
+        "change_title": 3,
+        "toggle": 4,
+        "add_tag": 6,
+        "list_tags": 2,
+        "delete_tag": 3,
+        "stats": 5,  # первый вызов заводит счётчик, дальше — 1; без счётчиков — агрегат + COUNT по архиву
+        "bulk": 21,  # пачки по batch_size: 1000 элементов укладываются в 21 (с SELECT ... FOR UPDATE версий)
+        "bulk_tag": 10,  # связи вставляются пачками
+        "bulk_untag": 4,
+        "by_public_id": 2,
+        "by_public_ids": 2,  # одна выборка по PK + одна по тегам на любой размер пачки
+        "tag_usage": 1,
+        "sync": 3,  # изменённые задачи + их теги + надгробия, от объёма данных не зависит
+        "agenda": 1,  # все корзины — один запрос с оконными функциями
     }
 
+    cached_actions = ("list", "retrieve", "by_public_id", "agenda")
+
+    # действия, которым префетч тегов не нужен (тегов не отдают или перечитывают после изменения)
+    untagged_actions = {"destroy", "add_tag", "delete_tag", "bulk_tag", "bulk_untag", "stats", "export"}
+
     # ← теперь строим qs через селектор
     def get_queryset(self):
-        return selectors.tasks_for_user(user=self.request.user)
+        projection = self.projection()
+        if projection is not None:  # list/retrieve: колонки и теги — по полям ответа (?fields= / ?expand=)
+            only, with_tags = projection
+            return selectors.tasks_for_user(user=self.request.user, with_tags=with_tags, only=only)
+        return selectors.tasks_for_user(user=self.request.user, with_tags=self.action not in self.untagged_actions)
+
+    def archived_queryset(self):
+        """
+        ?include_archived=true на list: архив пользователя с теми же фильтрами (TaskFilter), что и задачи;
+        None — архив не нужен. Полнотекстовый индекс есть только у горячей таблицы — с ?search= не сочетается.
+        """
+        if self.action != "list":
+            return None
+        raw = self.request.query_params.get("include_archived")
+        try:
+            include = raw is not None and serializers.BooleanField().to_internal_value(raw)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({"include_archived": exc.detail})
+        if not include:
+            return None
+        if self.request.query_params.get(TaskSearchFilter.search_param):
+            raise serializers.ValidationError({"include_archived": ["Can't be combined with search."]})
+        only, with_tags = self.projection()
+        archived = selectors.archived_for_user(user=self.request.user, with_tags=with_tags, only=only)
+        return TaskFilter(self.request.query_params, queryset=archived, request=self.request).qs
+
+    def paginate_queryset(self, queryset):
+        archived = self.archived_queryset()
+        if archived is None or self.paginator is None:
+            return super().paginate_queryset(queryset)
+        if queryset.query.values_select:  # быстрый путь (values()) — те же колонки из архива
+            archived = archived.values(*queryset.query.values_select)
+        return self.paginator.paginate_querysets([queryset, archived], self.request, view=self)
 
     def get_serializer_class(self):
         return self.action_serializers.get(self.action, TaskSerializer)
@@ -74,37 +172,235 @@ class TaskViewSet(viewsets.ModelViewSet):
         classes = self.action_permissions.get(self.action, [IsAuthenticated])
         return [cls() for cls in classes]
 
+    @extend_schema(parameters=IF_MATCH_PARAMS)
+    def update(self, request, *args, **kwargs):
+        # DRF после сохранения сбрасывает _prefetched_objects_cache (вдруг поменялись M2M) и теги
+        # перечитываются. Через update теги не меняются (read_only) — отдаём префетченные.
+        partial = kwargs.pop("partial", False)
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
+
+    def perform_update(self, serializer):
+        serializer.save(expected_version=self.expected_version())
+
+    def perform_destroy(self, instance):
+        services.delete_task(task=instance)
+
     # ---- кастомные действия ----
 
     @extend_schema(parameters=TASK_FILTER_PARAMS)
     @action(detail=False, methods=["get"])
     def get_all_tasks_and_their_info(self, request, pk=None):
         qs = self.filter_queryset(self.get_queryset())  # фильтры DRF поверх нашего базового qs
-        serializer = self.get_serializer(qs, many=True)
-        return Response(serializer.data)
+        if self.fast_enabled():
+            return self.fast_paginated_response(qs, fast_serializers.DETAIL_FIELDS)
+        page = self.paginate_queryset(qs)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(parameters=EXPORT_PARAMS + PREFER_ASYNC_PARAMS,
+                   responses={(200, "application/x-ndjson"): str, (200, "text/csv"): str, 202: JobSerializer})
+    @action(detail=False, methods=["get"])
+    def export(self, request, pk=None):
+        file_format = request.query_params.get("file_format", "ndjson")
+        if file_format not in export.STREAMS:
+            return Response({"error": "file_format must be one of: ndjson, csv"}, status=status.HTTP_400_BAD_REQUEST)
+        if self.wants_async():  # файл соберёт воркер, забрать — /jobs/<id>/download/
+            return self.accepted("export", {"query": request.query_params.urlencode()})
+
+        qs = self.filter_queryset(self.get_queryset())  # те же фильтры/поиск/сортировка, что у списка
+        content_type, extension = export.FORMATS[file_format]
+        response = StreamingHttpResponse(export.STREAMS[file_format](qs), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="tasks.{extension}"'
+        return response
 
+    @extend_schema(parameters=PUBLIC_ID_PARAMS + SPARSE_PARAMS, responses=TaskSerializer)
+    @action(detail=False, methods=["get"], url_path=r"by-public/(?P<public_id>[^/.]+)")
+    def by_public_id(self, request, public_id=None):
+        # публичный ID декодируется в PK арифметически — дальше обычный retrieve по первичному ключу
+        pk = decode_public_id(public_id)
+        if pk is None:
+            raise Http404(f"No {Task._meta.object_name} matches the given query.")
+        self.kwargs[self.lookup_url_kwarg or self.lookup_field] = pk
+        return self.retrieve(request, pk=pk)
+
+    @extend_schema(request=TaskPublicIdsInput, responses=TaskPublicIdsResultSerializer)
+    @action(detail=False, methods=["post"], url_path="by-public")
+    def by_public_ids(self, request, pk=None):
+        inp = self.get_serializer(data=request.data)
+        inp.is_valid(raise_exception=True)
+        pks = {public_id: decode_public_id(public_id) for public_id in inp.validated_data["public_ids"]}
+
+        qs = self.get_queryset().filter(pk__in={pk for pk in pks.values() if pk is not None})
+        if self.fast_enabled():
+            serializer = fast_serializers.FastTaskSerializer(fast_serializers.DETAIL_FIELDS)
+            rows = serializer.serialize(list(serializer.values(qs)))
+        else:
+            rows = TaskSerializer(qs, many=True, context=self.get_serializer_context()).data
+        by_pk = {row["id"]: row for row in rows}
+
+        # порядок ответа — как во входном списке (дубликаты схлопываются)
+        results = [by_pk[pk] for pk in pks.values() if pk in by_pk]
+        missing = [public_id for public_id, pk in pks.items() if pk not in by_pk]
+        return Response({"results": results, "missing": missing}, status=status.HTTP_200_OK)
+
+    @extend_schema(parameters=IF_MATCH_PARAMS)
     @action(detail=True, methods=["post"])
     def change_title(self, request, pk=None):
         task = self.get_object()
         ser = self.get_serializer(instance=task, data=request.data, partial=True)
         ser.is_valid(raise_exception=True)
         # бизнес-логика — в сервис
-        task = services.change_title(task=task, title=ser.validated_data["title"])
+        task = services.change_title(task=task, title=ser.validated_data["title"],
+                                     expected_version=self.expected_version())
         return Response(TaskSerializer(task, context=self.get_serializer_context()).data, status=status.HTTP_200_OK)
 
+    @extend_schema(parameters=IF_MATCH_PARAMS)
     @action(detail=True, methods=["post"])
     def toggle(self, request, pk=None):
         task = self.get_object()
-        task = services.toggle_task_done(task=task)
+        task = services.toggle_task_done(task=task, expected_version=self.expected_version())
         return Response(TaskSerializer(task, context=self.get_serializer_context()).data, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["get"])
     def stats(self, request, pk=None):
-        qs = self.get_queryset()
-        payload = selectors.task_stats(qs)
+        if getattr(settings, "TASK_STATS_USE_COUNTERS", True):
+            payload = selectors.counter_stats(user=request.user)
+            if payload is None:  # первый запрос — заводим счётчик
+                services.rebuild_task_counters(user_ids=[request.user.id])
+                payload = selectors.counter_stats(user=request.user)
+        else:
+            payload = selectors.task_stats(self.get_queryset(), archived=selectors.archived_for_user(user=request.user))
         ser = self.get_serializer(instance=payload)
         return Response(ser.data, status=status.HTTP_200_OK)
 
+    @extend_schema(parameters=SYNC_PARAMS, responses=TaskSyncResultSerializer)
+    @action(detail=False, methods=["get"])
+    def sync(self, request, pk=None):
+        params = self.get_serializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        fast = self.fast_enabled()
+        serializer = fast_serializers.FastTaskSerializer(fast_serializers.DETAIL_FIELDS)
+        tasks = serializer.values(self.get_queryset(), extra=["id", "updated_at"]) if fast else self.get_queryset()
+
+        page = sync.page(tasks, TaskTombstone.objects.filter(user_id=request.user.id),
+                         params.validated_data["cursor"], params.validated_data["page_size"])
+        if fast:
+            changed = serializer.serialize(page.changed)
+        else:
+            changed = TaskSerializer(page.changed, many=True, context=self.get_serializer_context()).data
+        return Response({
+            "changed": changed,
+            "deleted": page.deleted,
+            "cursor": page.cursor.encode(),
+            "has_more": page.has_more,
+        }, status=status.HTTP_200_OK)
+
+    @extend_schema(parameters=AGENDA_PARAMS, responses=TaskAgendaSerializer)
+    @action(detail=False, methods=["get"])
+    def agenda(self, request, pk=None):
+        params = self.get_serializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        tz = params.validated_data["tz"]
+        today = timezone.localdate(timezone=tz)
+
+        def build():
+            buckets = selectors.agenda(user=request.user, today=today, per_bucket=params.validated_data["per_bucket"],
+                                       months=params.validated_data["months"])
+            payload = {"today": today, "timezone": tz.key, "buckets": buckets}
+            return Response(TaskAgendaSerializer(payload).data, status=status.HTTP_200_OK)
+
+        # кэш на день пользователя: мутации задач двигают версию кэша, смена дня — ключ
+        return self._cached_response(request, build, today.isoformat())
+
+    @extend_schema(parameters=TAG_USAGE_PARAMS, responses=TagUsageSerializer(many=True))
+    @action(detail=False, methods=["get"], url_path="tags")
+    def tag_usage(self, request, pk=None):
+        # облако тегов/автодополнение из TagUsage: задачи не читаются вовсе
+        params = self.get_serializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(selectors.tag_usage(user=request.user, **params.validated_data), status=status.HTTP_200_OK)
+
+    @extend_schema(request=TaskBulkInput, responses=TaskBulkResultSerializer)
+    @action(detail=False, methods=["post"])
+    def bulk(self, request, pk=None):
+        inp = self.get_serializer(data=request.data)
+        inp.is_valid(raise_exception=True)
+        ops = inp.validated_data
+
+        tasks = {t.id: t for t in self.get_queryset().filter(id__in=inp.target_ids())}
+        ctx = self.get_serializer_context()
+        create = TaskSerializer(data=ops["create"], many=True, context=ctx)
+        update = TaskSerializer(instance=tasks, data=ops["update"], many=True, partial=True, context=ctx)
+
+        errors = {}
+        if not create.is_valid():
+            errors["create"] = create.errors
+        if not update.is_valid():
+            errors["update"] = update.errors
+        for op in ("toggle", "delete"):
+            missing = [task_id for task_id in ops[op] if task_id not in tasks]
+            if missing:
+                errors[op] = [f"Task {task_id} not found" for task_id in missing]
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = services.bulk_apply(
+                user=request.user,
+                create=create.validated_data,
+                update=[(tasks[item["id"]], data) for item, data in zip(ops["update"], update.validated_data)],
+                toggle=[tasks[task_id] for task_id in ops["toggle"]],
+                delete=[tasks[task_id] for task_id in ops["delete"]],
+                versions={item["id"]: item["version"] for item in ops["update"] if "version" in item},
+            )
+        except services.BulkVersionConflict as exc:  # вся пачка откатилась; как 412 у If-Match, но по задачам
+            return Response({"update": [f"Task {task_id} was modified by another request" for task_id in exc.task_ids]},
+                            status=status.HTTP_412_PRECONDITION_FAILED)
+        return Response(TaskBulkResultSerializer(result, context=ctx).data, status=status.HTTP_200_OK)
+
+    def _bulk_tagging(self, request, service, kind):
+        inp = self.get_serializer(data=request.data)
+        inp.is_valid(raise_exception=True)
+        requested = set(inp.validated_data["task_ids"])
+
+        owned = set(self.get_queryset().filter(id__in=requested).values_list("id", flat=True))
+        if requested - owned:
+            return Response({"task_ids": [f"Task {i} not found" for i in sorted(requested - owned)]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if self.wants_async():
+            return self.accepted(kind, {
+                "task_ids": sorted(owned),
+                "tag_ids": inp.validated_data["tag_ids"],
+                "tag_names": inp.validated_data["tag_names"],
+            })
+        try:
+            tags = service(
+                user=request.user,
+                task_ids=sorted(owned),
+                tag_ids=inp.validated_data["tag_ids"],
+                tag_names=inp.validated_data["tag_names"],
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        out = TaskBulkTagResultSerializer({"task_ids": sorted(owned), "tags": tags})
+        return Response(out.data, status=status.HTTP_200_OK)
+
+    @extend_schema(request=TaskBulkTagInput, responses={200: TaskBulkTagResultSerializer, 202: JobSerializer},
+                   parameters=PREFER_ASYNC_PARAMS)
+    @action(detail=False, methods=["post"])
+    def bulk_tag(self, request, pk=None):
+        return self._bulk_tagging(request, services.bulk_tag_tasks, "bulk_tag")
+
+    @extend_schema(request=TaskBulkTagInput, responses={200: TaskBulkTagResultSerializer, 202: JobSerializer},
+                   parameters=PREFER_ASYNC_PARAMS)
+    @action(detail=False, methods=["post"])
+    def bulk_untag(self, request, pk=None):
+        return self._bulk_tagging(request, services.bulk_untag_tasks, "bulk_untag")
+
     @action(detail=True, methods=["post"], serializer_class=TaskAddTagInput)
     def add_tag(self, request, pk=None):
         task = self.get_object()
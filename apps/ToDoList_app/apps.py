@@ -1,9 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class TodolistAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'ToDoList_app'
+    name = 'apps.ToDoList_app'
 
     def ready(self):
-        pass
+        from apps.ToDoList_app import dbstats, search, signals  # noqa: F401 — подписчики событий и сигналов
+        from apps.ToDoList_app.api.v1 import jobs  # noqa: F401 — обработчики фоновых заданий (и воркеру тоже)
+        # без sender: модели лежат в domain/, models_module у конфига пустой и сигнал с sender=self не приходит
+        post_migrate.connect(search.ensure_installed, dispatch_uid="todolist_search_triggers")
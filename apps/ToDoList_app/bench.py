@@ -0,0 +1,88 @@
+# apps/ToDoList_app/bench.py
+"""Общие утилиты для management-команд bench_*: изолированная БД, синтетические данные, перцентили."""
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence
+
+from django.db import connection
+
+from .domain.models import Tag, Task, TaskTag
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "zu", "pe", "dro", "gan", "bel", "tis", "mor"]
+
+
+@contextmanager
+def isolated_database(verbosity: int = 0):
+    """Отдельная тестовая БД (как у manage.py test) — бенчмарки не трогают рабочие данные."""
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def vocabulary(rng: random.Random, size: int = 5000) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def seed_tasks(user, count: int, *, rng: random.Random, words: Sequence[str],
+               tags: Sequence[Tag] = (), tags_per_task: int = 0, batch_size: int = 5000) -> None:
+    """bulk_create задач (и связей с тегами) пачками — сид на 1M строк укладывается в минуты."""
+    for start in range(0, count, batch_size):
+        batch = [
+            Task(
+                user=user,
+                title=" ".join(rng.choice(words) for _ in range(rng.randint(3, 6)))[:100],
+                is_done=rng.random() < 0.3,
+            )
+            for _ in range(min(batch_size, count - start))
+        ]
+        Task.objects.bulk_create(batch)
+        if tags and tags_per_task:
+            links = [
+                TaskTag(task_id=task.id, tag_id=tag.id)
+                for task in batch
+                for tag in rng.sample(list(tags), min(tags_per_task, len(tags)))
+            ]
+            TaskTag.objects.bulk_create(links, batch_size=batch_size)
+
+
+def percentile(samples: Sequence[float], p: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Секунды → сводка в миллисекундах."""
+    ms = [s * 1000 for s in samples]
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+
+def timed(fn: Callable[[], object], repeat: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
@@ -0,0 +1,63 @@
+# apps/ToDoList_app/caching.py
+"""
+Кэш ответов по задачам пользователя.
+
+У каждого пользователя есть счётчик-версия; он входит в ключ каждого закэшированного ответа.
+Любая мутация задач двигает версию (событие из services.py → подписчик в signals.py после коммита),
+и старые ответы просто перестают находиться — без перебора и удаления ключей.
+"""
+import hashlib
+import json
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def _cache():
+    return caches[getattr(settings, "TASK_RESPONSE_CACHE_ALIAS", "default")]
+
+def enabled() -> bool:
+    return getattr(settings, "TASK_RESPONSE_CACHE_ENABLED", True)
+
+def _version_key(user_id: int) -> str:
+    return f"tasks:v:{user_id}"
+
+def user_version(user_id: int) -> int:
+    cache = _cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        # версия вытеснена/ещё не заведена — стартуем с метки времени, а не с 1,
+        # чтобы не совпасть с версией старых, ещё живых записей
+        cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+def bump_user_version(user_id: int) -> None:
+    cache = _cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+
+def invalidate_user(user_id: int) -> None:
+    """Сбросить кэш пользователя. Зовётся подписчиком событий уже после коммита (signals.py)."""
+    if enabled():
+        bump_user_version(user_id)
+
+def response_key(user_id: int, *parts: Any) -> str:
+    digest = hashlib.sha256("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:40]
+    return f"tasks:r:{user_id}:{user_version(user_id)}:{digest}"
+
+def get_entry(key: str) -> Optional[dict]:
+    return _cache().get(key)
+
+def set_entry(key: str, entry: dict) -> None:
+    _cache().set(key, entry, timeout=getattr(settings, "TASK_RESPONSE_CACHE_TIMEOUT", 300))
+
+def make_etag(data: Any) -> str:
+    """Сильный ETag — хэш канонического JSON представления."""
+    payload = json.dumps(data, cls=JSONEncoder, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
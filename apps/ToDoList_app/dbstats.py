@@ -0,0 +1,68 @@
+"""
+Метрики соединений с БД в этом процессе-воркере (GET /api/health/db/, только staff).
+
+Счётчики живут в памяти процесса: у каждого воркера gunicorn/uvicorn — свои, поэтому в ответе
+есть pid. connects — сколько раз Django открыл соединение (сигнал connection_created; с пулом —
+сколько раз взял соединение из пула), requests — сколько запросов обработал воркер.
+connects / requests около 1 — соединение открывается на каждый запрос (CONN_MAX_AGE = 0 без пула),
+около 0 — соединения переиспользуются. Для пула psycopg добавляется его get_stats().
+"""
+import os
+import threading
+from collections import Counter
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_lock = threading.Lock()
+_connects = Counter()  # alias → число открытий
+_requests = 0
+
+
+@receiver(connection_created, dispatch_uid="todolist_dbstats_connect")
+def count_connect(sender, connection, **kwargs):
+    with _lock:
+        _connects[connection.alias] += 1
+
+
+@receiver(request_started, dispatch_uid="todolist_dbstats_request")
+def count_request(sender, **kwargs):
+    global _requests
+    with _lock:
+        _requests += 1
+
+
+def pool_stats(connection):
+    """get_stats() пула psycopg; None — пул для этой БД не настроен."""
+    if not connection.settings_dict.get("OPTIONS", {}).get("pool"):
+        return None
+    pool = getattr(connection, "pool", None)
+    return dict(pool.get_stats()) if pool is not None else None
+
+
+def snapshot() -> dict:
+    with _lock:
+        connects, requests = dict(_connects), _requests
+    databases = {}
+    for alias in connections:
+        conn = connections[alias]
+        count = connects.get(alias, 0)
+        databases[alias] = {
+            "vendor": conn.vendor,
+            "conn_max_age": conn.settings_dict.get("CONN_MAX_AGE"),
+            "health_checks": conn.settings_dict.get("CONN_HEALTH_CHECKS", False),
+            "connects": count,
+            "connects_per_request": round(count / requests, 3) if requests else None,
+            "pool": pool_stats(conn),
+        }
+    return {"pid": os.getpid(), "requests": requests, "databases": databases}
+
+
+def reset() -> None:
+    """Обнулить счётчики (тесты, bench_db)."""
+    global _requests
+    with _lock:
+        _connects.clear()
+        _requests = 0
@@ -5,16 +5,33 @@ TASK_FILTER_PARAMS = [
                      description="Фильтр по статусу"),
     OpenApiParameter("tags__id", OpenApiTypes.INT, OpenApiParameter.QUERY,
                      description="Фильтр по ID тега"),
+    OpenApiParameter("tags_all", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="ID тегов через запятую — задачи со всеми этими тегами (1,2,3)"),
+    OpenApiParameter("tags_any", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="ID тегов через запятую — задачи хотя бы с одним из тегов (4,5)"),
     OpenApiParameter("due_from", OpenApiTypes.DATE, OpenApiParameter.QUERY,
                      description="Дедлайн с (YYYY-MM-DD)"),
     OpenApiParameter("due_to", OpenApiTypes.DATE, OpenApiParameter.QUERY,
                      description="Дедлайн по (YYYY-MM-DD)"),
     OpenApiParameter("search", OpenApiTypes.STR, OpenApiParameter.QUERY,
-                     description="Поиск по title"),
+                     description="Полнотекстовый поиск по title (без ordering — по релевантности)"),
     OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
                      description="Сортировка: id, -id, due_date, -due_date, created_at, -created_at"),
 ]
 
+ARCHIVE_PARAMS = [
+    OpenApiParameter("include_archived", OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                     description="Добавить в список архивные задачи (выполненные давно); не сочетается с search"),
+]
+
+SPARSE_PARAMS = [
+    OpenApiParameter("fields", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="Только эти поля задачи, через запятую (id,title,due_date); "
+                                 "лишние колонки не читаются из БД"),
+    OpenApiParameter("expand", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="Добавить связи: tags (теги — отдельный запрос, только если запрошены)"),
+]
+
 DELETE_TAG_PARAMS = [
     OpenApiParameter(
         name="tag_id",
@@ -23,4 +40,47 @@ DELETE_TAG_PARAMS = [
         required=True,
         description="ID тега, который отвязать от задачи",
     ),
-]
\ No newline at end of file
+]
+
+EXPORT_PARAMS = TASK_FILTER_PARAMS + [
+    OpenApiParameter("file_format", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["ndjson", "csv"],
+                     description="Формат выгрузки (по умолчанию ndjson)"),
+]
+
+PUBLIC_ID_PARAMS = [
+    OpenApiParameter("public_id", OpenApiTypes.STR, OpenApiParameter.PATH,
+                     description="Публичный ID задачи, например T-4E21"),
+]
+
+TAG_USAGE_PARAMS = [
+    OpenApiParameter("prefix", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="Начало имени тега (без учёта регистра) — для автодополнения"),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY,
+                     description="Сколько тегов вернуть (1–500, по умолчанию 50)"),
+]
+
+SYNC_PARAMS = [
+    OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="Курсор из прошлого ответа; без него — полная синхронизация"),
+    OpenApiParameter("page_size", OpenApiTypes.INT, OpenApiParameter.QUERY,
+                     description="Максимум изменённых и удалённых задач в ответе (каждого вида, 1–1000)"),
+]
+
+AGENDA_PARAMS = [
+    OpenApiParameter("tz", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="Часовой пояс пользователя (IANA, например Europe/Moscow); по умолчанию TIME_ZONE"),
+    OpenApiParameter("per_bucket", OpenApiTypes.INT, OpenApiParameter.QUERY,
+                     description="Сколько задач отдать в каждой корзине (1–50, по умолчанию 5)"),
+    OpenApiParameter("months", OpenApiTypes.INT, OpenApiParameter.QUERY,
+                     description="Сколько помесячных корзин после текущей недели (0–12, по умолчанию 3)"),
+]
+
+IF_MATCH_PARAMS = [
+    OpenApiParameter("If-Match", OpenApiTypes.STR, OpenApiParameter.HEADER,
+                     description="Ожидаемая версия задачи (поле version). Не совпала — 412, изменение не применяется. Без заголовка запись повторяется; не удалась — 409"),
+]
+
+PREFER_ASYNC_PARAMS = [
+    OpenApiParameter("Prefer", OpenApiTypes.STR, OpenApiParameter.HEADER,
+                     description="respond-async — выполнить в фоне: 202 и статус задания (Location: /api/jobs/<id>/)"),
+]
@@ -1,14 +1,37 @@
+import re
+from typing import Optional
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 # Create your models here.
 
 #tags
 class Tag(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
     def __str__(self):
         return f'{self.name}'
 
+# публичный ID задачи: "T-" + hex(pk + 20000). Обратимо арифметикой — отдельная колонка и индекс
+# не нужны, поиск по публичному ID идёт по первичному ключу.
+PUBLIC_ID_OFFSET = 20000
+_PUBLIC_ID_RE = re.compile(r"T-([0-9A-F]{1,15})", re.IGNORECASE)
+
+
+def encode_public_id(pk: int) -> str:
+    return f"T-{pk + PUBLIC_ID_OFFSET:X}"
+
+
+def decode_public_id(public_id: str) -> Optional[int]:
+    """PK по публичному ID; None — строка не похожа на ID задачи."""
+    match = _PUBLIC_ID_RE.fullmatch(public_id.strip()) if isinstance(public_id, str) else None
+    if match is None:
+        return None
+    pk = int(match.group(1), 16) - PUBLIC_ID_OFFSET
+    return pk if pk > 0 else None
+
+
 class Task(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=100)
@@ -16,16 +39,170 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     due_date = models.DateField(null=True, blank=True)
+    # оптимистичная блокировка: каждая запись — UPDATE ... WHERE version = N SET version = N + 1 (If-Match)
+    version = models.PositiveIntegerField(default=1)
+
+    tags = models.ManyToManyField(Tag, through="TaskTag", related_name="tasks", blank=True)
 
-    tags = models.ManyToManyField(Tag, related_name="tasks", blank=True)
+    class Meta:
+        # все запросы идут в рамках user_id: индексы под фактические фильтры/сортировки
+        indexes = [
+            models.Index(fields=["user", "-id"], name="task_user_id_desc_idx"),
+            # фильтр is_done и повестка (/tasks/agenda/: открытые задачи по сроку)
+            models.Index(fields=["user", "is_done", "due_date"], name="task_user_done_due_idx"),
+            models.Index(fields=["user", "due_date"], name="task_user_due_idx"),
+            models.Index(fields=["user", "created_at"], name="task_user_created_idx"),
+            models.Index(fields=["user", "updated_at", "id"], name="task_user_updated_idx"),  # delta-sync
+        ]
 
     @property
     def public_id(self):
-        return f"T-{self.id + 20000:X}"
+        return encode_public_id(self.id)
 
     def __str__(self):
         return f'{self.created_at.strftime("%m/%d/%Y")} {self.title}'
 
+# явная through-таблица для Task.tags (та же таблица, что создал Django) — ради индекса по tag_id
+class TaskTag(models.Model):
+    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "ToDoList_app_task_tags"
+        unique_together = [("task", "tag")]
+        indexes = [models.Index(fields=["tag", "task"], name="task_tags_tag_task_idx")]
+
+    def __str__(self):
+        return f'{self.task_id} -> {self.tag_id}'
+
+# FTS5-индекс по Task.title (только SQLite): виртуальная таблица task_fts, синхронизируется триггерами
+class TaskSearchEntry(models.Model):
+    task = models.OneToOneField(Task, primary_key=True, db_column="rowid", on_delete=models.DO_NOTHING,
+                                related_name="search_entry")
+    title = models.TextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "task_fts"
+
+# счётчики для /tasks/stats/ — обновляются сервисами инкрементально
+class TaskCounter(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="task_counter")
+    total = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.done}/{self.total}'
+
+# удалённые задачи для delta-sync (/tasks/sync/); старше TASK_SYNC_TOMBSTONE_DAYS чистит prune_task_tombstones
+class TaskTombstone(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="task_tombstones")
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "deleted_at", "id"], name="task_tombstone_user_idx")]
+
+    def __str__(self):
+        return f'{self.user_id}: -{self.task_id}'
+
+# выполненные задачи старше TASK_ARCHIVE_AFTER_DAYS, вынесенные из горячей таблицы (services.archive_done_tasks).
+# id тот же, что был у задачи: публичный ID и курсоры клиентов не меняются. Читается через ?include_archived=
+class TaskArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_tasks")
+    title = models.CharField(max_length=100)
+    is_done = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    due_date = models.DateField(null=True, blank=True)
+    version = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    tags = models.ManyToManyField(Tag, through="TaskArchiveTag", related_name="archived_tasks", blank=True)
+
+    class Meta:
+        # те же сортировки, что у списка задач — слияние с горячей таблицей идёт keyset'ом по обеим
+        indexes = [
+            models.Index(fields=["user", "-id"], name="task_archive_user_id_idx"),
+            models.Index(fields=["user", "due_date"], name="task_archive_user_due_idx"),
+            models.Index(fields=["user", "created_at"], name="task_archive_user_created_idx"),
+        ]
+
+    @property
+    def public_id(self):
+        return encode_public_id(self.id)
+
+    def __str__(self):
+        return f'{self.created_at.strftime("%m/%d/%Y")} {self.title} (archived)'
+
+# связи архивных задач с тегами; FK называется task, как у TaskTag, — фильтры по тегам работают на обеих таблицах
+class TaskArchiveTag(models.Model):
+    task = models.ForeignKey(TaskArchive, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = [("task", "tag")]
+        indexes = [models.Index(fields=["tag", "task"], name="task_archive_tags_tag_idx")]
+
+    def __str__(self):
+        return f'{self.task_id} -> {self.tag_id} (archived)'
+
+# теги пользователя с числом задач (всего/выполнено) для облака тегов и автодополнения;
+# пересчитываются подписчиком событий по затронутым тегам (signals.update_tag_usage)
+class TagUsage(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tag_usage")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="usage")
+    name_lower = models.CharField(max_length=100)  # Tag.name в нижнем регистре — префиксный поиск по индексу
+    total = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [("user", "tag")]
+        indexes = [
+            models.Index(fields=["user", "name_lower"], name="tag_usage_user_name_idx"),
+            models.Index(fields=["user", "-total", "name_lower"], name="tag_usage_user_total_idx"),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} #{self.name_lower}: {self.done}/{self.total}'
+
+
+# фоновое задание (jobs.py): очередь прямо в БД, без брокера — воркер run_jobs забирает готовые
+# (status=queued, run_after <= now) условным UPDATE и выполняет в пуле потоков
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUSES = [(QUEUED, "Queued"), (RUNNING, "Running"), (SUCCEEDED, "Succeeded"), (FAILED, "Failed")]
+
+    kind = models.CharField(max_length=50)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="jobs", null=True, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)  # не раньше; ретраи откладываются с backoff
+    locked_by = models.CharField(max_length=100, blank=True, default="")  # воркер (host:pid)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # частичные индексы: в них только ждущие/выполняемые задания, а не вся история
+            models.Index(fields=["run_after", "id"], condition=models.Q(status="queued"), name="job_queued_idx"),
+            models.Index(fields=["locked_at"], condition=models.Q(status="running"), name="job_running_idx"),
+            models.Index(fields=["user", "-id"], name="job_user_idx"),
+        ]
+
+    def __str__(self):
+        return f'#{self.id} {self.kind} ({self.status})'
+
 '''
 
 Создаем две модели. 
@@ -0,0 +1,141 @@
+# apps/ToDoList_app/events.py
+"""
+События жизненного цикла задач.
+
+Сервисы оборачиваются в events.atomic (вместо transaction.atomic) и вызывают emit(); события
+копятся пачкой на время транзакции и уходят подписчикам одним вызовом по transaction.on_commit.
+Откат транзакции или savepoint'а — его события не уходят вовсе. Внутри events.atomic вложенные
+savepoint'ы с emit() тоже должны быть events.atomic: события обычного вложенного atomic попадают
+в пачку объемлющего уровня, и откат такого savepoint'а их не отменит.
+Bulk-операции публикуют одно событие на пачку, а не по событию на задачу.
+Подписчики регистрируются через @subscribe (см. signals.py).
+"""
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+TOGGLED = "toggled"
+TAGGED = "tagged"
+UNTAGGED = "untagged"
+ARCHIVED = "archived"  # перенесены в TaskArchive: для счётчиков и TagUsage задачи остаются на месте
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    kind: str
+    user_id: int
+    task_ids: Tuple[int, ...]
+    total_delta: int = 0  # изменение числа задач пользователя
+    done_delta: int = 0   # изменение числа выполненных
+    tag_ids: Tuple[int, ...] = ()  # затронутые теги (привязка/отвязка, удаление задач с тегами)
+
+
+Handler = Callable[[List[TaskEvent]], None]
+_handlers: List[Handler] = []
+_local = threading.local()
+_sequence = itertools.count()
+
+
+def subscribe(handler: Handler) -> Handler:
+    """Подписать обработчик пачки событий (используется как декоратор)."""
+    if handler not in _handlers:
+        _handlers.append(handler)
+    return handler
+
+
+def unsubscribe(handler: Handler) -> None:
+    if handler in _handlers:
+        _handlers.remove(handler)
+
+
+class _Level:
+    """События одного events.atomic: (порядковый номер, событие) — номер восстанавливает порядок при слиянии."""
+
+    def __init__(self):
+        self.events: List[Tuple[int, TaskEvent]] = []
+
+
+def _levels() -> List[_Level]:
+    return _local.__dict__.setdefault("levels", [])
+
+
+def atomic(using=None):
+    """Как transaction.atomic: @atomic, @atomic(using=...) или with atomic():."""
+    if callable(using):
+        return _atomic()(using)
+    return _atomic(using)
+
+
+@contextmanager
+def _atomic(using=None):
+    """
+    transaction.atomic, копящий события emit() пачкой. Каждый уровень при успешном выходе
+    регистрирует свой колбэк transaction.on_commit — внутри своего savepoint'а, поэтому откат
+    (этого уровня или любого объемлющего atomic, в том числе обычного) выкидывает колбэк сам Django.
+    Колбэки вложенных уровней складывают события в буфер потока, колбэк внешнего — зарегистрирован
+    последним и отдаёт подписчикам всё одной пачкой.
+    """
+    with transaction.atomic(using=using):
+        level = _Level()
+        levels = _levels()
+        levels.append(level)
+        try:
+            yield
+        finally:
+            levels.pop()
+        # сюда доходим только без исключения: транзакция уровня будет зафиксирована
+        if levels:
+            if level.events:
+                transaction.on_commit(partial(_buffer().extend, level.events), using=using)
+        else:  # внешний уровень — всегда: в буфере могут быть события вложенных
+            transaction.on_commit(partial(_flush, level.events), using=using)
+
+
+def _buffer() -> List[Tuple[int, TaskEvent]]:
+    return _local.__dict__.setdefault("committed", [])
+
+
+def _flush(events: List[Tuple[int, TaskEvent]]) -> None:
+    buffered = _buffer()
+    merged = sorted(buffered + events, key=lambda item: item[0])
+    buffered.clear()
+    dispatch([event for _, event in merged])
+
+
+def emit(kind: str, *, user_id: int, task_ids=(), total_delta: int = 0, done_delta: int = 0, tag_ids=()) -> None:
+    event = TaskEvent(kind, user_id, tuple(task_ids), total_delta, done_delta, tuple(tag_ids))
+    levels = _levels()
+    if levels:
+        levels[-1].events.append((next(_sequence), event))
+        return
+    # вне events.atomic: вне транзакции on_commit вызывает сразу, внутри обычного atomic — после коммита
+    # (своей пачкой: границы его savepoint'ов публичным API не узнать)
+    transaction.on_commit(partial(dispatch, [event]))
+
+
+async def aemit(kind: str, **kwargs) -> None:
+    """emit() для async-сервисов: подписчики синхронно ходят в БД — отдаём их в поток ORM."""
+    await sync_to_async(emit)(kind, **kwargs)
+
+
+def dispatch(events: List[TaskEvent]) -> None:
+    """Отдать пачку всем подписчикам; падение одного не мешает остальным (коммит уже был)."""
+    if not events:
+        return
+    for handler in list(_handlers):
+        try:
+            handler(events)
+        except Exception:
+            logger.exception("Task event handler %r failed", handler)
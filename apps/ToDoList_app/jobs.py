@@ -0,0 +1,178 @@
+# apps/ToDoList_app/jobs.py
+"""
+Фоновые задания: очередь в таблице Job, без брокера — одинаково на SQLite и PostgreSQL.
+
+enqueue() кладёт задание (в транзакции вызывающего: откат — задания нет), воркер
+(manage.py run_jobs) забирает готовые через claim() и выполняет run() в пуле потоков.
+Захват — условный UPDATE ... WHERE status = 'queued' (как запись задачи по версии в services._write):
+одно задание достаётся одному воркеру, а на PostgreSQL кандидаты ещё и выбираются с
+FOR UPDATE SKIP LOCKED — воркеры не ждут друг друга. Временные ошибки (retry_on) повторяются
+с backoff до max_attempts, остальные сразу дают failed. Пока задание выполняется, воркер
+продлевает его lease (heartbeat()), поэтому долгое задание не считается брошенным; задание,
+чей воркер умер, через TASK_JOB_LEASE_SECONDS возвращает в очередь requeue_stale().
+
+Обработчик — функция (job) -> dict | None (результат уходит в Job.result), регистрируется
+через @register("<kind>"). Обработчики сервисов — ниже, выгрузки — в api/v1/jobs.py.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import services
+from .domain.models import Job, Task
+
+logger = logging.getLogger(__name__)
+
+# блокировки, обрывы соединения, диск; IntegrityError, DataError и прочие DatabaseError —
+# ошибки в данных, повтор их не исправит
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, OSError)
+
+
+@dataclass(frozen=True)
+class JobType:
+    func: Callable[[Job], Optional[dict]]
+    max_attempts: int
+    retry_on: Tuple[type, ...]
+
+
+_registry: Dict[str, JobType] = {}
+
+
+def register(kind: str, *, max_attempts: Optional[int] = None, retry_on: Tuple[type, ...] = TRANSIENT_ERRORS):
+    """Зарегистрировать обработчик заданий kind (используется как декоратор)."""
+    def decorator(func):
+        attempts = max_attempts if max_attempts is not None else getattr(settings, "TASK_JOB_MAX_ATTEMPTS", 3)
+        _registry[kind] = JobType(func=func, max_attempts=attempts, retry_on=retry_on)
+        return func
+    return decorator
+
+
+def kinds() -> List[str]:
+    return sorted(_registry)
+
+
+def enqueue(kind: str, *, user_id: Optional[int] = None, payload: Optional[dict] = None,
+            delay: Optional[timedelta] = None) -> Job:
+    if kind not in _registry:
+        raise ValueError(f"Unknown job kind {kind!r}.")
+    return Job.objects.create(
+        kind=kind,
+        user_id=user_id,
+        payload=payload or {},
+        max_attempts=_registry[kind].max_attempts,
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+
+
+def claim(*, worker: str, limit: int = 1, kinds: Optional[Iterable[str]] = None) -> List[Job]:
+    """Забрать до limit готовых заданий (по индексу job_queued_idx, старые первыми) и пометить running."""
+    now = timezone.now()
+    ready = Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+    if kinds:
+        ready = ready.filter(kind__in=list(kinds))
+    with transaction.atomic():
+        ready = ready.select_for_update(skip_locked=True).order_by("run_after", "id")
+        ids = list(ready.values_list("id", flat=True)[:limit])
+        if not ids:
+            return []
+        # status=queued в WHERE: задание, которое параллельный воркер успел забрать, не перезахватывается
+        Job.objects.filter(id__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F("attempts") + 1,
+        )
+    return list(Job.objects.filter(id__in=ids, status=Job.RUNNING, locked_by=worker).order_by("id"))
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=getattr(settings, "TASK_JOB_RETRY_DELAY", 5) * 2 ** max(attempts - 1, 0))
+
+
+def _finish(job: Job, **fields) -> Job:
+    # только если задание всё ещё за этим воркером (его не вернул в очередь requeue_stale)
+    Job.objects.filter(id=job.id, status=Job.RUNNING, locked_by=job.locked_by).update(**fields)
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return job
+
+
+def run(job: Job) -> Job:
+    """Выполнить захваченное задание и записать итог: succeeded, снова queued (ретрай) или failed."""
+    job_type = _registry.get(job.kind)
+    try:
+        if job_type is None:
+            raise LookupError(f"Unknown job kind {job.kind!r}.")
+        result = job_type.func(job)
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        if job_type is not None and isinstance(exc, job_type.retry_on) and job.attempts < job.max_attempts:
+            logger.warning("job %s (%s) attempt %s failed, retrying: %s", job.id, job.kind, job.attempts, error)
+            return _finish(job, status=Job.QUEUED, error=error, locked_by="", locked_at=None,
+                           run_after=timezone.now() + _retry_delay(job.attempts))
+        logger.exception("job %s (%s) failed", job.id, job.kind)
+        return _finish(job, status=Job.FAILED, error=error, finished_at=timezone.now())
+    return _finish(job, status=Job.SUCCEEDED, result=result, error="", finished_at=timezone.now())
+
+
+def heartbeat(*, worker: str, job_ids: Iterable[int]) -> int:
+    """Продлить lease заданий, которые воркер ещё выполняет (locked_at = сейчас)."""
+    return Job.objects.filter(id__in=list(job_ids), status=Job.RUNNING, locked_by=worker).update(
+        locked_at=timezone.now(),
+    )
+
+
+def requeue_stale(*, lease: Optional[timedelta] = None) -> int:
+    """running дольше lease (воркер умер или завис) — обратно в очередь; попытки кончились — failed."""
+    lease = lease if lease is not None else timedelta(seconds=getattr(settings, "TASK_JOB_LEASE_SECONDS", 600))
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - lease)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, error="Worker lease expired.", finished_at=now,
+    )
+    return failed + stale.update(status=Job.QUEUED, locked_by="", locked_at=None, run_after=now)
+
+
+# ---- обработчики ----
+
+def _owned(job: Job, task_ids) -> List[int]:
+    """Задачи пользователя задания, которые ещё существуют (между enqueue и запуском их могли удалить)."""
+    return sorted(Task.objects.filter(user_id=job.user_id, id__in=task_ids).values_list("id", flat=True))
+
+
+def _bulk_tagging(service, job: Job) -> dict:
+    task_ids = _owned(job, job.payload["task_ids"])
+    tags = service(user=job.user, task_ids=task_ids, tag_ids=job.payload.get("tag_ids", ()),
+                   tag_names=job.payload.get("tag_names", ()))
+    return {"task_ids": task_ids, "tags": [{"id": tag.id, "name": tag.name} for tag in tags]}
+
+
+@register("bulk_tag")
+def bulk_tag(job: Job) -> dict:
+    return _bulk_tagging(services.bulk_tag_tasks, job)
+
+
+@register("bulk_untag")
+def bulk_untag(job: Job) -> dict:
+    return _bulk_tagging(services.bulk_untag_tasks, job)
+
+
+@register("archive_done_tasks")
+def archive_done_tasks(job: Job) -> dict:
+    # пачки коммитятся по одной: повтор после сбоя продолжает с того места, где остановился
+    days = job.payload.get("days")
+    moved = services.archive_done_tasks(
+        older_than=timedelta(days=days) if days is not None else None,
+        user_ids=job.payload.get("user_ids"),
+        batch_size=job.payload.get("batch_size", 1000),
+        limit=job.payload.get("limit"),
+    )
+    return {"archived": moved}
+
+
+@register("rebuild_task_counters")
+def rebuild_task_counters(job: Job) -> dict:
+    return {"users": services.rebuild_task_counters(user_ids=job.payload.get("user_ids"))}
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.ToDoList_app import jobs, services
+
+
+class Command(BaseCommand):
+    help = (
+        "Перенести в архив (TaskArchive) задачи, выполненные дольше TASK_ARCHIVE_AFTER_DAYS дней назад. "
+        "Пачками, каждая — отдельная транзакция; прерванный прогон безопасно перезапускать. Запускать по cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Вместо TASK_ARCHIVE_AFTER_DAYS")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--limit", type=int, help="Не больше N задач за прогон")
+        parser.add_argument("--user", type=int, action="append", dest="user_ids", help="Только эти пользователи")
+        parser.add_argument("--enqueue", action="store_true", help="Не выполнять, а поставить задание воркеру (run_jobs)")
+
+    def handle(self, *args, days=None, batch_size, limit=None, user_ids=None, enqueue=False, **options):
+        if enqueue:
+            job = jobs.enqueue("archive_done_tasks", payload={
+                "days": days, "batch_size": batch_size, "limit": limit, "user_ids": user_ids,
+            })
+            self.stdout.write(self.style.SUCCESS(f"Enqueued job {job.id}"))
+            return
+        moved = services.archive_done_tasks(
+            older_than=timedelta(days=days) if days is not None else None,
+            user_ids=user_ids, batch_size=batch_size, limit=limit,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} task(s)"))
@@ -0,0 +1,183 @@
+import itertools
+import json
+import platform
+import random
+import sqlite3
+import tracemalloc
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.ToDoList_app import bench, services
+from apps.ToDoList_app.domain.models import Tag, Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк ручек /api/tasks/ через тестовый клиент на изолированной БД (офлайн, SQLite): "
+        "p50/p95/p99, запросов к БД на вызов и пик аллокаций на вызов. --json — для сравнения релизов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5)
+        parser.add_argument("--tasks", type=int, default=2_000, help="Задач на пользователя")
+        parser.add_argument("--tags", type=int, default=50)
+        parser.add_argument("--tags-per-task", type=int, default=2)
+        parser.add_argument("--repeat", type=int, default=200, help="Замеров латентности на ручку")
+        parser.add_argument("--profile-repeat", type=int, default=20, help="Вызовов для подсчёта запросов и аллокаций")
+        parser.add_argument("--case", action="append", dest="cases", help="Только эти ручки (можно несколько раз)")
+        parser.add_argument("--response-cache", action="store_true", help="Не выключать кэш ответов list/retrieve")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", dest="json_path", help="Куда сохранить результаты")
+        parser.add_argument("--baseline", help="JSON прошлого прогона — вывести разницу")
+
+    def handle(self, *args, **opts):
+        baseline = self._load_baseline(opts["baseline"]) if opts["baseline"] else None
+        rng = random.Random(opts["seed"])
+        results = []
+
+        with bench.isolated_database(), override_settings(TASK_RESPONSE_CACHE_ENABLED=opts["response_cache"]):
+            clients, words = self._seed(rng, opts)
+            cases = self._cases(clients, words, rng)
+            unknown = set(opts["cases"] or ()) - set(cases)
+            if unknown:
+                raise CommandError(f"Unknown case(s): {', '.join(sorted(unknown))}. Available: {', '.join(cases)}")
+
+            for name, call in cases.items():
+                if opts["cases"] and name not in opts["cases"]:
+                    continue
+                row = {"case": name, **self._measure(call, opts["repeat"], opts["profile_repeat"])}
+                results.append(row)
+                self.stdout.write(self._format(row, baseline.get(name) if baseline else None))
+
+        meta = {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "sqlite": sqlite3.sqlite_version,
+            **{key: opts[key] for key in ("users", "tasks", "tags", "tags_per_task", "repeat", "seed", "response_cache")},
+        }
+        if opts["json_path"]:
+            with open(opts["json_path"], "w", encoding="utf-8") as fh:
+                json.dump({"meta": meta, "results": results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved to {opts['json_path']}"))
+
+    # ---- данные ----
+
+    def _seed(self, rng, opts):
+        words = bench.vocabulary(rng, size=500)
+        tags = Tag.objects.bulk_create([Tag(name=f"tag-{i}") for i in range(opts["tags"])])
+        clients = []
+        for i in range(opts["users"]):
+            user = User.objects.create_user(f"bench-{i}")
+            bench.seed_tasks(user, opts["tasks"], rng=rng, words=words, tags=tags, tags_per_task=opts["tags_per_task"])
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+            task_ids = list(Task.objects.filter(user=user).values_list("id", flat=True))
+            clients.append((client, rng.sample(task_ids, min(len(task_ids), 100))))
+        services.rebuild_tag_usage()  # сид пишет связи напрямую, мимо событий
+        self.stdout.write(f"Seeded {opts['users']} user(s) × {opts['tasks']} task(s), {opts['tags']} tag(s)")
+        return clients, words
+
+    def _cases(self, clients, words, rng):
+        """Ручка → функция одного вызова; пользователи и задачи чередуются по кругу."""
+        targets = itertools.cycle([(client, task_id) for client, ids in clients for task_id in ids])
+        users = itertools.cycle([client for client, _ in clients])
+        search_words = itertools.cycle(rng.sample(words, 50))
+        tag_names = itertools.cycle([f"tag-{i}" for i in range(10)])
+
+        def get(url):
+            return lambda: next(users).get(url)
+
+        def on_task(method, url, **kwargs):
+            def call():
+                client, task_id = next(targets)
+                return getattr(client, method)(url.format(id=task_id), **kwargs)
+            return call
+
+        def search():
+            return next(users).get(f"/api/tasks/?search={next(search_words)}")
+
+        def add_tag():
+            client, task_id = next(targets)
+            return client.post(f"/api/tasks/{task_id}/add_tag/", {"tag_name": next(tag_names)}, format="json")
+
+        first_tag = Tag.objects.order_by("id").values_list("id", flat=True).first()
+        return {
+            "list": get("/api/tasks/"),
+            "list_filtered": get("/api/tasks/?is_done=false&ordering=created_at"),
+            "retrieve": on_task("get", "/api/tasks/{id}/"),
+            "stats": get("/api/tasks/stats/"),
+            "get_all_tasks_and_their_info": get("/api/tasks/get_all_tasks_and_their_info/"),
+            "search": search,
+            "list_tags": on_task("get", "/api/tasks/{id}/list_tags/"),
+            "tag_usage": get("/api/tasks/tags/"),
+            "tag_autocomplete": get("/api/tasks/tags/?prefix=tag-1"),
+            "agenda": get("/api/tasks/agenda/?tz=Europe/Moscow"),
+            "add_tag": add_tag,
+            "delete_tag": on_task("delete", f"/api/tasks/{{id}}/delete_tag/?tag_id={first_tag}"),
+        }
+
+    # ---- замеры ----
+
+    @staticmethod
+    def _measure(call, repeat, profile_repeat):
+        errors = 0
+
+        def checked():
+            nonlocal errors
+            response = call()
+            errors += response.status_code >= 400
+
+        stats = bench.summarize(bench.timed(checked, repeat=repeat, warmup=5))
+
+        queries = []
+        for _ in range(profile_repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                checked()
+            queries.append(len(ctx.captured_queries))
+
+        # отдельный проход: tracemalloc заметно замедляет код и исказил бы латентность
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(profile_repeat):
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                checked()
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+
+        return {
+            **stats,
+            "queries_mean": round(sum(queries) / len(queries), 2) if queries else 0.0,
+            "queries_max": max(queries, default=0),
+            "alloc_peak_kb": round(sum(peaks) / len(peaks) / 1024, 1) if peaks else 0.0,
+            "errors": errors,
+        }
+
+    # ---- вывод ----
+
+    @staticmethod
+    def _load_baseline(path):
+        with open(path, encoding="utf-8") as fh:
+            return {row["case"]: row for row in json.load(fh)["results"]}
+
+    @staticmethod
+    def _format(row, before=None):
+        line = (
+            f"{row['case']:<30} p50 {row['p50_ms']:>8.2f}  p95 {row['p95_ms']:>8.2f}  p99 {row['p99_ms']:>8.2f} ms  "
+            f"queries {row['queries_mean']:>5.1f} (max {row['queries_max']})  alloc {row['alloc_peak_kb']:>8.1f} KiB"
+        )
+        if row["errors"]:
+            line += f"  errors {row['errors']}"
+        if before:
+            delta = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+            line += f"  | p95 {delta:+.1f}%  queries {row['queries_mean'] - before['queries_mean']:+.1f}"
+        return line
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.ToDoList_app import bench
+from apps.ToDoList_app.domain.models import Tag
+
+PATHS = {
+    "sync": "/api/tasks/",
+    "async": "/api/async/tasks/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест ASGI в одном процессе (как один воркер uvicorn): sync-ручки DRF против "
+        "/api/async/tasks/ при N одновременных медленных клиентах."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=2_000)
+        parser.add_argument("--requests", type=int, default=500, help="Запросов на каждый прогон")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+        parser.add_argument("--client-delay-ms", type=float, default=20.0,
+                            help="Сколько клиент 'читает' тело ответа (медленная сеть)")
+        parser.add_argument("--query", default="page_size=50")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", dest="json_path", help="Куда сохранить результаты")
+
+    def handle(self, *args, tasks, requests, concurrency, client_delay_ms, query, seed, json_path=None, **options):
+        rng = random.Random(seed)
+        results = []
+
+        with bench.isolated_database(), override_settings(TASK_RESPONSE_CACHE_ENABLED=False):
+            user = User.objects.create_user("bench")
+            tags = Tag.objects.bulk_create([Tag(name=f"tag-{i}") for i in range(20)])
+            bench.seed_tasks(user, tasks, rng=rng, words=bench.vocabulary(rng, size=500), tags=tags, tags_per_task=2)
+            token = str(RefreshToken.for_user(user).access_token)
+            app = get_asgi_application()
+
+            for level in concurrency:
+                for name, path in PATHS.items():
+                    stats = asyncio.run(self._run(app, path, query, token, requests, level, client_delay_ms / 1000))
+                    results.append({"path": name, "concurrency": level, **stats})
+                    self.stdout.write(
+                        f"c={level:<4} {name:<6} {stats['rps']:>9.1f} req/s  p50 {stats['p50_ms']:>9.2f} ms  "
+                        f"p95 {stats['p95_ms']:>9.2f} ms  p99 {stats['p99_ms']:>9.2f} ms  errors {stats['errors']}"
+                    )
+
+        if json_path:
+            with open(json_path, "w", encoding="utf-8") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved to {json_path}"))
+
+    async def _run(self, app, path, query, token, total, concurrency, delay):
+        headers = [(b"host", b"testserver"), (b"authorization", f"Bearer {token}".encode())]
+        gate = asyncio.Semaphore(concurrency)
+        samples, errors = [], 0
+
+        async def client():
+            nonlocal errors
+            async with gate:
+                started = time.perf_counter()
+                status = await self._request(app, path, query, headers, delay)
+                samples.append(time.perf_counter() - started)
+                errors += status != 200
+
+        await self._request(app, path, query, headers, 0)  # прогрев
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        return {**bench.summarize(samples), "rps": round(total / elapsed, 1), "errors": errors}
+
+    @staticmethod
+    async def _request(app, path, query, headers, delay):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+            "root_path": "", "headers": headers, "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+        }
+        done = asyncio.Event()
+        sent = False
+        status = None
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                if delay:
+                    await asyncio.sleep(delay)  # медленный клиент вычитывает тело
+                if not message.get("more_body"):
+                    done.set()
+
+        await app(scope, receive, send)
+        done.set()
+        return status
@@ -0,0 +1,170 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+
+from apps.ToDoList_app import bench, dbstats
+
+ALIAS = "bench_db"
+
+
+def sqlite_profiles():
+    """Профиль → (переопределения настроек БД, соединение на каждый запрос?)."""
+    return {
+        "connect-per-request": ({"CONN_MAX_AGE": 0, "OPTIONS": {}}, True),
+        "persistent": ({"CONN_MAX_AGE": None, "OPTIONS": {}}, False),
+        "persistent+pragmas": ({"CONN_MAX_AGE": None, "OPTIONS": settings.SQLITE_OPTIONS}, False),
+    }
+
+
+def postgres_profiles(pool_size):
+    profiles = {
+        "connect-per-request": ({"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False}, True),
+        "persistent+health-checks": ({"CONN_MAX_AGE": None, "CONN_HEALTH_CHECKS": True}, False),
+    }
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return profiles
+    pool = {"min_size": pool_size, "max_size": pool_size}
+    profiles["pool"] = ({"CONN_MAX_AGE": 0, "OPTIONS": {"pool": pool}}, True)
+    return profiles
+
+
+class Command(BaseCommand):
+    help = (
+        "Пропускная способность БД при разных профилях соединений: новое соединение на каждый запрос "
+        "(CONN_MAX_AGE = 0), постоянные соединения, PRAGMA для SQLite, пул psycopg для PostgreSQL. "
+        "Запрос эмулирует цикл Django: close_old_connections до и после, N чтений по PK и доля записей. "
+        "SQLite — во временном файле; PostgreSQL — в БД из --database (таблица bench_kv создаётся и удаляется)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Алиас из DATABASES (движок и параметры)")
+        parser.add_argument("--threads", type=int, default=4, help="Потоков-воркеров")
+        parser.add_argument("--seconds", type=float, default=3.0, help="Длительность прогона на профиль")
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--reads", type=int, default=3, help="Чтений по PK на запрос")
+        parser.add_argument("--writes", type=float, default=0.2, help="Доля запросов с UPDATE")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", dest="json_path", help="Куда сохранить результаты")
+
+    def handle(self, *args, database, threads, seconds, rows, reads, writes, seed, json_path=None, **options):
+        if database not in connections:
+            raise CommandError(f"Unknown database alias {database!r}.")
+        base = connections.settings[database]  # уже дополнен дефолтами Django (TIME_ZONE, AUTOCOMMIT, ...)
+        vendor = connections[database].vendor
+        if vendor == "sqlite":
+            profiles = sqlite_profiles()
+        elif vendor == "postgresql":
+            profiles = postgres_profiles(pool_size=threads)
+        else:
+            raise CommandError(f"Unsupported database vendor {vendor!r}.")
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, (overrides, per_request) in profiles.items():
+                config = {**base, **overrides}
+                if vendor == "sqlite":
+                    # у каждого профиля свой файл: journal_mode=WAL сохраняется в самой БД
+                    config["NAME"] = os.path.join(tmp, f"{name}.sqlite3")
+                stats = self._run_profile(config, per_request, threads, seconds, rows, reads, writes, seed)
+                results.append({"profile": name, **stats})
+                self.stdout.write(
+                    f"{vendor:<10} {name:<26} {stats['rps']:>9.1f} req/s  p50 {stats['p50_ms']:>7.2f} ms  "
+                    f"p95 {stats['p95_ms']:>7.2f} ms  connects {stats['connects']:>6}  errors {stats['errors']}"
+                )
+
+        if json_path:
+            meta = {"vendor": vendor, "threads": threads, "seconds": seconds, "reads": reads, "writes": writes}
+            with open(json_path, "w", encoding="utf-8") as fh:
+                json.dump({"meta": meta, "results": results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved to {json_path}"))
+
+    def _run_profile(self, config, per_request, threads, seconds, rows, reads, writes, seed):
+        connections.settings[ALIAS] = config
+        try:
+            self._setup(rows)
+            dbstats.reset()
+            samples, errors = [], 0
+            lock = threading.Lock()
+            deadline = time.perf_counter() + seconds
+
+            def worker(index):
+                nonlocal errors
+                rng = random.Random(seed + index)
+                conn = connections[ALIAS]
+                local_samples, local_errors = [], 0
+                try:
+                    while time.perf_counter() < deadline:
+                        started = time.perf_counter()
+                        try:
+                            self._request(conn, rng, rows, reads, writes)
+                        except DatabaseError:  # SQLite без WAL: "database is locked" под конкурентной записью
+                            local_errors += 1
+                            conn.close()
+                        local_samples.append(time.perf_counter() - started)
+                finally:
+                    conn.close()
+                with lock:
+                    samples.extend(local_samples)
+                    errors += local_errors
+
+            started = time.perf_counter()
+            workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+            return {
+                **bench.summarize(samples),
+                "rps": round(len(samples) / elapsed, 1),
+                "connects": dbstats.snapshot()["databases"].get(ALIAS, {}).get("connects", 0),
+                "errors": errors,
+                "per_request_connection": per_request,
+            }
+        finally:
+            self._teardown()
+            connections[ALIAS].close()
+            del connections[ALIAS]
+            del connections.settings[ALIAS]
+
+    @staticmethod
+    def _request(conn, rng, rows, reads, writes):
+        """Один запрос глазами Django: close_old_connections (request_started/finished) вокруг работы."""
+        conn.close_if_unusable_or_obsolete()
+        with conn.cursor() as cursor:
+            for _ in range(reads):
+                cursor.execute("SELECT value FROM bench_kv WHERE id = %s", [rng.randint(1, rows)])
+                cursor.fetchone()
+            if rng.random() < writes:
+                cursor.execute("UPDATE bench_kv SET value = %s WHERE id = %s",
+                               [f"v{rng.random():.6f}", rng.randint(1, rows)])
+        conn.close_if_unusable_or_obsolete()
+
+    @staticmethod
+    def _setup(rows):
+        conn = connections[ALIAS]
+        with conn.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS bench_kv")
+            cursor.execute("CREATE TABLE bench_kv (id integer PRIMARY KEY, value varchar(100) NOT NULL)")
+            for start in range(1, rows + 1, 500):
+                batch = range(start, min(start + 500, rows + 1))
+                cursor.execute(
+                    "INSERT INTO bench_kv (id, value) VALUES " + ", ".join(["(%s, %s)"] * len(batch)),
+                    [param for i in batch for param in (i, f"v{i}")],
+                )
+        conn.close()
+
+    @staticmethod
+    def _teardown():
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS bench_kv")
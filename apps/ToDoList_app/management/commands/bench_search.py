@@ -0,0 +1,54 @@
+import json
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from apps.ToDoList_app import bench, search, selectors
+
+
+class Command(BaseCommand):
+    help = "Сравнить задержку поиска LIKE и полнотекстового бэкенда на 10k/100k/1M задач."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--queries", type=int, default=50, help="Запросов на каждый замер")
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", dest="json_path", help="Куда сохранить результаты")
+
+    def handle(self, *args, sizes, queries, page_size, seed, json_path=None, **options):
+        rng = random.Random(seed)
+        words = bench.vocabulary(rng)
+        fts = search.get_backend()
+        backends = [search.LikeSearchBackend(), fts] if fts.name != "like" else [fts]
+        results = []
+
+        with bench.isolated_database():
+            user = User.objects.create_user("bench")
+            seeded = 0
+            for size in sorted(sizes):
+                self.stdout.write(f"seeding up to {size} tasks...")
+                bench.seed_tasks(user, size - seeded, rng=rng, words=words)
+                seeded = size
+                terms = [rng.choice(words) for _ in range(queries)]
+
+                for backend in backends:
+                    it = iter(terms)
+
+                    def run():
+                        qs = backend.search(selectors.tasks_for_user(user=user).prefetch_related(None), [next(it)])
+                        order = ["search_rank", "id"] if "search_rank" in qs.query.annotations else ["-id"]
+                        return list(qs.order_by(*order).values_list("id", flat=True)[:page_size])
+
+                    stats = bench.summarize(bench.timed(run, repeat=queries - 1))
+                    results.append({"tasks": size, "backend": backend.name, **stats})
+                    self.stdout.write(
+                        f"{size:>9} tasks  {backend.name:<8} p50 {stats['p50_ms']:>9.3f} ms  "
+                        f"p95 {stats['p95_ms']:>9.3f} ms  p99 {stats['p99_ms']:>9.3f} ms"
+                    )
+
+        if json_path:
+            with open(json_path, "w", encoding="utf-8") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved to {json_path}"))
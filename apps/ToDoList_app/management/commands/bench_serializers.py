@@ -0,0 +1,58 @@
+import json
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from apps.ToDoList_app import bench, selectors
+from apps.ToDoList_app.api.v1 import fast_serializers
+from apps.ToDoList_app.api.v1.serializers import TaskListSerializer, TaskSerializer
+from apps.ToDoList_app.domain.models import Tag
+
+
+class Command(BaseCommand):
+    help = "Микробенчмарк: ModelSerializer против fast_serializers на 1k/50k строк (запрос + сериализация + JSON)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 50_000])
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", dest="json_path", help="Куда сохранить результаты")
+
+    def handle(self, *args, rows, repeat, seed, json_path=None, **options):
+        rng = random.Random(seed)
+        words = bench.vocabulary(rng, size=500)
+        renderer = JSONRenderer()
+        results = []
+
+        with bench.isolated_database():
+            user = User.objects.create_user("bench")
+            tags = Tag.objects.bulk_create([Tag(name=f"tag-{i}") for i in range(20)])
+            seeded = 0
+            for size in sorted(rows):
+                bench.seed_tasks(user, size - seeded, rng=rng, words=words, tags=tags, tags_per_task=3)
+                seeded = size
+                qs = selectors.tasks_for_user(user=user)
+
+                cases = {
+                    "list/drf": lambda: renderer.render(TaskListSerializer(qs, many=True).data),
+                    "list/fast": lambda: self._fast(renderer, qs, fast_serializers.LIST_FIELDS),
+                    "detail/drf": lambda: renderer.render(TaskSerializer(qs, many=True).data),
+                    "detail/fast": lambda: self._fast(renderer, qs, fast_serializers.DETAIL_FIELDS),
+                }
+                for name, fn in cases.items():
+                    stats = bench.summarize(bench.timed(fn, repeat=repeat))
+                    results.append({"rows": size, "case": name, **stats})
+                    self.stdout.write(f"{size:>7} rows  {name:<12} p50 {stats['p50_ms']:>10.2f} ms  "
+                                      f"mean {stats['mean_ms']:>10.2f} ms")
+
+        if json_path:
+            with open(json_path, "w", encoding="utf-8") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved to {json_path}"))
+
+    @staticmethod
+    def _fast(renderer, qs, fields):
+        serializer = fast_serializers.FastTaskSerializer(fields)
+        return renderer.render(serializer.serialize(list(serializer.values(qs))))
@@ -0,0 +1,109 @@
+import json
+import random
+from functools import reduce
+from operator import and_
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Exists, OuterRef
+
+from apps.ToDoList_app import bench, selectors
+from apps.ToDoList_app.domain.models import Tag, TaskTag
+
+
+def _join_all(qs, tag_ids):
+    for tag_id in tag_ids:  # по JOIN на тег
+        qs = qs.filter(tags__id=tag_id)
+    return qs.distinct()
+
+
+def _join_any(qs, tag_ids):
+    return qs.filter(tags__id__in=tag_ids).distinct()
+
+
+def _exists_all(qs, tag_ids):
+    return qs.filter(reduce(and_, [Exists(TaskTag.objects.filter(task_id=OuterRef("pk"), tag_id=t)) for t in tag_ids]))
+
+
+def _exists_any(qs, tag_ids):
+    return qs.filter(Exists(TaskTag.objects.filter(task_id=OuterRef("pk"), tag_id__in=tag_ids)))
+
+
+def _having_all(qs, tag_ids):
+    groups = (
+        TaskTag.objects.filter(tag_id__in=tag_ids).values("task_id")
+        .annotate(n=Count("tag_id")).filter(n=len(tag_ids)).values("task_id")
+    )
+    return qs.filter(id__in=groups)
+
+
+def _in_any(qs, tag_ids):
+    return qs.filter(id__in=TaskTag.objects.filter(tag_id__in=tag_ids).values("task_id"))
+
+
+# стратегия → (tags_all, tags_any); "selectors" — то, что использует TaskFilter
+STRATEGIES = {
+    "join+distinct": (_join_all, _join_any),
+    "exists": (_exists_all, _exists_any),
+    "having": (_having_all, _in_any),
+    "selectors": (selectors.with_all_tags, selectors.with_any_tags),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Фильтры по сочетанию тегов (?tags_all= / ?tags_any=): JOIN+DISTINCT против EXISTS и GROUP BY ... HAVING "
+        "на N задачах с K тегами у каждой. Замер — первая страница списка (ORDER BY -id LIMIT page_size) и COUNT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=100_000)
+        parser.add_argument("--tags", type=int, default=200, help="Всего тегов")
+        parser.add_argument("--tags-per-task", type=int, default=20)
+        parser.add_argument("--combo", type=int, nargs="+", default=[2, 3, 5], help="Сколько тегов в фильтре")
+        parser.add_argument("--queries", type=int, default=30, help="Запросов на каждый замер")
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", dest="json_path", help="Куда сохранить результаты")
+
+    def handle(self, *args, tasks, tags, tags_per_task, combo, queries, page_size, seed, json_path=None, **options):
+        rng = random.Random(seed)
+        results = []
+
+        with bench.isolated_database():
+            user = User.objects.create_user("bench")
+            tag_objs = Tag.objects.bulk_create([Tag(name=f"tag-{i}") for i in range(tags)])
+            self.stdout.write(f"seeding {tasks} tasks × {tags_per_task} tags...")
+            bench.seed_tasks(user, tasks, rng=rng, words=bench.vocabulary(rng, size=500),
+                             tags=tag_objs, tags_per_task=tags_per_task)
+            base = selectors.tasks_for_user(user=user, with_tags=False)
+            tag_ids = [tag.id for tag in tag_objs]
+
+            for size in combo:
+                sets = [rng.sample(tag_ids, size) for _ in range(queries)]
+                for mode, index in (("all", 0), ("any", 1)):
+                    for name, funcs in STRATEGIES.items():
+                        build = funcs[index]
+                        it = iter(sets)
+
+                        def run():
+                            ids = next(it)
+                            return list(build(base, ids).values_list("id", flat=True)[:page_size])
+
+                        it_count = iter(sets)
+                        page_stats = bench.summarize(bench.timed(run, repeat=queries - 1))
+                        count_stats = bench.summarize(
+                            bench.timed(lambda: build(base, next(it_count)).count(), repeat=queries - 1)
+                        )
+                        row = {"mode": mode, "tags": size, "strategy": name, "page": page_stats, "count": count_stats}
+                        results.append(row)
+                        self.stdout.write(
+                            f"{mode:<4} {size} tags  {name:<14} page p50 {page_stats['p50_ms']:>9.2f} "
+                            f"p95 {page_stats['p95_ms']:>9.2f} ms   count p50 {count_stats['p50_ms']:>9.2f} "
+                            f"p95 {count_stats['p95_ms']:>9.2f} ms"
+                        )
+
+        if json_path:
+            with open(json_path, "w", encoding="utf-8") as fh:
+                json.dump({"tasks": tasks, "tags_per_task": tags_per_task, "results": results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved to {json_path}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.ToDoList_app import services
+
+
+class Command(BaseCommand):
+    help = "Удалить надгробия задач старше TASK_SYNC_TOMBSTONE_DAYS (delta-sync /tasks/sync/). Запускать по cron."
+
+    def handle(self, *args, **options):
+        deleted = services.prune_task_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstone(s)"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.ToDoList_app import services
+
+
+class Command(BaseCommand):
+    help = "Пересчитать статистику тегов (TagUsage) для /tasks/tags/."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="user_ids",
+                            help="ID пользователя (можно несколько раз); по умолчанию — все")
+
+    def handle(self, *args, user_ids=None, **options):
+        written = services.rebuild_tag_usage(user_ids=user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} tag usage row(s)"))
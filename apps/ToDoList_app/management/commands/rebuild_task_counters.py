@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from apps.ToDoList_app import services
+from apps.ToDoList_app.domain.models import Task, TaskArchive, TaskCounter
+
+
+class Command(BaseCommand):
+    help = "Пересчитать счётчики задач (TaskCounter) для /tasks/stats/."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="user_ids",
+                            help="ID пользователя (можно несколько раз); по умолчанию — все")
+        parser.add_argument("--check", action="store_true",
+                            help="Только сверить счётчики с задачами, ничего не записывая")
+
+    def handle(self, *args, user_ids=None, check=False, **options):
+        if check:
+            drift = self._drift(user_ids)
+            for uid, stored, actual in drift:
+                self.stdout.write(f"user {uid}: stored {stored}, actual {actual}")
+            self.stdout.write(self.style.SUCCESS(f"{len(drift)} counter(s) out of sync"))
+            return
+
+        written = services.rebuild_task_counters(user_ids=user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} counter(s)"))
+
+    def _drift(self, user_ids):
+        tasks = Task.objects.all()
+        archived = TaskArchive.objects.all()
+        counters = TaskCounter.objects.all()
+        if user_ids:
+            tasks = tasks.filter(user_id__in=user_ids)
+            archived = archived.filter(user_id__in=user_ids)
+            counters = counters.filter(user_id__in=user_ids)
+
+        actual = {
+            row["user_id"]: (row["total"], row["done"])
+            for row in tasks.order_by().values("user_id").annotate(
+                total=Count("id"), done=Count("id", filter=Q(is_done=True))
+            )
+        }
+        # архивные задачи считаются выполненными (как в services.rebuild_task_counters)
+        for row in archived.order_by().values("user_id").annotate(total=Count("id")):
+            total, done = actual.get(row["user_id"], (0, 0))
+            actual[row["user_id"]] = (total + row["total"], done + row["total"])
+        drift = []
+        for uid, total, done in counters.values_list("user_id", "total", "done"):
+            real = actual.get(uid, (0, 0))
+            if (total, done) != real:
+                drift.append((uid, (total, done), real))
+        return drift
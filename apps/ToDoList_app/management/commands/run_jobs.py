@@ -0,0 +1,97 @@
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections
+
+from apps.ToDoList_app import jobs
+from apps.ToDoList_app.domain.models import Job
+
+logger = logging.getLogger("apps.ToDoList_app.jobs")
+
+
+class Command(BaseCommand):
+    help = (
+        "Воркер фоновых заданий (Job): забирает готовые задания из БД и выполняет их в пуле потоков. "
+        "Брокер не нужен; воркеров можно запускать несколько — задание достаётся одному. "
+        "SIGTERM/SIGINT — дождаться текущих заданий и выйти; --once — выполнить готовые и выйти (cron, тесты)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, help="Потоков (по умолчанию TASK_JOB_WORKER_THREADS)")
+        parser.add_argument("--poll", type=float, default=1.0, help="Пауза между опросами пустой очереди, с")
+        parser.add_argument("--kind", action="append", dest="kinds", help="Только задания этого типа")
+        parser.add_argument("--once", action="store_true", help="Выйти, когда готовые задания кончатся")
+
+    def handle(self, *args, threads=None, poll, kinds=None, once=False, **options):
+        threads = threads or getattr(settings, "TASK_JOB_WORKER_THREADS", 4)
+        unknown = set(kinds or ()) - set(jobs.kinds())
+        if unknown:
+            raise CommandError(f"Unknown job kind(s): {', '.join(sorted(unknown))}. Available: {', '.join(jobs.kinds())}")
+
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        stop = threading.Event()
+        if not once:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *_: stop.set())
+        self.stdout.write(f"worker {worker}: {threads} thread(s), kinds: {', '.join(kinds or jobs.kinds())}")
+
+        done = Counter()
+        running = {}  # future -> Job
+        lease = getattr(settings, "TASK_JOB_LEASE_SECONDS", 600)
+        next_stale_check = next_heartbeat = 0.0
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job") as pool:
+            while not stop.is_set():
+                free = threads - len(running)
+                try:
+                    if time.monotonic() >= next_stale_check:
+                        jobs.requeue_stale()
+                        next_stale_check = time.monotonic() + 60
+                    if running and time.monotonic() >= next_heartbeat:
+                        # долгие задания не должны считаться брошенными, пока поток их выполняет
+                        jobs.heartbeat(worker=worker, job_ids=[job.id for job in running.values()])
+                        next_heartbeat = time.monotonic() + lease / 3
+                    claimed = jobs.claim(worker=worker, limit=free, kinds=kinds) if free else []
+                except DatabaseError as exc:  # БД занята или соединение оборвалось — опросим ещё раз
+                    logger.warning("worker %s: polling failed: %s", worker, exc)
+                    close_old_connections()
+                    stop.wait(poll)
+                    continue
+                running.update({pool.submit(self._run, job): job for job in claimed})
+                if not running:
+                    if once:
+                        break
+                    stop.wait(poll)
+                    continue
+                # занято всё или очередь пуста — ждём, пока освободится поток (не дольше poll)
+                if not free or not claimed:
+                    finished, _ = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        done[future.result()] += 1
+                        del running[future]
+            for future in running:  # остановка: дожидаемся начатых
+                done[future.result()] += 1
+        close_old_connections()
+        summary = f"Done: {done[Job.SUCCEEDED]} succeeded, {done[Job.QUEUED]} to retry, {done[Job.FAILED]} failed"
+        if done[Job.RUNNING]:
+            summary += f", {done[Job.RUNNING]} not recorded"
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    @staticmethod
+    def _run(job) -> str:
+        # как цикл запроса Django: соединение потока закрывается, если устарело или сломалось
+        close_old_connections()
+        try:
+            return jobs.run(job).status
+        except DatabaseError:  # итог не записался — задание вернёт в очередь requeue_stale по истечении lease
+            logger.exception("job %s (%s): result not recorded", job.id, job.kind)
+            return Job.RUNNING
+        finally:
+            close_old_connections()
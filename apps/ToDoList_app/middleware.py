@@ -0,0 +1,178 @@
+"""
+Инструментирующие middleware.
+
+QueryBudgetMiddleware — учёт SQL на запрос, бюджеты по действиям и детектор N+1.
+
+Каждый запрос пишется через connection.execute_wrapper (DEBUG не нужен). У вьюхи можно
+объявить query_budgets = {"<action>": <макс. запросов>} (см. TaskViewSet); в бюджет идут запросы
+после аутентификации (QueryBudgetMixin.initial) — проверка активности пользователя
+кэшируется и на отдельное действие не раскладывается. Превышение бюджета
+или одна и та же "форма" запроса (SQL без параметров, IN-списки схлопнуты) >= TASK_QUERY_REPEAT_THRESHOLD
+раз считаются проблемой (пачки bulk-операций не в счёт): пишется warning, а при TASK_QUERY_BUDGET_STRICT = True (тесты)
+бросается QueryBudgetExceeded — тест, который дёрнул такое действие, падает.
+Запросы управления транзакцией (SAVEPOINT/RELEASE/ROLLBACK TO) не считаются — в тестах каждый
+atomic превращается в savepoint, и бюджеты разъехались бы с продом.
+
+Подключается в local/test; в проде не нужен. Запросы async-вьюх и потоковых ответов
+(выполняются вне этого потока / после возврата ответа) не учитываются.
+
+ProfilingMiddleware — Server-Timing по фазам (profiling.py) и выборочные cProfile-дампы.
+Включается на запрос заголовком X-Profile (учитывается только у staff) или случайной выборкой
+TASK_PROFILE_SAMPLE_RATE; дампы пишутся в TASK_PROFILE_DIR, если он задан, а заголовок
+Server-Timing получает только staff. Для остальных запросов — одно сравнение и random(),
+без обёрток. DRF аутентифицирует уже во вьюхе, поэтому
+по заголовку профиль заводит PhaseTimingMixin после проверки staff; до этого запрос идёт без
+таймеров и cProfile (вне вьюх TaskViewSet заголовок ничего не включает).
+"""
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+from apps.ToDoList_app import profiling
+from apps.ToDoList_app.api.v1.permissions import is_staff_user
+
+logger = logging.getLogger("apps.ToDoList_app.queries")
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+# IN-список из 2+ параметров или многострочный VALUES — пачка (bulk_create/bulk_update, префетч), а не N+1
+_BATCH = re.compile(r"IN \(%s, %s|\), \(")
+_TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_shape(sql: str) -> str:
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+class QueryLog:
+    """execute_wrapper, который складывает SQL выполненных запросов."""
+
+    def __init__(self):
+        self.queries: List[str] = []
+        self.action_start = 0
+
+    def start_action(self) -> None:
+        """Отметка после аутентификации/пермишенов: бюджет считает запросы самого действия."""
+        self.action_start = len(self.queries)
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(_TRANSACTION_CONTROL):
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def action_count(self) -> int:
+        return len(self.queries) - self.action_start
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Формы запросов, выполненные не меньше threshold раз — кандидаты в N+1."""
+        shapes = Counter(query_shape(sql) for sql in self.queries if not _BATCH.search(sql))
+        return [(shape, n) for shape, n in shapes.most_common() if n >= threshold]
+
+
+def view_budget(view_func, method: str) -> Tuple[Optional[str], Optional[int]]:
+    """(action, бюджет) для DRF-вьюхи; у ViewSet action берётся из карты method → action роутера."""
+    cls = getattr(view_func, "cls", None)
+    budgets = getattr(cls, "query_budgets", None)
+    if not budgets:
+        return None, None
+    action = (getattr(view_func, "actions", None) or {}).get(method.lower())
+    return action, budgets.get(action)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        log = request.query_log = QueryLog()
+        request.query_budget = (None, None)
+        with connection.execute_wrapper(log):
+            response = self.get_response(request)
+        response["X-Query-Count"] = str(log.count)
+        self.check(request, log)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = view_budget(view_func, request.method)
+
+    @staticmethod
+    def check(request, log: QueryLog) -> None:
+        action, budget = request.query_budget
+        problems = []
+        if budget is not None and log.action_count > budget:
+            problems.append(f"{log.action_count} queries, budget {budget}")
+        threshold = getattr(settings, "TASK_QUERY_REPEAT_THRESHOLD", 3)
+        for shape, n in log.repeated(threshold):
+            problems.append(f"N+1? {n}x {shape[:200]}")
+        if not problems:
+            return
+
+        message = f"{request.method} {request.path} [{action or '-'}]: " + "; ".join(problems)
+        if getattr(settings, "TASK_QUERY_BUDGET_STRICT", False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ProfilingMiddleware:
+    header = "HTTP_X_PROFILE"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        requested = self.header in request.META
+        sampled = not requested and random.random() < getattr(settings, "TASK_PROFILE_SAMPLE_RATE", 0.0)
+        if not (requested or sampled):
+            return self.get_response(request)
+
+        if sampled:
+            profiling.start(request)
+        else:
+            request.profile_requested = True  # профиль заведёт вьюха, если пользователь — staff
+        try:
+            with connection.execute_wrapper(self._execute(request)):
+                response = self.get_response(request)
+        finally:
+            profile = profiling.get_profile(request)
+            total = profile.close() if profile is not None else 0.0
+        if profile is None:
+            return response  # чужой заголовок — молча игнорируем
+        # выборка профилирует любой запрос (ради дампа), но тайминги и число SQL видит только staff;
+        # по X-Profile профиль без staff не заводится вовсе
+        if is_staff_user(getattr(request, "user", None)):
+            response["Server-Timing"] = profile.server_timing(total)
+        if profile.profiler is not None:
+            self._dump(profile.profiler, settings.TASK_PROFILE_DIR, request)
+        return response
+
+    @staticmethod
+    def _execute(request):
+        # профиль может появиться посреди запроса (X-Profile): SQL до него не считается
+        def execute(execute, sql, params, many, context):
+            profile = getattr(request, "profile", None)
+            if profile is None:
+                return execute(sql, params, many, context)
+            return profile.execute(execute, sql, params, many, context)
+        return execute
+
+    @staticmethod
+    def _dump(profiler, dump_dir, request) -> None:
+        os.makedirs(dump_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_")[:80] or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns() % 10**6:06d}-{request.method}-{slug}.prof"
+        profiler.dump_stats(os.path.join(dump_dir, name))
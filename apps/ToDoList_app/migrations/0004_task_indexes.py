@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDoList_app', '0003_task_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # таблица ToDoList_app_task_tags уже есть (auto-through) — меняем только состояние
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='TaskTag',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ToDoList_app.tag')),
+                        ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ToDoList_app.task')),
+                    ],
+                    options={
+                        'db_table': 'ToDoList_app_task_tags',
+                        'unique_together': {('task', 'tag')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='task',
+                    name='tags',
+                    field=models.ManyToManyField(blank=True, related_name='tasks', through='ToDoList_app.TaskTag', to='ToDoList_app.tag'),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', '-id'], name='task_user_id_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'is_done'], name='task_user_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'due_date'], name='task_user_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'created_at'], name='task_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasktag',
+            index=models.Index(fields=['tag', 'task'], name='task_tags_tag_task_idx'),
+        ),
+    ]
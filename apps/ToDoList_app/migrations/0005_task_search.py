@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.ToDoList_app import search
+
+
+def install_search(apps, schema_editor):
+    search.install(schema_editor)
+
+
+def uninstall_search(apps, schema_editor):
+    search.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDoList_app', '0004_task_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSearchEntry',
+            fields=[
+                ('task', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='ToDoList_app.task')),
+                ('title', models.TextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'task_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:55
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """Перед unique: дубли по name сливаем в тег с минимальным id, связи переносим."""
+    Tag = apps.get_model("ToDoList_app", "Tag")
+    TaskTag = apps.get_model("ToDoList_app", "TaskTag")
+
+    dupes = Tag.objects.values("name").annotate(n=Count("id"), keep=Min("id")).filter(n__gt=1)
+    for row in dupes:
+        extra = list(Tag.objects.filter(name=row["name"]).exclude(id=row["keep"]).values_list("id", flat=True))
+        task_ids = TaskTag.objects.filter(tag_id__in=extra).values_list("task_id", flat=True).distinct()
+        TaskTag.objects.bulk_create(
+            [TaskTag(task_id=task_id, tag_id=row["keep"]) for task_id in task_ids], ignore_conflicts=True
+        )
+        Tag.objects.filter(id__in=extra).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDoList_app', '0005_task_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tag',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
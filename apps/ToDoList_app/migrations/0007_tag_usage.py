@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_tag_usage(apps, schema_editor):
+    """Заполнить TagUsage по уже существующим связям одним GROUP BY."""
+    TaskTag = apps.get_model("ToDoList_app", "TaskTag")
+    TagUsage = apps.get_model("ToDoList_app", "TagUsage")
+
+    rows = TaskTag.objects.order_by().values("task__user_id", "tag_id", "tag__name").annotate(
+        total=Count("task_id"), done=Count("task_id", filter=Q(task__is_done=True))
+    )
+    TagUsage.objects.bulk_create(
+        [
+            TagUsage(user_id=row["task__user_id"], tag_id=row["tag_id"], name_lower=row["tag__name"].lower(),
+                     total=row["total"], done=row["done"])
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDoList_app', '0006_tag_name_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name_lower', models.CharField(max_length=100)),
+                ('total', models.IntegerField(default=0)),
+                ('done', models.IntegerField(default=0)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='ToDoList_app.tag')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'name_lower'], name='tag_usage_user_name_idx'), models.Index(fields=['user', '-total', 'name_lower'], name='tag_usage_user_total_idx')],
+                'unique_together': {('user', 'tag')},
+            },
+        ),
+        migrations.RunPython(fill_tag_usage, migrations.RunPython.noop),
+    ]
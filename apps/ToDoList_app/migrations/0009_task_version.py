@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:25
+
+from django.db import migrations, models
+
+from apps.ToDoList_app import search
+
+
+def restore_search_triggers(apps, schema_editor):
+    """AddField на SQLite пересоздаёт таблицу задач, триггеры FTS уходят вместе со старой."""
+    if schema_editor.connection.vendor == "sqlite":
+        search.install(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDoList_app', '0008_task_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
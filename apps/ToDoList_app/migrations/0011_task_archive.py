@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDoList_app', '0010_task_agenda_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('is_done', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskArchiveTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ToDoList_app.tag')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ToDoList_app.taskarchive')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='taskarchive',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='archived_tasks', through='ToDoList_app.TaskArchiveTag', to='ToDoList_app.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='taskarchivetag',
+            index=models.Index(fields=['tag', 'task'], name='task_archive_tags_tag_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='taskarchivetag',
+            unique_together={('task', 'tag')},
+        ),
+        migrations.AddIndex(
+            model_name='taskarchive',
+            index=models.Index(fields=['user', '-id'], name='task_archive_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskarchive',
+            index=models.Index(fields=['user', 'due_date'], name='task_archive_user_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskarchive',
+            index=models.Index(fields=['user', 'created_at'], name='task_archive_user_created_idx'),
+        ),
+    ]
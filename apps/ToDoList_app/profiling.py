@@ -0,0 +1,118 @@
+"""
+Разбивка времени запроса по фазам для Server-Timing (см. middleware.ProfilingMiddleware).
+
+Фазы вложенные, время у каждой — собственное: пока внутри "serialize" идёт SQL, тикает "db",
+а "serialize" стоит на паузе. Фазы TaskViewSet (mixins.PhaseTimingMixin):
+    auth      — аутентификация DRF;
+    filter    — filter backends (построение queryset'а);
+    db        — выполнение SQL (connection.execute_wrapper);
+    serialize — остальное время обработчика и рендер ответа.
+Если запрос не профилируется, phase() — пустой контекст: накладных расходов почти нет.
+
+Профиль заводит start(): для выборки — middleware сразу, для X-Profile — PhaseTimingMixin после
+аутентификации и только у staff (до неё пользователь неизвестен, а чужой заголовок не должен
+включать ни таймеры, ни cProfile). cProfile пишется, если задан TASK_PROFILE_DIR.
+"""
+import cProfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+
+from django.conf import settings
+
+PHASES = ("auth", "filter", "db", "serialize")
+
+
+class RequestProfile:
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.profiler: Optional[cProfile.Profile] = None
+        self.durations = defaultdict(float)
+        self.queries = 0
+        self._stack = []  # [[фаза, момент начала/возобновления]]
+
+    def push(self, name: str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.durations[parent[0]] += now - parent[1]
+        self._stack.append([name, now])
+
+    def pop(self, name: str) -> None:
+        """Закрыть фазу name (и всё, что осталось открытым внутри неё)."""
+        if not any(entry[0] == name for entry in self._stack):
+            return
+        now = time.perf_counter()
+        while self._stack:
+            current, started = self._stack.pop()
+            self.durations[current] += now - started
+            if current == name:
+                break
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def close(self) -> float:
+        """Закрыть открытые фазы, остановить cProfile; вернуть полное время в секундах."""
+        while self._stack:
+            self.pop(self._stack[-1][0])
+        if self.profiler is not None:
+            self.profiler.disable()
+        return time.perf_counter() - self.started
+
+    @contextmanager
+    def phase(self, name: str):
+        self.push(name)
+        try:
+            yield
+        finally:
+            self.pop(name)
+
+    def execute(self, execute, sql, params, many, context):
+        """execute_wrapper: время SQL уходит в "db"."""
+        self.queries += 1
+        with self.phase("db"):
+            return execute(sql, params, many, context)
+
+    def server_timing(self, total: float) -> str:
+        parts = []
+        for name in PHASES:
+            entry = f"{name};dur={self.durations.get(name, 0.0) * 1000:.2f}"
+            if name == "db":
+                entry += f';desc="{self.queries} queries"'
+            parts.append(entry)
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+def _start_cprofile() -> Optional[cProfile.Profile]:
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # уже работает другой профайлер
+        return None
+    return profiler
+
+
+def start(request, started: Optional[float] = None) -> RequestProfile:
+    """Начать профилирование запроса (started — perf_counter() начала, по умолчанию сейчас)."""
+    request = getattr(request, "_request", request)
+    profile = request.profile = RequestProfile(started)
+    if getattr(settings, "TASK_PROFILE_DIR", ""):
+        profile.profiler = _start_cprofile()
+    return profile
+
+
+def requested(request) -> bool:
+    """Пришёл ли X-Profile (решение — за вьюхой, после проверки staff)."""
+    return getattr(getattr(request, "_request", request), "profile_requested", False)
+
+
+def get_profile(request):
+    request = getattr(request, "_request", request)  # DRF Request → HttpRequest
+    return getattr(request, "profile", None)
+
+
+def phase(request, name: str):
+    profile = get_profile(request)
+    return profile.phase(name) if profile is not None else nullcontext()
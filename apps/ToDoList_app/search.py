@@ -0,0 +1,157 @@
+# apps/ToDoList_app/search.py
+"""
+Поиск по Task.title для параметра ?search=.
+
+Бэкенд выбирается по СУБД (или settings.TASK_SEARCH_BACKEND = "fts" | "postgres" | "like"):
+  * SQLite     — FTS5-таблица task_fts (tokenizer trigram => семантика как у LIKE '%q%');
+  * PostgreSQL — to_tsvector('simple', title) + GIN-индекс;
+  * иначе      — обычный icontains.
+Ранжирующие бэкенды вешают аннотацию search_rank (меньше = релевантнее), фильтры TaskFilter
+продолжают работать поверх — это просто queryset.
+"""
+from functools import reduce
+from operator import and_
+from typing import List
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Lookup, Q, QuerySet, Value
+
+from .domain.models import Task, TaskSearchEntry
+
+FTS_TABLE = TaskSearchEntry._meta.db_table
+TASK_TABLE = Task._meta.db_table
+TRIGRAM_MIN = 3  # trigram не умеет искать подстроки короче 3 символов
+
+SQLITE_FTS_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content='{TASK_TABLE}', content_rowid='id', tokenize='trigram')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON "{TASK_TABLE}" BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.id, new.title);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON "{TASK_TABLE}" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.id, old.title);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title ON "{TASK_TABLE}" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.id, old.title);
+        INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.id, new.title);
+    END""",
+]
+PG_INDEX_NAME = "task_title_fts_gin"
+
+
+class FtsMatch(Lookup):
+    """task_fts.title MATCH '<fts5 query>'"""
+    lookup_name = "match"
+
+    def as_sql(self, compiler, conn):
+        lhs, lhs_params = self.process_lhs(compiler, conn)
+        rhs, rhs_params = self.process_rhs(compiler, conn)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+TaskSearchEntry._meta.get_field("title").register_lookup(FtsMatch)
+
+
+class LikeSearchBackend:
+    name = "like"
+
+    def search(self, qs: QuerySet[Task], terms: List[str]) -> QuerySet[Task]:
+        # без ранжирования: остаётся обычная сортировка (-id)
+        return qs.filter(reduce(and_, (Q(title__icontains=t) for t in terms)))
+
+
+class SqliteFtsBackend:
+    name = "fts"
+
+    @staticmethod
+    def _quote(term: str) -> str:
+        return '"' + term.replace('"', '""') + '"'
+
+    def search(self, qs: QuerySet[Task], terms: List[str]) -> QuerySet[Task]:
+        long_terms = [t for t in terms if len(t) >= TRIGRAM_MIN]
+        short_terms = [t for t in terms if len(t) < TRIGRAM_MIN]
+        if not long_terms:
+            return LikeSearchBackend().search(qs, terms)
+
+        match = " AND ".join(self._quote(t) for t in long_terms)
+        qs = qs.filter(search_entry__title__match=match).annotate(search_rank=F("search_entry__rank"))
+        for term in short_terms:  # короткие — дофильтровываем LIKE'ом внутри уже найденного
+            qs = qs.filter(title__icontains=term)
+        return qs
+
+
+class PostgresSearchBackend:
+    name = "postgres"
+    config = "simple"
+
+    def search(self, qs: QuerySet[Task], terms: List[str]) -> QuerySet[Task]:
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector("title", config=self.config)
+        query = reduce(and_, (SearchQuery(t, config=self.config) for t in terms))
+        return (
+            qs.annotate(search_vector=vector)
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(vector, query) * Value(-1.0))
+        )
+
+
+BACKENDS = {b.name: b for b in (LikeSearchBackend, SqliteFtsBackend, PostgresSearchBackend)}
+
+
+def get_backend():
+    name = getattr(settings, "TASK_SEARCH_BACKEND", None)
+    if not name:
+        name = {"sqlite": "fts", "postgresql": "postgres"}.get(connection.vendor, "like")
+    return BACKENDS[name]()
+
+
+def search_tasks(qs: QuerySet[Task], terms: List[str]) -> QuerySet[Task]:
+    return get_backend().search(qs, terms) if terms else qs
+
+
+# ---- установка индексов (миграция + post_migrate) ----
+
+def install(schema_editor) -> None:
+    conn = schema_editor.connection
+    if conn.vendor == "sqlite":
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            exists = cursor.fetchone()
+            for sql in SQLITE_FTS_SQL:
+                cursor.execute(sql)
+            if not exists:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif conn.vendor == "postgresql":
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        schema_editor.add_index(
+            Task, GinIndex(SearchVector("title", config=PostgresSearchBackend.config), name=PG_INDEX_NAME)
+        )
+
+
+def uninstall(schema_editor) -> None:
+    conn = schema_editor.connection
+    if conn.vendor == "sqlite":
+        with conn.cursor() as cursor:
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif conn.vendor == "postgresql":
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{PG_INDEX_NAME}"')
+
+
+def ensure_installed(using="default", **kwargs) -> None:
+    """
+    post_migrate: на SQLite миграции с AlterField пересоздают таблицу задач и теряют
+    триггеры — восстанавливаем их (IF NOT EXISTS, дёшево).
+    """
+    from django.db import connections
+
+    conn = connections[using]
+    if conn.vendor != "sqlite" or TASK_TABLE not in conn.introspection.table_names():
+        return
+    with conn.schema_editor() as schema_editor:
+        install(schema_editor)
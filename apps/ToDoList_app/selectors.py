@@ -1,20 +1,163 @@
 # apps/ToDoList_app/selectors.py
-from typing import Dict
-from django.db.models import QuerySet
-from .domain.models import Task
-
-def tasks_for_user(*, user) -> QuerySet[Task]:
-    """Базовый queryset задач пользователя (с сортировкой и префетчем тегов)."""
-    qs = Task.objects.filter(user=user).order_by("-id")
-    return qs.prefetch_related("tags") if hasattr(Task, "tags") else qs
-
-def task_stats(qs: QuerySet[Task]) -> Dict[str, float | int]:
-    """Агрегации по задачам (кол-во/выполненные/процент)."""
-    count = qs.count()
-    done = qs.filter(is_done=True).count()
+import sys
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from django.db.models import Case, Count, Exists, F, OuterRef, Prefetch, Q, QuerySet, Value, When, Window
+from django.db.models.functions import RowNumber
+from .domain.models import Tag, TagUsage, Task, TaskArchive, TaskCounter
+
+def _projected(qs: QuerySet, with_tags: bool, only: Optional[Tuple[str, ...]]) -> QuerySet:
+    if only:  # ?fields= — читаем только нужные колонки
+        qs = qs.only(*only)
+    if not with_tags:  # действиям, которые теги не отдают (или перечитывают сами), префетч — лишний запрос
+        return qs
+    # теги по id — детерминированный порядок (на него же опирается fast_serializers.tag_map)
+    return qs.prefetch_related(Prefetch("tags", queryset=Tag.objects.order_by("id")))
+
+def tasks_for_user(*, user, with_tags: bool = True, only: Optional[Tuple[str, ...]] = None) -> QuerySet[Task]:
+    """
+    Базовый queryset задач пользователя (с сортировкой и префетчем тегов; only — колонки для only()).
+    Ленивый — годится и для async-кода: async for / aget / afirst (см. atasks_for_user).
+    От user нужен только id — подходит и TokenUser без загрузки auth.User.
+    """
+    return _projected(Task.objects.filter(user_id=user.id).order_by("-id"), with_tags, only)
+
+def archived_for_user(*, user, with_tags: bool = False, only: Optional[Tuple[str, ...]] = None) -> QuerySet[TaskArchive]:
+    """Архивные задачи пользователя (?include_archived=); порядок и поля — как у tasks_for_user."""
+    return _projected(TaskArchive.objects.filter(user_id=user.id).order_by("-id"), with_tags, only)
+
+def _tag_links(qs: QuerySet):
+    """Связи с тегами для задач qs: TaskTag или TaskArchiveTag (FK к задаче у обеих — task)."""
+    return qs.model.tags.through.objects
+
+def with_any_tags(qs: QuerySet[Task], tag_ids) -> QuerySet[Task]:
+    """Задачи хотя бы с одним из тегов: EXISTS по индексу (task, tag) вместо JOIN + DISTINCT."""
+    links = _tag_links(qs).filter(task_id=OuterRef("pk"), tag_id__in=set(tag_ids))
+    return qs.filter(Exists(links))
+
+def with_all_tags(qs: QuerySet[Task], tag_ids) -> QuerySet[Task]:
+    """Задачи со всеми тегами: id IN (SELECT task_id ... GROUP BY task_id HAVING COUNT(*) = N) — без N JOIN'ов."""
+    tag_ids = set(tag_ids)
+    groups = (
+        _tag_links(qs).filter(tag_id__in=tag_ids).values("task_id")
+        .annotate(n=Count("tag_id")).filter(n=len(tag_ids)).values("task_id")
+    )
+    return qs.filter(id__in=groups)
+
+async def atasks_for_user(*, user, ids=None) -> List[Task]:
+    """Задачи пользователя списком через async ORM (с тегами); ids — ограничить выборку."""
+    qs = tasks_for_user(user=user)
+    if ids is not None:
+        qs = qs.filter(id__in=list(ids))
+    return [task async for task in qs]
+
+def stats_payload(count: int, done: int) -> Dict[str, float | int]:
     percent = round(done / count * 100.0, 2) if count else 0.0
     return {"count": count, "done_count": done, "percent": percent}
 
+def task_stats(qs: QuerySet[Task], archived: Optional[QuerySet[TaskArchive]] = None) -> Dict[str, float | int]:
+    """Агрегации по задачам (кол-во/выполненные/процент) — одним запросом; archived — плюс COUNT по архиву."""
+    agg = qs.order_by().aggregate(count=Count("id"), done=Count("id", filter=Q(is_done=True)))
+    extra = archived.count() if archived is not None else 0  # в архиве только выполненные
+    return stats_payload(agg["count"] + extra, agg["done"] + extra)
+
+async def atask_stats(qs: QuerySet[Task], archived: Optional[QuerySet[TaskArchive]] = None) -> Dict[str, float | int]:
+    agg = await qs.order_by().aaggregate(count=Count("id"), done=Count("id", filter=Q(is_done=True)))
+    extra = await archived.acount() if archived is not None else 0
+    return stats_payload(agg["count"] + extra, agg["done"] + extra)
+
+def counter_stats(*, user) -> Optional[Dict[str, float | int]]:
+    """Статистика из TaskCounter (O(1)); None, если счётчик ещё не заведён."""
+    row = TaskCounter.objects.filter(user_id=user.id).values_list("total", "done").first()
+    return stats_payload(*row) if row else None
+
+async def acounter_stats(*, user) -> Optional[Dict[str, float | int]]:
+    row = await TaskCounter.objects.filter(user_id=user.id).values_list("total", "done").afirst()
+    return stats_payload(*row) if row else None
+
 def get_task_tags(*, task: Task):
     """Список тегов у задачи."""
     return task.tags.all()
+
+async def aget_task_tags(*, task: Task) -> List[Tag]:
+    return [tag async for tag in task.tags.all()]
+
+def tag_usage(*, user, prefix: str = "", limit: int = 50) -> List[Dict]:
+    """
+    Теги пользователя с числом задач из TagUsage — один запрос по индексу, от числа задач не зависит.
+    Без prefix — самые используемые; с prefix — автодополнение по имени (без учёта регистра).
+    """
+    qs = TagUsage.objects.filter(user_id=user.id)
+    prefix = prefix.strip().lower()
+    if prefix:
+        # диапазон [prefix, prefix со следующим последним символом) — range scan по (user, name_lower)
+        # на любой БД, в отличие от LIKE/ILIKE
+        # (U+10FFFF в конце увеличить нельзя — переносим на предыдущий символ; одни U+10FFFF — без верхней границы)
+        head = prefix.rstrip(chr(sys.maxunicode))
+        qs = qs.filter(name_lower__gte=prefix)
+        if head:
+            qs = qs.filter(name_lower__lt=head[:-1] + chr(ord(head[-1]) + 1))
+        qs = qs.order_by("name_lower")
+    else:
+        qs = qs.order_by("-total", "name_lower")
+    rows = qs.values_list("tag_id", "tag__name", "total", "done")[:limit]
+    return [{"id": tag_id, "name": name, "total": total, "done": done} for tag_id, name, total, done in rows]
+
+AGENDA_FIELDS = ("id", "title", "due_date", "version")
+
+def _month_after(day: date) -> date:
+    """Первое число следующего месяца."""
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+def agenda_buckets(today: date, months: int = 3) -> List[Tuple[str, Optional[date], Optional[date]]]:
+    """
+    Границы корзин повестки (ключ, первый день, последний день; None — без границы):
+    overdue, today, week (завтра..воскресенье), months месяцев после недели ("YYYY-MM"), later.
+    Задачи без срока — отдельная корзина no_date (её тут нет: у неё нет диапазона).
+    """
+    week_end = today + timedelta(days=6 - today.weekday())
+    buckets = [
+        ("overdue", None, today - timedelta(days=1)),
+        ("today", today, today),
+        ("week", today + timedelta(days=1), week_end),
+    ]
+    start = week_end + timedelta(days=1)
+    for _ in range(months):
+        end = _month_after(start) - timedelta(days=1)
+        buckets.append((start.strftime("%Y-%m"), start, end))
+        start = end + timedelta(days=1)
+    buckets.append(("later", start, None))
+    return buckets
+
+def agenda(*, user, today: date, per_bucket: int = 5, months: int = 3) -> List[Dict]:
+    """
+    Повестка по открытым задачам: число задач и первые per_bucket (по сроку) в каждой корзине.
+    Один запрос по индексу (user, is_done, due_date): корзина — CASE по диапазонам due_date,
+    первые N и размер корзины — оконные ROW_NUMBER()/COUNT() по ней же.
+    """
+    ranges = agenda_buckets(today, months)
+    bucket = Case(
+        *[When(Q(**{f"due_date__{op}": day for op, day in (("gte", start), ("lte", end)) if day}), then=Value(key))
+          for key, start, end in ranges],
+        default=Value("no_date"),
+    )
+    rows = (
+        # is_done__in, а не is_done=False: на SQLite последнее — "NOT is_done", и индекс используется только по user_id
+        Task.objects.filter(user_id=user.id, is_done__in=[False])
+        .annotate(
+            bucket=bucket,
+            position=Window(RowNumber(), partition_by=[bucket], order_by=[F("due_date").asc(), F("id").asc()]),
+            bucket_size=Window(Count("id"), partition_by=[bucket]),
+        )
+        .filter(position__lte=per_bucket)
+        .order_by("due_date", "id")
+        .values("bucket", "bucket_size", *AGENDA_FIELDS)
+    )
+
+    result = {key: {"key": key, "start": start, "end": end, "count": 0, "tasks": []} for key, start, end in ranges}
+    result["no_date"] = {"key": "no_date", "start": None, "end": None, "count": 0, "tasks": []}
+    for row in rows:
+        entry = result[row.pop("bucket")]
+        entry["count"] = row.pop("bucket_size")
+        entry["tasks"].append(row)
+    return list(result.values())
@@ -1,42 +1,457 @@
 # apps/ToDoList_app/services.py
-from typing import Optional
-from django.db import transaction
-from .domain.models import Task, Tag
-
-@transaction.atomic
-def change_title(*, task: Task, title: str) -> Task:
-    task.title = title
-    task.save(update_fields=["title"])
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+from . import events
+from .domain.models import Task, Tag, TagUsage, TaskArchive, TaskArchiveTag, TaskCounter, TaskTag, TaskTombstone
+
+
+class VersionConflict(Exception):
+    """Задачу успели изменить: версия не совпала с If-Match."""
+
+
+class BulkVersionConflict(VersionConflict):
+    """bulk_apply: у части задач версия не совпала с переданной; task_ids — какие именно."""
+
+    def __init__(self, task_ids: Sequence[int]):
+        super().__init__(task_ids)
+        self.task_ids = list(task_ids)
+
+
+class WriteContention(Exception):
+    """Без If-Match: задачу меняли конкурентно, и за _WRITE_ATTEMPTS попыток запись не прошла."""
+
+
+_WRITE_ATTEMPTS = 5
+_WRITABLE_FIELDS = ["title", "is_done", "due_date", "updated_at", "version"]
+
+
+def _write(task: Task, changes: Callable[[Task], dict], expected_version: Optional[int] = None) -> dict:
+    """
+    Оптимистичная запись одним UPDATE ... SET <changes>, version = N + 1 WHERE id = %s AND version = N —
+    без SELECT FOR UPDATE и ожидания блокировок. С expected_version (If-Match) несовпадение версии сразу
+    даёт VersionConflict. Без него задача перечитывается, и changes(task) применяется заново к свежему
+    состоянию (не больше _WRITE_ATTEMPTS раз, дальше — WriteContention) — конкурентные записи не
+    затирают друг друга. Возвращает прежние значения изменённых полей.
+    """
+    version = task.version if expected_version is None else expected_version
+    for _ in range(_WRITE_ATTEMPTS):
+        values = changes(task)
+        now = timezone.now()
+        if Task.objects.filter(pk=task.pk, version=version).update(**values, updated_at=now, version=version + 1):
+            before = {name: getattr(task, name) for name in values}
+            for name, value in values.items():
+                setattr(task, name, value)
+            task.updated_at, task.version = now, version + 1
+            return before
+        if expected_version is not None:
+            raise VersionConflict()
+        task.refresh_from_db(fields=_WRITABLE_FIELDS)  # Task.DoesNotExist — задачу удалили
+        version = task.version
+    raise WriteContention()
+
+def _mark_no_tags(tasks: Sequence[Task]) -> None:
+    """У только что созданных задач тегов нет — пустой кэш префетча избавляет сериализатор от SELECT."""
+    for task in tasks:
+        task._prefetched_objects_cache = {"tags": Tag.objects.none()}
+
+def _touch(task_ids: Sequence[int]) -> None:
+    """Смена тегов — изменение задачи для delta-sync: updated_at одним UPDATE (M2M auto_now не трогает)."""
+    Task.objects.filter(id__in=task_ids).update(updated_at=timezone.now())
+
+def _bury(user_id: int, task_ids: Sequence[int]) -> None:
+    """Надгробия удалённых задач для delta-sync — в той же транзакции, что и удаление."""
+    TaskTombstone.objects.bulk_create([TaskTombstone(user_id=user_id, task_id=task_id) for task_id in task_ids])
+
+def _tag_ids_of(task_ids: Sequence[int]) -> List[int]:
+    """Теги задач перед удалением — каскад их унесёт, а TagUsage по ним надо пересчитать."""
+    return list(TaskTag.objects.filter(task_id__in=task_ids).values_list("tag_id", flat=True).distinct())
+
+@events.atomic
+def create_task(*, user, **data) -> Task:
+    task = Task.objects.create(user_id=user.id, **data)
+    _mark_no_tags([task])
+    events.emit(events.CREATED, user_id=task.user_id, task_ids=[task.id], total_delta=1, done_delta=int(task.is_done))
+    return task
+
+@events.atomic
+def update_task(*, task: Task, data: dict, expected_version: Optional[int] = None) -> Task:
+    before = _write(task, lambda current: dict(data), expected_version)
+    events.emit(events.UPDATED, user_id=task.user_id, task_ids=[task.id],
+                done_delta=int(task.is_done) - int(before.get("is_done", task.is_done)))
+    return task
+
+@events.atomic
+def delete_task(*, task: Task) -> None:
+    user_id, task_id, is_done = task.user_id, task.id, task.is_done
+    tag_ids = _tag_ids_of([task_id])
+    task.delete()
+    _bury(user_id, [task_id])
+    events.emit(events.DELETED, user_id=user_id, task_ids=[task_id], total_delta=-1, done_delta=-int(is_done),
+                tag_ids=tag_ids)
+
+@events.atomic
+def change_title(*, task: Task, title: str, expected_version: Optional[int] = None) -> Task:
+    _write(task, lambda current: {"title": title}, expected_version)
+    events.emit(events.UPDATED, user_id=task.user_id, task_ids=[task.id])
     return task
 
-@transaction.atomic
-def toggle_task_done(*, task: Task) -> Task:
-    task.is_done = not task.is_done
-    task.save(update_fields=["is_done"])
+@events.atomic
+def toggle_task_done(*, task: Task, expected_version: Optional[int] = None) -> Task:
+    # отрицание берётся от прочитанного значения, но пишется только при неизменной версии:
+    # два параллельных toggle дают два переключения, а не одно
+    _write(task, lambda current: {"is_done": not current.is_done}, expected_version)
+    events.emit(events.TOGGLED, user_id=task.user_id, task_ids=[task.id], done_delta=1 if task.is_done else -1)
     return task
 
-@transaction.atomic
+def resolve_tags(*, tag_ids: Iterable[int] = (), tag_names: Iterable[str] = (), create: bool = True) -> List[Tag]:
+    """
+    Теги по id и именам за пару запросов: недостающие имена создаются одним
+    INSERT ... ON CONFLICT DO NOTHING (Tag.name уникален — гонок с дублями нет), затем один SELECT ... IN.
+    """
+    tag_ids = set(tag_ids)
+    names = {name.strip() for name in tag_names if name and name.strip()}
+    if create and names:
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+
+    tags = list(Tag.objects.filter(Q(id__in=tag_ids) | Q(name__in=names))) if tag_ids or names else []
+    if tag_ids - {tag.id for tag in tags}:
+        raise ValueError("Tag not found")
+    return tags
+
+@events.atomic
 def add_tag_to_task(*, task: Task, tag_id: Optional[int] = None, tag_name: Optional[str] = None) -> Task:
     if tag_id is None and not tag_name:
         raise ValueError("Either tag_id or tag_name is required")
 
     if tag_id is not None:
-        try:
-            tag = Tag.objects.get(pk=tag_id)
-        except Tag.DoesNotExist:
-            raise ValueError("Tag not found")
+        (tag,) = resolve_tags(tag_ids=[tag_id])
     else:
-        tag, _ = Tag.objects.get_or_create(name=tag_name)
+        (tag,) = resolve_tags(tag_names=[tag_name])
 
-    task.tags.add(tag)  # идемпотентно для M2M
+    # INSERT OR IGNORE по unique(task, tag) — идемпотентно и без SELECT, который делает tags.add()
+    TaskTag.objects.bulk_create([TaskTag(task_id=task.id, tag_id=tag.id)], ignore_conflicts=True)
+    task.updated_at = timezone.now()
+    Task.objects.filter(id=task.id).update(updated_at=task.updated_at)
+    getattr(task, "_prefetched_objects_cache", {}).pop("tags", None)  # как tags.add(): старый префетч устарел
+    events.emit(events.TAGGED, user_id=task.user_id, task_ids=[task.id], tag_ids=[tag.id])
     return task
 
-@transaction.atomic
+@events.atomic
 def delete_tag_from_task(*, task: Task, tag_id: int) -> None:
     if not isinstance(tag_id, int):
         raise ValueError("tag_id must be integer")
-    try:
-        tag = Tag.objects.get(pk=tag_id)
-    except Tag.DoesNotExist:
+    deleted, _ = TaskTag.objects.filter(task_id=task.id, tag_id=tag_id).delete()
+    if not deleted and not Tag.objects.filter(pk=tag_id).exists():  # проверка только на редком пути
         raise ValueError("Tag not found")
-    task.tags.remove(tag)
+    if deleted:  # связи не было — ничего не изменилось: ни updated_at, ни события (кэш и TagUsage не трогаем)
+        _touch([task.id])
+        events.emit(events.UNTAGGED, user_id=task.user_id, task_ids=[task.id], tag_ids=[tag_id])
+
+@events.atomic
+def bulk_tag_tasks(*, user, task_ids: Sequence[int], tag_ids: Iterable[int] = (), tag_names: Iterable[str] = (),
+                   batch_size: int = 1000) -> List[Tag]:
+    """Привязать N тегов к M задачам: связи пишутся одним bulk_create(ignore_conflicts=True)."""
+    tags = resolve_tags(tag_ids=tag_ids, tag_names=tag_names)
+    TaskTag.objects.bulk_create(
+        [TaskTag(task_id=task_id, tag_id=tag.id) for task_id in task_ids for tag in tags],
+        ignore_conflicts=True,
+        batch_size=batch_size,
+    )
+    if tags:
+        _touch(task_ids)
+    events.emit(events.TAGGED, user_id=user.id, task_ids=task_ids, tag_ids=[tag.id for tag in tags])
+    return tags
+
+@events.atomic
+def bulk_untag_tasks(*, user, task_ids: Sequence[int], tag_ids: Iterable[int] = (), tag_names: Iterable[str] = ()) -> List[Tag]:
+    """Отвязать теги от задач одним DELETE. Несуществующие имена просто игнорируются."""
+    tags = resolve_tags(tag_ids=tag_ids, tag_names=tag_names, create=False)
+    if tags and task_ids:
+        deleted, _ = TaskTag.objects.filter(task_id__in=task_ids, tag_id__in=[tag.id for tag in tags]).delete()
+        if deleted:
+            _touch(task_ids)
+            events.emit(events.UNTAGGED, user_id=user.id, task_ids=task_ids, tag_ids=[tag.id for tag in tags])
+    return tags
+
+@events.atomic
+def bulk_apply(
+    *,
+    user,
+    create: Sequence[dict] = (),
+    update: Sequence[Tuple[Task, dict]] = (),
+    toggle: Sequence[Task] = (),
+    delete: Sequence[Task] = (),
+    versions: Optional[Dict[int, int]] = None,
+    batch_size: int = 500,
+) -> Dict[str, List]:
+    """
+    Пачка операций одной транзакцией: bulk_create + bulk_update (по одному на набор изменяемых полей)
+    + один UPDATE для toggle + один DELETE. Задачи в update/toggle/delete уже проверены на владельца
+    и не пересекаются. versions — ожидаемые версии задач из update ({id: version}, как If-Match):
+    строки update читаются под select_for_update, и несовпадение откатывает всю пачку с
+    BulkVersionConflict. Проверка и запись — в одной транзакции под блокировкой строк, поэтому
+    между ними никто не вклинится (на SQLite запись и так идёт под блокировкой всей БД).
+    """
+    now = timezone.now()
+    versions = versions or {}
+
+    if update:
+        locked = {
+            task_id: (version, is_done)
+            for task_id, version, is_done in Task.objects.select_for_update()
+            .filter(id__in=[task.id for task, _ in update]).values_list("id", "version", "is_done")
+        }
+        if len(locked) < len(update):  # удалили между чтением во вьюхе и записью
+            raise Task.DoesNotExist()
+        conflicts = [task_id for task_id, version in versions.items() if locked[task_id][0] != version]
+        if conflicts:
+            raise BulkVersionConflict(sorted(conflicts))
+
+    created = Task.objects.bulk_create([Task(user_id=user.id, **data) for data in create], batch_size=batch_size)
+    _mark_no_tags(created)
+    if created:
+        events.emit(events.CREATED, user_id=user.id, task_ids=[task.id for task in created],
+                    total_delta=len(created), done_delta=sum(task.is_done for task in created))
+
+    changed, groups, done_delta = [], {}, 0
+    for task, data in update:
+        for attr, value in data.items():
+            setattr(task, attr, value)
+        task.updated_at = now
+        task.version = F("version") + 1  # версия растёт от значения в БД, а не от прочитанного
+        if "is_done" in data:  # дельта — от значения под блокировкой, а не от прочитанного вьюхой
+            done_delta += int(task.is_done) - int(locked[task.id][1])
+        # пишутся только присланные поля: остальные колонки не перезаписываются прочитанным значением
+        groups.setdefault(tuple(sorted(data)), []).append(task)
+        changed.append(task)
+    for fields, tasks in groups.items():
+        Task.objects.bulk_update(tasks, [*fields, "updated_at", "version"], batch_size=batch_size)
+    if changed:
+        events.emit(events.UPDATED, user_id=user.id, task_ids=[task.id for task in changed], done_delta=done_delta)
+
+    if toggle:
+        # переключение — один UPDATE с CASE по текущему значению в БД
+        Task.objects.filter(id__in=[task.id for task in toggle]).update(
+            is_done=Case(When(is_done=True, then=Value(False)), default=Value(True)),
+            updated_at=now,
+            version=F("version") + 1,
+        )
+
+    touched = changed + list(toggle)
+    if touched:
+        # версии после F("version") + 1 и is_done после CASE — одним SELECT: прочитанное до UPDATE
+        # могло устареть (параллельный toggle), ответ и дельты счётчиков берутся из БД
+        current = {
+            task_id: (version, is_done)
+            for task_id, version, is_done in Task.objects.filter(id__in=[task.id for task in touched])
+            .values_list("id", "version", "is_done")
+        }
+        for task in touched:
+            task.version, task.is_done = current[task.id]
+        for task in toggle:
+            task.updated_at = now
+    if toggle:
+        events.emit(events.TOGGLED, user_id=user.id, task_ids=[task.id for task in toggle],
+                    done_delta=sum(1 if task.is_done else -1 for task in toggle))
+
+    deleted_ids = [task.id for task in delete]
+    if deleted_ids:
+        tag_ids = _tag_ids_of(deleted_ids)
+        Task.objects.filter(id__in=deleted_ids).delete()
+        _bury(user.id, deleted_ids)
+        events.emit(events.DELETED, user_id=user.id, task_ids=deleted_ids,
+                    total_delta=-len(deleted_ids), done_delta=-sum(task.is_done for task in delete), tag_ids=tag_ids)
+
+    return {
+        "created": created,
+        "updated": [task for task, _ in update],
+        "toggled": list(toggle),
+        "deleted": deleted_ids,
+    }
+
+@events.atomic
+def rebuild_task_counters(*, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Пересчитать TaskCounter одним GROUP BY по задачам (все пользователи или только user_ids).
+    Возвращает число записанных счётчиков.
+    """
+    tasks = Task.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        tasks = tasks.filter(user_id__in=user_ids)
+
+    rows = {
+        row["user_id"]: row
+        for row in tasks.order_by().values("user_id").annotate(
+            total=Count("id"), done=Count("id", filter=Q(is_done=True))
+        )
+    }
+    # архивные задачи — тоже задачи пользователя (все выполнены): stats не меняется от архивации
+    archived = TaskArchive.objects.all() if user_ids is None else TaskArchive.objects.filter(user_id__in=user_ids)
+    for user_id, count in archived.order_by().values("user_id").annotate(n=Count("id")).values_list("user_id", "n"):
+        row = rows.setdefault(user_id, {"user_id": user_id, "total": 0, "done": 0})
+        row["total"] += count
+        row["done"] += count
+    if user_ids is None:
+        # у кого задач не осталось — обнуляем, чтобы не висели старые значения
+        TaskCounter.objects.exclude(user_id__in=rows.keys()).update(total=0, done=0)
+    for uid in user_ids or ():  # явно запрошенные без задач — запишутся нулями ниже
+        rows.setdefault(uid, {"user_id": uid, "total": 0, "done": 0})
+
+    TaskCounter.objects.bulk_create(
+        [TaskCounter(user_id=uid, total=r["total"], done=r["done"]) for uid, r in rows.items()],
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["total", "done"],
+    )
+    return len(rows)
+
+def _usage_rows(links, archived_links):
+    """GROUP BY по связям горячих и архивных задач; строки с одинаковым (user, tag) складываются."""
+    rows = {}
+    for qs in (links, archived_links):
+        grouped = qs.order_by().values("task__user_id", "tag_id", "tag__name").annotate(
+            total=Count("task_id"), done=Count("task_id", filter=Q(task__is_done=True))
+        )
+        for row in grouped:
+            key = (row["task__user_id"], row["tag_id"])
+            if key in rows:
+                rows[key]["total"] += row["total"]
+                rows[key]["done"] += row["done"]
+            else:
+                rows[key] = row
+    return list(rows.values())
+
+def _usage(row) -> TagUsage:
+    return TagUsage(user_id=row["task__user_id"], tag_id=row["tag_id"], name_lower=row["tag__name"].lower(),
+                    total=row["total"], done=row["done"])
+
+@events.atomic
+def refresh_tag_usage(*, user_id: int, tag_ids: Iterable[int] = (), task_ids: Iterable[int] = ()) -> int:
+    """
+    Пересчитать TagUsage пользователя только по затронутым тегам (tag_ids и теги задач task_ids):
+    один GROUP BY по связям этих тегов + upsert. Теги, у которых задач не осталось, из таблицы убираются.
+    """
+    tag_ids = set(tag_ids)
+    task_ids = list(task_ids)
+    if task_ids:
+        tag_ids.update(_tag_ids_of(task_ids))
+    if not tag_ids:
+        return 0
+
+    usage = [_usage(row) for row in _usage_rows(
+        TaskTag.objects.filter(task__user_id=user_id, tag_id__in=tag_ids),
+        TaskArchiveTag.objects.filter(task__user_id=user_id, tag_id__in=tag_ids),
+    )]
+    TagUsage.objects.filter(user_id=user_id, tag_id__in=tag_ids - {item.tag_id for item in usage}).delete()
+    TagUsage.objects.bulk_create(
+        usage, update_conflicts=True, unique_fields=["user", "tag"], update_fields=["name_lower", "total", "done"]
+    )
+    return len(usage)
+
+@events.atomic
+def rebuild_tag_usage(*, user_ids: Optional[Iterable[int]] = None, batch_size: int = 1000) -> int:
+    """Полный пересчёт TagUsage (все пользователи или только user_ids). Возвращает число строк."""
+    links, archived_links, usage = TaskTag.objects.all(), TaskArchiveTag.objects.all(), TagUsage.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        links, usage = links.filter(task__user_id__in=user_ids), usage.filter(user_id__in=user_ids)
+        archived_links = archived_links.filter(task__user_id__in=user_ids)
+
+    usage.delete()
+    created = TagUsage.objects.bulk_create(
+        [_usage(row) for row in _usage_rows(links, archived_links)], batch_size=batch_size
+    )
+    return len(created)
+
+def tombstone_retention() -> timedelta:
+    return timedelta(days=getattr(settings, "TASK_SYNC_TOMBSTONE_DAYS", 30))
+
+def prune_task_tombstones(*, older_than: Optional[datetime] = None) -> int:
+    """Удалить надгробия старше TASK_SYNC_TOMBSTONE_DAYS: курсоры такого возраста всё равно получают 410."""
+    cutoff = older_than or timezone.now() - tombstone_retention()
+    deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+def archive_after() -> timedelta:
+    return timedelta(days=getattr(settings, "TASK_ARCHIVE_AFTER_DAYS", 90))
+
+_ARCHIVED_FIELDS = ["id", "user_id", "title", "is_done", "created_at", "updated_at", "due_date", "version"]
+
+@events.atomic
+def _archive_batch(tasks) -> int:
+    """
+    Одна пачка: задачи и их связи с тегами копируются в архив, из горячей таблицы — удаляются.
+    Для delta-sync (/tasks/sync/) задача ушла из горячего набора — ей пишется надгробие, как при удалении.
+    select_for_update(skip_locked) на PostgreSQL не даёт задаче измениться между чтением и удалением
+    (на SQLite запись и так идёт под блокировкой всей БД).
+    """
+    rows = list(tasks.select_for_update(skip_locked=True).values(*_ARCHIVED_FIELDS))
+    if not rows:
+        return 0
+    ids = [row["id"] for row in rows]
+    links = list(TaskTag.objects.filter(task_id__in=ids).values_list("task_id", "tag_id"))
+
+    TaskArchive.objects.bulk_create([TaskArchive(**row) for row in rows])
+    TaskArchiveTag.objects.bulk_create([TaskArchiveTag(task_id=task_id, tag_id=tag_id) for task_id, tag_id in links])
+    Task.objects.filter(id__in=ids).delete()
+
+    # задачи не удалены, а переложены: счётчики и TagUsage учитывают архив — дельты нулевые,
+    # событие нужно ради сброса кэша ответов
+    by_user = {}
+    for row in rows:
+        by_user.setdefault(row["user_id"], []).append(row["id"])
+    for user_id, task_ids in by_user.items():
+        _bury(user_id, task_ids)
+        events.emit(events.ARCHIVED, user_id=user_id, task_ids=task_ids)
+    return len(rows)
+
+def archive_done_tasks(*, older_than: Optional[timedelta] = None, user_ids: Optional[Iterable[int]] = None,
+                       batch_size: int = 1000, limit: Optional[int] = None) -> int:
+    """
+    Перенести в TaskArchive задачи, выполненные больше older_than (TASK_ARCHIVE_AFTER_DAYS) назад —
+    по updated_at, его двигает и переключение is_done. Пачками по batch_size, каждая — своя транзакция:
+    блокировки короткие, прерванный прогон продолжается со следующей пачки. Возвращает число задач.
+    """
+    cutoff = timezone.now() - (older_than if older_than is not None else archive_after())
+    tasks = Task.objects.filter(is_done=True, updated_at__lt=cutoff)
+    if user_ids is not None:
+        tasks = tasks.filter(user_id__in=list(user_ids))
+
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        archived = _archive_batch(tasks.order_by("id")[:size])
+        moved += archived
+        if archived < size:
+            break
+    return moved
+
+
+# ---- async-версии для ASGI ----
+# transaction.atomic в async-контексте недоступен, поэтому async-мутации — только
+# однозапросные (атомарны сами по себе). Многошаговые (теги, bulk, удаление, запись с проверкой версии) вызываются
+# как sync_to_async(<sync-версия>) и выполняются в транзакции в потоке ORM.
+
+async def acreate_task(*, user, **data) -> Task:
+    task = await Task.objects.acreate(user_id=user.id, **data)
+    await events.aemit(events.CREATED, user_id=task.user_id, task_ids=[task.id], total_delta=1,
+                       done_delta=int(task.is_done))
+    return task
+
+async def aupdate_task(*, task: Task, data: dict, expected_version: Optional[int] = None) -> Task:
+    return await sync_to_async(update_task)(task=task, data=data, expected_version=expected_version)
+
+async def adelete_task(*, task: Task) -> None:
+    # удаление + надгробие для delta-sync — две записи, поэтому одной транзакцией в потоке ORM
+    await sync_to_async(delete_task)(task=task)
+
+async def achange_title(*, task: Task, title: str, expected_version: Optional[int] = None) -> Task:
+    return await sync_to_async(change_title)(task=task, title=title, expected_version=expected_version)
+
+async def atoggle_task_done(*, task: Task, expected_version: Optional[int] = None) -> Task:
+    return await sync_to_async(toggle_task_done)(task=task, expected_version=expected_version)
@@ -1,11 +1,64 @@
-from django.db.models.signals import post_save
+# apps/ToDoList_app/signals.py
+"""Подписчики событий задач (events.py) и сигналов моделей. Подключаются в TodolistAppConfig.ready()."""
+import logging
+from collections import defaultdict
+
+from apps.ToDoList_app import caching, events, services
+from apps.ToDoList_app.api.v1.authentication import active_users
+from apps.ToDoList_app.domain.models import TaskCounter
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from apps.ToDoList_app.domain.models import Task
-
-@receiver(post_save, sender=Task)
-def init_task(sender, instance, created, **kwargs):
-    if created:
-        if instance.is_done is None:
-            instance.is_done = False
-            instance.save()
-        print(f"✅ Создана новая задача: {instance.title}")
+
+logger = logging.getLogger("apps.ToDoList_app.events")
+
+
+@events.subscribe
+def log_events(batch):
+    if logger.isEnabledFor(logging.DEBUG):
+        for event in batch:
+            logger.debug("task.%s", event.kind, extra={
+                "user_id": event.user_id, "task_ids": event.task_ids[:20], "task_count": len(event.task_ids),
+            })
+
+
+@events.subscribe
+def update_counters(batch):
+    """Дельты TaskCounter — по одному UPDATE на пользователя за пачку."""
+    deltas = defaultdict(lambda: [0, 0])
+    for event in batch:
+        deltas[event.user_id][0] += event.total_delta
+        deltas[event.user_id][1] += event.done_delta
+    for user_id, (total, done) in deltas.items():
+        if total or done:  # нет строки — не страшно, её заведёт rebuild при первом чтении
+            TaskCounter.objects.filter(user_id=user_id).update(total=F("total") + total, done=F("done") + done)
+
+
+@events.subscribe
+def update_tag_usage(batch):
+    """TagUsage пересчитывается только по затронутым тегам — по одному вызову на пользователя за пачку."""
+    tag_ids, task_ids = defaultdict(set), defaultdict(set)
+    for event in batch:
+        if event.tag_ids:
+            tag_ids[event.user_id].update(event.tag_ids)
+        # смена is_done меняет done у тегов задачи; пачка bulk-update могла переключить
+        # задачи в обе стороны с нулевой суммой — её проверяем всегда
+        elif event.kind == events.TOGGLED or (
+            event.kind == events.UPDATED and (event.done_delta or len(event.task_ids) > 1)
+        ):
+            task_ids[event.user_id].update(event.task_ids)
+    for user_id in tag_ids.keys() | task_ids.keys():
+        services.refresh_tag_usage(user_id=user_id, tag_ids=tag_ids[user_id], task_ids=task_ids[user_id])
+
+
+@events.subscribe
+def invalidate_response_cache(batch):
+    for user_id in {event.user_id for event in batch}:
+        caching.invalidate_user(user_id)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def evict_user_state(sender, instance, **kwargs):
+    """Отключение/удаление/смена пароля видны в этом процессе сразу, в остальных — через TTL."""
+    active_users.evict(instance.pk)
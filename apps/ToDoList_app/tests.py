@@ -1,3 +1,1397 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from itertools import combinations
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import F
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.ToDoList_app import events, jobs, selectors, services
+from apps.ToDoList_app.api.v1.authentication import ActiveStateCache, active_users
+from apps.ToDoList_app.api.v1.sync import SyncCursor
+from apps.ToDoList_app.api.v1.views import TaskViewSet
+from apps.ToDoList_app.docs import TASK_FILTER_PARAMS
+from apps.ToDoList_app.domain.models import (
+    Job, Tag, TagUsage, Task, TaskArchive, TaskArchiveTag, TaskCounter, TaskTag, TaskTombstone, decode_public_id,
+    encode_public_id,
+)
+from apps.ToDoList_app.middleware import QueryLog
+
+
+class TaskPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        base = date(2025, 9, 1)
+        # due_date с повторами и NULL'ами — проверяем стабильность порядка
+        self.tasks = [
+            Task.objects.create(
+                user=self.user,
+                title=f"task {i}",
+                due_date=None if i % 4 == 0 else base + timedelta(days=i % 3),
+            )
+            for i in range(23)
+        ]
+
+    def _walk(self, url):
+        ids, pages = [], 0
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            ids += [row["id"] for row in resp.data["results"]]
+            url = resp.data["next"]
+            pages += 1
+        return ids, pages
+
+    def test_default_order_is_id_desc(self):
+        ids, pages = self._walk("/api/tasks/?page_size=5")
+        self.assertEqual(ids, sorted((t.id for t in self.tasks), reverse=True))
+        self.assertEqual(pages, 5)
+
+    def test_due_date_ordering_is_stable_across_pages(self):
+        for ordering in ("due_date", "-due_date"):
+            ids, _ = self._walk(f"/api/tasks/?page_size=4&ordering={ordering}")
+            dated = sorted((t for t in self.tasks if t.due_date), key=lambda t: (t.due_date, t.id),
+                           reverse=ordering.startswith("-"))
+            undated = sorted((t for t in self.tasks if not t.due_date), key=lambda t: t.id,
+                             reverse=ordering.startswith("-"))
+            self.assertEqual(ids, [t.id for t in dated + undated])
+
+    def test_previous_link_returns_same_page(self):
+        first = self.client.get("/api/tasks/?page_size=6&ordering=-due_date")
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_all_tasks_action_is_paginated(self):
+        resp = self.client.get("/api/tasks/get_all_tasks_and_their_info/?page_size=10")
+        self.assertEqual(len(resp.data["results"]), 10)
+        self.assertIsNotNone(resp.data["next"])
+
+    def test_invalid_cursor(self):
+        resp = self.client.get("/api/tasks/?cursor=garbage")
+        self.assertEqual(resp.status_code, 404)
+
+
+class TaskStatsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+
+    def _create(self, title, **extra):
+        return self.client.post("/api/tasks/", {"title": title, **extra}, format="json").data
+
+    def test_counters_follow_mutations(self):
+        a = self._create("a")
+        self._create("b", is_done=True, due_date="2025-09-01")
+        self.assertEqual(self.client.get("/api/tasks/stats/").data["count"], 2)  # заводит счётчик
+
+        # счётчики двигает подписчик событий после коммита
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create("c")
+            self.client.post(f"/api/tasks/{a['id']}/toggle/")
+            self.client.patch(f"/api/tasks/{a['id']}/", {"is_done": False}, format="json")
+            self.client.delete(f"/api/tasks/{self._create('d')['id']}/")
+
+        with self.assertNumQueries(1):
+            data = self.client.get("/api/tasks/stats/").data
+        self.assertEqual((data["count"], data["done_count"], data["percent"]), (3, 1, 33.33))
+
+    def test_rebuild_command_fixes_drift(self):
+        Task.objects.create(user=self.user, title="x", is_done=True)
+        TaskCounter.objects.create(user=self.user, total=7, done=0)
+
+        out = StringIO()
+        call_command("rebuild_task_counters", "--check", stdout=out)
+        self.assertIn("1 counter(s) out of sync", out.getvalue())
+
+        call_command("rebuild_task_counters", stdout=StringIO())
+        counter = TaskCounter.objects.get(user=self.user)
+        self.assertEqual((counter.total, counter.done), (1, 1))
+
+
+class TaskEventTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.batches = []
+        events.subscribe(self.batches.append)
+        self.addCleanup(events.unsubscribe, self.batches.append)
+
+    def test_bulk_is_one_batch_after_commit(self):
+        task = Task.objects.create(user=self.user, title="a")
+        with self.captureOnCommitCallbacks(execute=True):
+            services.bulk_apply(user=self.user, create=[{"title": "b"}, {"title": "c"}], toggle=[task])
+            self.assertEqual(self.batches, [])
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual([e.kind for e in self.batches[0]], [events.CREATED, events.TOGGLED])
+        self.assertEqual([len(e.task_ids) for e in self.batches[0]], [2, 1])
+
+    def test_rollback_emits_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                services.create_task(user=self.user, title="kept")
+                try:
+                    with transaction.atomic():
+                        services.create_task(user=self.user, title="lost")
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+        self.assertEqual([len(batch) for batch in self.batches], [1])
+
+    def test_nested_levels_are_one_batch_in_order(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with events.atomic():
+                events.emit(events.CREATED, user_id=self.user.id, task_ids=[1])
+                with events.atomic():
+                    events.emit(events.UPDATED, user_id=self.user.id, task_ids=[1])
+                try:
+                    with transaction.atomic():  # обычный savepoint между уровнями
+                        with events.atomic():
+                            events.emit(events.DELETED, user_id=self.user.id, task_ids=[1])
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                try:
+                    with events.atomic():
+                        events.emit(events.DELETED, user_id=self.user.id, task_ids=[2])
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                events.emit(events.TOGGLED, user_id=self.user.id, task_ids=[1])
+            self.assertEqual(self.batches, [])
+        self.assertEqual([[e.kind for e in batch] for batch in self.batches],
+                         [[events.CREATED, events.UPDATED, events.TOGGLED]])
+
+    def test_untag_without_link_emits_nothing(self):
+        task = Task.objects.create(user=self.user, title="a")
+        tag = Tag.objects.create(name="work")
+        with self.captureOnCommitCallbacks(execute=True):
+            services.delete_tag_from_task(task=task, tag_id=tag.id)
+        self.assertEqual(self.batches, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            services.add_tag_to_task(task=task, tag_id=tag.id)
+            services.delete_tag_from_task(task=task, tag_id=tag.id)
+        self.assertEqual([e.kind for e in self.batches[0]] + [e.kind for e in self.batches[1]],
+                         [events.TAGGED, events.UNTAGGED])
+
+    def test_create_is_single_insert(self):
+        # post_save больше не пересохраняет задачу
+        with self.captureOnCommitCallbacks(execute=False), CaptureQueriesContext(connection) as ctx:
+            services.create_task(user=self.user, title="a")
+        self.assertEqual([q["sql"].split()[0] for q in ctx.captured_queries if "ToDoList_app_task\"" in q["sql"]],
+                         ["INSERT"])
+
+
+class TaskQueryPlanTests(APITestCase):
+    """Каждая комбинация фильтров из docs.TASK_FILTER_PARAMS должна идти по индексу (SQLite EXPLAIN)."""
+    values = {
+        "is_done": "true",
+        "due_from": "2025-09-01",
+        "due_to": "2025-09-30",
+        "search": "task",
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        tag, home = Tag.objects.create(name="work"), Tag.objects.create(name="home")
+        self.values = {**self.values, "tags__id": str(tag.id), "tags_all": f"{tag.id},{home.id}",
+                       "tags_any": f"{tag.id},{home.id}"}
+        for i in range(30):
+            task = Task.objects.create(user=self.user, title=f"task {i}", due_date=date(2025, 9, 1 + i % 28))
+            task.tags.add(tag, *([home] if i % 2 else []))
+
+    def _plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_filter_combinations_use_indexes(self):
+        names = [p.name for p in TASK_FILTER_PARAMS if p.name != "ordering"]
+        orderings = ["-id", "due_date", "-due_date", "created_at", "-created_at"]
+        for size in range(len(names) + 1):
+            for combo in combinations(names, size):
+                for ordering in orderings:
+                    params = {name: self.values[name] for name in combo}
+                    params["ordering"] = ordering
+                    with CaptureQueriesContext(connection) as ctx:
+                        resp = self.client.get("/api/tasks/", params)
+                    self.assertEqual(resp.status_code, 200)
+                    for query in ctx.captured_queries:
+                        for detail in self._plan(query["sql"]):
+                            # "SCAN <table>" без индекса — полный проход (FTS5 MATCH = "VIRTUAL TABLE INDEX")
+                            full_scan = (detail.startswith("SCAN ") and " USING " not in detail
+                                         and "VIRTUAL TABLE INDEX" not in detail)
+                            self.assertFalse(full_scan, f"{params}: {detail}\n{query['sql']}")
+
+
+class TaskTagFilterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.a, self.b, self.c = (Tag.objects.create(name=name) for name in "abc")
+        self.ab = Task.objects.create(user=self.user, title="ab")
+        self.ab.tags.add(self.a, self.b)
+        self.abc = Task.objects.create(user=self.user, title="abc")
+        self.abc.tags.add(self.a, self.b, self.c)
+        self.c_only = Task.objects.create(user=self.user, title="c")
+        self.c_only.tags.add(self.c)
+        Task.objects.create(user=self.user, title="untagged")
+        foreign = Task.objects.create(user=User.objects.create_user("other"), title="foreign")
+        foreign.tags.add(self.a, self.b)
+
+    def _ids(self, **params):
+        resp = self.client.get("/api/tasks/", params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return [row["id"] for row in resp.data["results"]]
+
+    def test_all_and_any(self):
+        a, b, c = self.a.id, self.b.id, self.c.id
+        self.assertEqual(self._ids(tags_all=f"{a},{b}"), [self.abc.id, self.ab.id])
+        self.assertEqual(self._ids(tags_all=f"{a},{b},{a}"), [self.abc.id, self.ab.id])  # повтор id не мешает
+        self.assertEqual(self._ids(tags_all=f"{a},{c}"), [self.abc.id])
+        self.assertEqual(self._ids(tags_any=f"{b},{c}"), [self.c_only.id, self.abc.id, self.ab.id])  # без дублей
+        self.assertEqual(self._ids(tags_all=f"{a},{b}", tags_any=str(c)), [self.abc.id])
+        self.assertEqual(self.client.get("/api/tasks/", {"tags_all": "x"}).status_code, 400)
+
+
+class TaskSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        other = User.objects.create_user("other", password="pass")
+        Task.objects.create(user=other, title="buy milk")
+        self.milk = Task.objects.create(user=self.user, title="Buy milk", is_done=True, due_date=date(2025, 9, 1))
+        self.milky = Task.objects.create(user=self.user, title="milk, milk and more milk")
+        self.bread = Task.objects.create(user=self.user, title="Bread")
+
+    def _ids(self, query):
+        return [row["id"] for row in self.client.get("/api/tasks/", query).data["results"]]
+
+    def test_ranked_and_scoped_to_user(self):
+        self.assertEqual(self._ids({"search": "milk"}), [self.milky.id, self.milk.id])
+
+    def test_rank_order_survives_pagination(self):
+        first = self.client.get("/api/tasks/", {"search": "milk", "page_size": 1}).data
+        second = self.client.get(first["next"]).data
+        self.assertEqual([first["results"][0]["id"], second["results"][0]["id"]], [self.milky.id, self.milk.id])
+        self.assertIsNone(second["next"])
+
+    def test_substring_semantics_like_icontains(self):
+        self.assertEqual(self._ids({"search": "REA"}), [self.bread.id])
+        self.assertEqual(self._ids({"search": "mi"}), [self.milky.id, self.milk.id])  # короче триграммы
+
+    def test_combines_with_filters_and_ordering(self):
+        self.assertEqual(self._ids({"search": "milk", "is_done": "true"}), [self.milk.id])
+        self.assertEqual(self._ids({"search": "milk", "ordering": "id"}), [self.milk.id, self.milky.id])
+
+    def test_index_follows_title_changes(self):
+        self.client.post(f"/api/tasks/{self.bread.id}/change_title/", {"title": "Milk bread"}, format="json")
+        self.milky.delete()
+        self.assertEqual(sorted(self._ids({"search": "milk"})), [self.milk.id, self.bread.id])
+
+
+class TaskBulkTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.tasks = [Task.objects.create(user=self.user, title=f"t{i}") for i in range(4)]
+
+    def test_mixed_batch_in_one_transaction(self):
+        a, b, c, d = self.tasks
+        resp = self.client.post("/api/tasks/bulk/", {
+            "create": [{"title": "new 1"}, {"title": "new 2", "is_done": True, "due_date": "2025-09-01"}],
+            "update": [{"id": a.id, "title": "renamed"}],
+            "toggle": [b.id],
+            "delete": [c.id, d.id],
+        }, format="json")
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual([t["title"] for t in resp.data["created"]], ["new 1", "new 2"])
+        self.assertEqual(resp.data["updated"][0]["title"], "renamed")
+        self.assertTrue(resp.data["toggled"][0]["is_done"])
+        self.assertEqual(sorted(resp.data["deleted"]), [c.id, d.id])
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 4)
+        stats = self.client.get("/api/tasks/stats/").data
+        self.assertEqual((stats["count"], stats["done_count"]), (4, 2))
+
+    def test_toggle_reads_result_from_db(self):
+        stale = Task.objects.get(pk=self.tasks[0].pk)
+        Task.objects.filter(pk=stale.pk).update(is_done=True)  # параллельный toggle после чтения
+        services.rebuild_task_counters(user_ids=[self.user.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            result = services.bulk_apply(user=self.user, toggle=[stale])
+        self.assertFalse(result["toggled"][0].is_done)
+        self.assertFalse(Task.objects.get(pk=stale.pk).is_done)
+        self.assertEqual(self.client.get("/api/tasks/stats/").data["done_count"], 0)
+
+    def test_invalid_item_rejects_whole_batch(self):
+        other = Task.objects.create(user=User.objects.create_user("other"), title="foreign")
+        resp = self.client.post("/api/tasks/bulk/", {
+            "create": [{"title": "ok"}, {"title": "  "}],
+            "update": [{"id": self.tasks[0].id, "is_done": True}],  # done без due_date
+            "delete": [other.id],
+        }, format="json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["create"][0], {})
+        self.assertIn("title", resp.data["create"][1])
+        self.assertIn("due_date", resp.data["update"][0])
+        self.assertEqual(resp.data["delete"], [f"Task {other.id} not found"])
+        self.assertEqual(Task.objects.count(), 5)
+
+        resp = self.client.post("/api/tasks/bulk/", {"update": [{"id": True, "title": "x"}]}, format="json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("update", resp.data)
+        self.assertFalse(Task.objects.filter(title="x").exists())
+
+    def test_thousand_items_take_a_handful_of_queries(self):
+        Task.objects.bulk_create([Task(user=self.user, title=f"x{i}") for i in range(1000)])
+        ids = list(Task.objects.filter(title__startswith="x").values_list("id", flat=True))
+        payload = {
+            "create": [{"title": f"c{i}"} for i in range(1000)],
+            "update": [{"id": i, "title": "u"} for i in ids[:500]],
+            "toggle": ids[500:900],
+            "delete": ids[900:],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post("/api/tasks/bulk/", payload, format="json")
+        self.assertEqual(resp.status_code, 200)
+        # на SQLite bulk_create/bulk_update режутся на пачки по лимиту в 999 параметров
+        # (8 INSERT по 7 колонок), плюс SELECT ... FOR UPDATE перед update и SELECT версий после F("version") + 1
+        self.assertLessEqual(len(ctx.captured_queries), 23)
+
+
+class TaskBulkTaggingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        Task.objects.bulk_create([Task(user=self.user, title=f"t{i}") for i in range(500)])
+        self.ids = list(Task.objects.values_list("id", flat=True))
+        self.work = Tag.objects.create(name="work")
+
+    def test_tag_500_tasks_in_a_few_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post("/api/tasks/bulk_tag/", {
+                "task_ids": self.ids, "tag_ids": [self.work.id], "tag_names": ["urgent", "home", "work"],
+            }, format="json")
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(sorted(t["name"] for t in resp.data["tags"]), ["home", "urgent", "work"])
+        self.assertEqual(TaskTag.objects.count(), 1500)
+        self.assertLessEqual(len(ctx.captured_queries), 10)
+
+        # повтор идемпотентен и не плодит теги
+        self.client.post("/api/tasks/bulk_tag/", {"task_ids": self.ids, "tag_names": ["home"]}, format="json")
+        self.assertEqual((Tag.objects.count(), TaskTag.objects.count()), (3, 1500))
+
+    def test_untag(self):
+        self.client.post("/api/tasks/bulk_tag/", {"task_ids": self.ids, "tag_names": ["a", "b"]}, format="json")
+        resp = self.client.post("/api/tasks/bulk_untag/", {"task_ids": self.ids[:100], "tag_names": ["a", "nope"]},
+                                format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(TaskTag.objects.filter(tag__name="a").count(), 400)
+
+    def test_foreign_tasks_and_unknown_tag_ids_rejected(self):
+        foreign = Task.objects.create(user=User.objects.create_user("other"), title="x")
+        resp = self.client.post("/api/tasks/bulk_tag/", {"task_ids": [foreign.id], "tag_names": ["a"]}, format="json")
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post("/api/tasks/bulk_tag/", {"task_ids": self.ids[:1], "tag_ids": [999]}, format="json")
+        self.assertEqual(resp.data, {"error": "Tag not found"})
+
+
+@override_settings(TASK_RESPONSE_CACHE_ENABLED=True)
+class TaskResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, title="cached")
+
+    def test_hit_skips_queries_and_304(self):
+        first = self.client.get("/api/tasks/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/tasks/")
+            not_modified = self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+
+    def test_mutations_invalidate(self):
+        url = f"/api/tasks/{self.task.id}/"
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/tasks/{self.task.id}/change_title/", {"title": "renamed"}, format="json")
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["title"], "renamed")
+        self.assertNotEqual(resp["ETag"], etag)
+
+        list_etag = self.client.get("/api/tasks/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(url)
+        self.assertEqual(self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=list_etag).data["results"], [])
+
+    def test_keyed_per_user_and_query(self):
+        self.client.get("/api/tasks/")
+        other = User.objects.create_user("other")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get("/api/tasks/").data["results"], [])
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get("/api/tasks/?is_done=true").data["results"], [])
+
+
+class TaskFastSerializerParityTests(APITestCase):
+    """Быстрый путь (values() + карта тегов) обязан отдавать те же байты, что и ModelSerializer."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        tags = [Tag.objects.create(name=name) for name in ("b-tag", "a-tag", "ёжик")]
+        for i in range(12):
+            task = Task.objects.create(
+                user=self.user,
+                title=f"Задача \"{i}\" milk",
+                is_done=i % 3 == 0,
+                due_date=date(2025, 9, 1 + i) if i % 2 else None,
+            )
+            task.tags.add(*tags[: i % 4])
+
+    def _both(self, url):
+        fast = self.client.get(url)
+        with override_settings(TASK_FAST_SERIALIZERS=False):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, slow.status_code)
+        self.assertEqual(fast.content, slow.content, url)
+        return fast
+
+    def test_list_and_all_tasks(self):
+        for query in ("", "?ordering=due_date", "?search=milk", "?is_done=true&page_size=3"):
+            self._both(f"/api/tasks/{query}")
+            page = self._both(f"/api/tasks/get_all_tasks_and_their_info/{query}")
+        self._both(page.data["next"])
+
+    def test_retrieve(self):
+        for task in Task.objects.all():
+            self._both(f"/api/tasks/{task.id}/")
+        self._both("/api/tasks/999999/")
+        self._both("/api/tasks/abc/")
+
+    @override_settings(TIME_ZONE="Europe/Moscow")
+    def test_non_utc_timezone(self):
+        self._both("/api/tasks/get_all_tasks_and_their_info/")
+
+    def test_sparse_fields(self):
+        task = Task.objects.filter(tags__isnull=False).first()
+        for query in ("?fields=title,id", "?expand=tags", "?fields=public_id,due_date&expand=tags&ordering=due_date",
+                      "?fields=updated_at,tags&page_size=3", "?fields=nope", "?expand=user"):
+            self._both(f"/api/tasks/{query}")
+            self._both(f"/api/tasks/{task.id}/{query}")
+
+    def test_archived_tags(self):
+        self.assertEqual(services.archive_done_tasks(older_than=timedelta(0)), 4)
+        for query in ("?include_archived=true&expand=tags", "?include_archived=true&fields=id,tags&ordering=due_date"):
+            rows = self._both(f"/api/tasks/{query}").data["results"]
+            archived = [row for row in rows if TaskArchive.objects.filter(id=row["id"]).exists()]
+            self.assertEqual(len(archived), 4)
+            self.assertEqual(sum(len(row["tags"]) for row in archived), 0 + 3 + 2 + 1)  # задачи 0, 3, 6, 9
+
+
+class TaskSparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(name="home")
+        for i in range(4):
+            Task.objects.create(user=self.user, title=f"t{i}", due_date=date(2025, 9, 1 + i)).tags.add(tag)
+        self.task = Task.objects.filter(user=self.user).first()
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        # запросы к задачам и тегам (без сессии/пользователя из force_authenticate)
+        sql = [q["sql"] for q in ctx.captured_queries if "ToDoList_app" in q["sql"]]
+        return resp.data, sql
+
+    def test_projection_reaches_the_database(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(TASK_FAST_SERIALIZERS=fast):
+                data, sql = self._get("/api/tasks/?fields=id,title")
+                self.assertEqual([set(row) for row in data["results"]], [{"id", "title"}] * 4)
+                self.assertEqual(len(sql), 1)
+                self.assertNotIn('"updated_at"', sql[0])
+
+                data, sql = self._get(f"/api/tasks/{self.task.id}/?fields=title")
+                self.assertEqual(data, {"title": self.task.title})
+                self.assertEqual(len(sql), 1)
+                self.assertNotIn('"updated_at"', sql[0])
+
+                data, sql = self._get("/api/tasks/?expand=tags")
+                self.assertEqual(list(data["results"][0]), ["id", "title", "is_done", "tags"])
+                self.assertEqual(data["results"][0]["tags"][0]["name"], "home")
+                self.assertEqual(len(sql), 2)
+
+    def test_default_list_skips_tags(self):
+        with override_settings(TASK_FAST_SERIALIZERS=False):
+            _, sql = self._get("/api/tasks/")
+        self.assertEqual(len(sql), 1)
+
+    def test_by_public_id_and_pagination(self):
+        data, _ = self._get(f"/api/tasks/by-public/{self.task.public_id}/?fields=public_id")
+        self.assertEqual(data, {"public_id": self.task.public_id})
+        data, _ = self._get("/api/tasks/?fields=title&ordering=due_date&page_size=3")
+        data, _ = self._get(data["next"])
+        self.assertEqual(data["results"], [{"title": "t3"}])
+
+    def test_invalid(self):
+        resp = self.client.get("/api/tasks/?fields=title,secret&expand=user")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(set(resp.data), {"fields", "expand"})
+        self.assertEqual(self.client.get("/api/tasks/?fields=").status_code, 400)
+
+
+class TaskExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(name="home")
+        for i in range(5):
+            task = Task.objects.create(user=self.user, title=f"t{i}", is_done=i < 2, due_date=date(2025, 9, 1))
+            task.tags.add(tag)
+        Task.objects.create(user=User.objects.create_user("other"), title="foreign")
+
+    def _body(self, resp):
+        self.assertTrue(resp.streaming)
+        return b"".join(resp.streaming_content).decode("utf-8")
+
+    def test_ndjson_matches_detail_representation(self):
+        resp = self.client.get("/api/tasks/export/?ordering=id")
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self._body(resp).splitlines()]
+        self.assertEqual([r["title"] for r in rows], [f"t{i}" for i in range(5)])
+        self.assertEqual(rows[0], json.loads(self.client.get(f"/api/tasks/{rows[0]['id']}/").content))
+
+    def test_csv_honours_filters(self):
+        resp = self.client.get("/api/tasks/export/?file_format=csv&is_done=true")
+        rows = list(csv.reader(self._body(resp).splitlines()))
+        self.assertEqual(rows[0][:3], ["user", "id", "title"])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][3], "true")
+        self.assertEqual(rows[1][7], "home")
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get("/api/tasks/export/?file_format=xml").status_code, 400)
+
+    def test_follows_fast_serializer_switch(self):
+        for file_format in ("ndjson", "csv"):
+            url = f"/api/tasks/export/?ordering=id&file_format={file_format}"
+            fast = self._body(self.client.get(url))
+            with override_settings(TASK_FAST_SERIALIZERS=False), \
+                    mock.patch("apps.ToDoList_app.api.v1.fast_serializers.FastTaskSerializer.serialize") as serialize:
+                self.assertEqual(self._body(self.client.get(url)), fast)
+            serialize.assert_not_called()
+
+
+class TaskAsyncReadTests(APITestCase):
+    """/api/async/tasks/ (ASGI-путь без DRF) отдаёт то же, что и обычные ручки."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        tag = Tag.objects.create(name="home")
+        for i in range(5):
+            task = Task.objects.create(user=self.user, title=f"t{i}", is_done=i < 2, due_date=date(2025, 9, i + 1))
+            task.tags.add(tag)
+        self.foreign = Task.objects.create(user=User.objects.create_user("other"), title="foreign")
+
+    def test_list_matches_sync(self):
+        for query in ("", "?page_size=2", "?ordering=due_date&is_done=false", "?search=t1", "?fields=title&expand=tags"):
+            sync = json.loads(self.client.get(f"/api/tasks/{query}").content)
+            resp = self.client.get(f"/api/async/tasks/{query}")
+            self.assertEqual(resp.status_code, 200)
+            data = json.loads(resp.content)
+            if data["next"]:
+                data["next"] = data["next"].replace("/api/async/tasks/", "/api/tasks/")
+            self.assertEqual(data, sync, query)
+
+    def test_retrieve_and_stats(self):
+        task = Task.objects.filter(user=self.user).first()
+        self.assertEqual(self.client.get(f"/api/async/tasks/{task.id}/").content,
+                         self.client.get(f"/api/tasks/{task.id}/").content)
+        self.assertEqual(self.client.get(f"/api/async/tasks/{self.foreign.id}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/async/tasks/abc/").status_code, 404)
+        self.assertEqual(json.loads(self.client.get("/api/async/tasks/stats/").content),
+                         {"count": 5, "done_count": 2, "percent": 40.0})
+
+    def test_requires_token(self):
+        self.client.credentials()
+        resp = self.client.get("/api/async/tasks/")
+        self.assertEqual(resp.status_code, 401)
+        self.assertIn("Bearer", resp["WWW-Authenticate"])
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer broken")
+        self.assertEqual(self.client.get("/api/async/tasks/").status_code, 401)
+
+    async def test_async_services(self):
+        task = await services.acreate_task(user=self.user, title="async")
+        await services.atoggle_task_done(task=task)
+        await services.achange_title(task=task, title="renamed")
+        self.assertEqual(await Task.objects.filter(is_done=True, title="renamed").acount(), 1)
+        stats = await selectors.atask_stats(selectors.tasks_for_user(user=self.user))
+        self.assertEqual(stats["count"], 6)
+        await services.adelete_task(task=task)
+        self.assertEqual(len(await selectors.atasks_for_user(user=self.user)), 5)
+
+
+class TaskStatelessAuthTests(APITestCase):
+    """StatelessJWTAuthentication: без SELECT по auth_user на запрос, отключённые — отсекаются."""
+
+    def setUp(self):
+        active_users.clear()
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        self.task = Task.objects.create(user=self.user, title="mine")
+
+    def _user_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        return [q["sql"] for q in ctx.captured_queries if '"auth_user"' in q["sql"]]
+
+    def test_active_state_is_cached(self):
+        self.assertEqual(len(self._user_queries("/api/tasks/")), 1)
+        self.assertEqual(self._user_queries("/api/tasks/"), [])
+        self.assertEqual(self._user_queries(f"/api/tasks/{self.task.id}/"), [])
+
+    def test_deactivated_user_rejected(self):
+        self.client.get("/api/tasks/")
+        self.user.is_active = False
+        self.user.save()  # post_save сбрасывает запись кэша
+        self.assertEqual(self.client.get("/api/tasks/").status_code, 401)
+        self.assertEqual(self.client.get("/api/async/tasks/").status_code, 401)
+
+    def test_ownership_with_token_user(self):
+        created = self.client.post("/api/tasks/", {"title": "new"}, format="json")
+        self.assertEqual(created.data["user"], self.user.id)
+        resp = self.client.patch(f"/api/tasks/{self.task.id}/", {"title": "renamed"}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        foreign = Task.objects.create(user=User.objects.create_user("other"), title="foreign")
+        self.assertEqual(self.client.post(f"/api/tasks/{foreign.id}/toggle/").status_code, 404)
+
+    def test_staff_check_uses_cached_state(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get("/api/tasks/")
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/api/tasks/", HTTP_X_PROFILE="1")
+        self.assertIn("Server-Timing", resp)
+        self.assertEqual([q for q in ctx.captured_queries if '"auth_user"' in q["sql"]], [])
+
+    def test_lru_eviction(self):
+        cache = ActiveStateCache()
+        with override_settings(TASK_AUTH_ACTIVE_CACHE_SIZE=2):
+            for user_id in (1, 2, 1, 3):
+                cache.set(user_id, (True, "", False))
+        self.assertEqual([cache.get(user_id)[0] for user_id in (1, 2, 3)], [True, False, True])
+
+
+class TaskQueryBudgetTests(APITestCase):
+    """
+    Каждое действие TaskViewSet укладывается в query_budgets и не делает N+1.
+    QueryBudgetMiddleware в тестовых настройках строгий — превышение в любом тесте валит его.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.tags = [Tag.objects.create(name=f"tag{i}") for i in range(3)]
+        self.tasks = []
+        for i in range(10):
+            task = Task.objects.create(user=self.user, title=f"t{i}", is_done=i % 2 == 0, due_date=date(2025, 9, 1))
+            task.tags.add(*self.tags)
+            self.tasks.append(task)
+
+    def _calls(self):
+        a, b, c, d, e = (task.id for task in self.tasks[:5])
+        tag = self.tags[0].id
+        return [
+            ("list", "get", "/api/tasks/", None),
+            ("retrieve", "get", f"/api/tasks/{a}/", None),
+            ("get_all_tasks_and_their_info", "get", "/api/tasks/get_all_tasks_and_their_info/", None),
+            ("create", "post", "/api/tasks/", {"title": "new"}),
+            ("update", "put", f"/api/tasks/{a}/", {"title": "put", "is_done": True, "due_date": "2025-09-02"}),
+            ("partial_update", "patch", f"/api/tasks/{a}/", {"title": "patched"}),
+            ("change_title", "post", f"/api/tasks/{a}/change_title/", {"title": "renamed"}),
+            ("toggle", "post", f"/api/tasks/{b}/toggle/", None),
+            ("add_tag", "post", f"/api/tasks/{a}/add_tag/", {"tag_name": "fresh"}),
+            ("list_tags", "get", f"/api/tasks/{a}/list_tags/", None),
+            ("delete_tag", "delete", f"/api/tasks/{a}/delete_tag/?tag_id={tag}", None),
+            ("stats", "get", "/api/tasks/stats/", None),
+            ("bulk", "post", "/api/tasks/bulk/", {
+                "create": [{"title": "x"}, {"title": "y"}], "update": [{"id": c, "title": "u"}],
+                "toggle": [d], "delete": [e],
+            }),
+            ("bulk_tag", "post", "/api/tasks/bulk_tag/", {"task_ids": [a, b, c], "tag_names": ["p", "q"]}),
+            ("bulk_untag", "post", "/api/tasks/bulk_untag/", {"task_ids": [a, b, c], "tag_names": ["p"]}),
+            ("by_public_id", "get", f"/api/tasks/by-public/{self.tasks[0].public_id}/", None),
+            ("by_public_ids", "post", "/api/tasks/by-public/", {"public_ids": [t.public_id for t in self.tasks]}),
+            ("tag_usage", "get", "/api/tasks/tags/?prefix=TAG", None),
+            ("sync", "get", "/api/tasks/sync/", None),
+            ("agenda", "get", "/api/tasks/agenda/?tz=Europe/Moscow", None),
+            ("destroy", "delete", f"/api/tasks/{b}/", None),
+        ]
+
+    def test_every_action_within_budget(self):
+        budgets = TaskViewSet.query_budgets
+        calls = self._calls()
+        self.assertEqual({name for name, *_ in calls}, set(budgets))
+        for action, method, url, data in calls:
+            with self.subTest(action=action):
+                resp = getattr(self.client, method)(url, data, format="json")
+                self.assertLess(resp.status_code, 300, resp.content)
+                self.assertLessEqual(int(resp["X-Query-Count"]), budgets[action], resp.wsgi_request.query_log.queries)
+
+    def test_detects_repeated_query_shapes(self):
+        log = QueryLog()
+        run = lambda sql, params, many, context: None  # noqa: E731
+        for task in self.tasks[:3]:
+            log(run, 'SELECT * FROM "tag" WHERE "task_id" = %s', [task.id], False, {})
+        log(run, 'INSERT INTO "tag" ("name") VALUES (%s), (%s)', ["a", "b"], False, {})
+        log(run, 'INSERT INTO "tag" ("name") VALUES (%s), (%s)', ["c", "d"], False, {})
+        log(run, 'INSERT INTO "tag" ("name") VALUES (%s), (%s)', ["e", "f"], False, {})
+        log(run, "SAVEPOINT s1", None, False, {})
+        self.assertEqual(log.count, 6)
+        self.assertEqual(log.repeated(3), [('SELECT * FROM "tag" WHERE "task_id" = %s', 3)])
+
+
+class TaskProfilingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        Task.objects.create(user=self.user, title="t")
+
+    def _phases(self, resp):
+        return {part.split(";")[0].strip() for part in resp["Server-Timing"].split(",")}
+
+    def test_off_by_default_and_header_only_for_staff(self):
+        self.assertNotIn("Server-Timing", self.client.get("/api/tasks/"))
+        self.assertNotIn("Server-Timing", self.client.get("/api/tasks/", HTTP_X_PROFILE="1"))
+
+        self.user.is_staff = True
+        self.user.save()
+        resp = self.client.get("/api/tasks/?search=t", HTTP_X_PROFILE="1")
+        self.assertEqual(self._phases(resp), {"auth", "filter", "db", "serialize", "total"})
+        self.assertIn('db;dur=', resp["Server-Timing"])
+        self.assertIn('desc="1 queries"', resp["Server-Timing"])
+
+    def test_header_from_non_staff_starts_nothing(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(TASK_PROFILE_DIR=tmp), \
+                mock.patch("apps.ToDoList_app.profiling.start") as start:
+            resp = self.client.get("/api/tasks/", HTTP_X_PROFILE="1")
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn("Server-Timing", resp)
+            start.assert_not_called()
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_sampled_requests_dump_cprofile(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                override_settings(TASK_PROFILE_SAMPLE_RATE=1.0, TASK_PROFILE_DIR=tmp):
+            resp = self.client.get("/api/tasks/stats/")
+            self.assertNotIn("Server-Timing", resp)  # выборка — только дамп, тайминги — только staff
+            (dump,) = os.listdir(tmp)
+            self.assertTrue(dump.endswith("-GET-api_tasks_stats.prof"))
+            self.assertGreater(pstats.Stats(os.path.join(tmp, dump)).total_calls, 0)
+
+            self.user.is_staff = True
+            self.user.save()
+            self.assertIn("Server-Timing", self.client.get("/api/tasks/stats/"))
+            self.client.logout()
+            self.assertNotIn("Server-Timing", self.client.get("/api/tasks/stats/"))
+
+
+class TaskPublicIdTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.tasks = [Task.objects.create(user=self.user, title=f"t{i}") for i in range(3)]
+        self.foreign = Task.objects.create(user=User.objects.create_user("other"), title="foreign")
+
+    def test_round_trip(self):
+        for pk in (1, 255, 10**9):
+            self.assertEqual(decode_public_id(encode_public_id(pk)), pk)
+        self.assertEqual(decode_public_id("t-4e21"), 0x4E21 - 20000)
+        for bad in ("", "T-", "T-XYZ", "4E21", "T-1", None):
+            self.assertIsNone(decode_public_id(bad))
+
+    def test_lookup_by_public_id(self):
+        task = self.tasks[1]
+        resp = self.client.get(f"/api/tasks/by-public/{task.public_id}/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, self.client.get(f"/api/tasks/{task.id}/").content)
+        self.assertEqual(self.client.get(f"/api/tasks/by-public/{self.foreign.public_id}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/tasks/by-public/garbage/").status_code, 404)
+
+    def test_batch_lookup_keeps_input_order(self):
+        a, b, c = self.tasks
+        ids = [c.public_id, "nope", a.public_id, self.foreign.public_id, c.public_id]
+        with self.assertNumQueries(2):
+            resp = self.client.post("/api/tasks/by-public/", {"public_ids": ids}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([row["id"] for row in resp.data["results"]], [c.id, a.id])
+        self.assertEqual(resp.data["missing"], ["nope", self.foreign.public_id])
+
+
+class TaskTagUsageTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.tasks = [Task.objects.create(user=self.user, title=f"t{i}", is_done=i == 0) for i in range(3)]
+        other = User.objects.create_user("other")
+        services.add_tag_to_task(task=Task.objects.create(user=other, title="foreign"), tag_name="Work")
+
+    def _usage(self):
+        return sorted(TagUsage.objects.filter(user=self.user).values_list("name_lower", "total", "done"))
+
+    def test_counts_follow_task_changes(self):
+        a, b, c = self.tasks
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/tasks/bulk_tag/", {"task_ids": [a.id, b.id, c.id], "tag_names": ["Work"]}, format="json")
+            self.client.post(f"/api/tasks/{a.id}/add_tag/", {"tag_name": "Home"}, format="json")
+            self.client.post(f"/api/tasks/{b.id}/toggle/")
+        self.assertEqual(self._usage(), [("home", 1, 1), ("work", 3, 2)])
+
+        home = Tag.objects.get(name="Home")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/tasks/{a.id}/delete_tag/?tag_id={home.id}")
+            self.client.delete(f"/api/tasks/{b.id}/")
+            self.client.post("/api/tasks/bulk/", {"update": [{"id": c.id, "is_done": True, "due_date": "2025-09-01"}]},
+                             format="json")
+        self.assertEqual(self._usage(), [("work", 2, 2)])
+
+        stored = self._usage()
+        services.rebuild_tag_usage(user_ids=[self.user.id])
+        self.assertEqual(self._usage(), stored)
+
+    def test_prefix_autocomplete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            services.bulk_tag_tasks(user=self.user, task_ids=[t.id for t in self.tasks], tag_names=["Work"])
+            services.bulk_tag_tasks(user=self.user, task_ids=[self.tasks[0].id], tag_names=["workshop", "Home"])
+
+        with self.assertNumQueries(1):
+            resp = self.client.get("/api/tasks/tags/", {"prefix": "WOR"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([(row["name"], row["total"], row["done"]) for row in resp.data],
+                         [("Work", 3, 1), ("workshop", 1, 1)])
+        self.assertEqual([row["name"] for row in self.client.get("/api/tasks/tags/", {"limit": 2}).data],
+                         ["Work", "Home"])
+        self.assertEqual(self.client.get("/api/tasks/tags/", {"limit": 0}).status_code, 400)
+
+    def test_prefix_ending_in_top_code_point(self):
+        top = chr(0x10FFFF)
+        with self.captureOnCommitCallbacks(execute=True):
+            services.bulk_tag_tasks(user=self.user, task_ids=[self.tasks[0].id],
+                                    tag_names=[f"w{top}", f"w{top}x", "wz", "x"])
+        for prefix, names in ((f"w{top}", [f"w{top}", f"w{top}x"]), (top, []), ("w", ["wz", f"w{top}", f"w{top}x"])):
+            resp = self.client.get("/api/tasks/tags/", {"prefix": prefix})
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual([row["name"] for row in resp.data], names, prefix)
+
+
+@override_settings(TASK_SYNC_LAG_SECONDS=0)
+class TaskSyncTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.tasks = [Task.objects.create(user=self.user, title=f"t{i}") for i in range(5)]
+        Task.objects.create(user=User.objects.create_user("other"), title="foreign")
+
+    def _sync(self, cursor=None, **params):
+        resp = self.client.get("/api/tasks/sync/", {**params, **({"cursor": cursor} if cursor else {})})
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.data
+
+    def test_full_sync_is_paginated(self):
+        seen, cursor, more = [], None, True
+        while more:
+            page = self._sync(cursor, page_size=2)
+            seen += [row["id"] for row in page["changed"]]
+            cursor, more = page["cursor"], page["has_more"]
+        self.assertEqual(seen, [task.id for task in self.tasks])
+        page = self._sync(cursor)
+        self.assertEqual((page["changed"], page["deleted"], page["has_more"]), ([], [], False))
+
+    def test_returns_only_changes_since_cursor(self):
+        a, b, c, d, _ = self.tasks
+        cursor = self._sync()["cursor"]
+        self.client.post(f"/api/tasks/{a.id}/change_title/", {"title": "renamed"}, format="json")
+        self.client.post(f"/api/tasks/{b.id}/toggle/")
+        self.client.post(f"/api/tasks/{c.id}/add_tag/", {"tag_name": "x"}, format="json")
+        self.client.delete(f"/api/tasks/{d.id}/")
+
+        with self.assertNumQueries(3):
+            page = self._sync(cursor)
+        self.assertEqual({row["id"] for row in page["changed"]}, {a.id, b.id, c.id})
+        self.assertEqual(page["deleted"], [d.id])
+        self.assertEqual(self._sync(page["cursor"])["changed"], [])
+
+    def test_bad_and_expired_cursors(self):
+        self.assertEqual(self.client.get("/api/tasks/sync/", {"cursor": "garbage"}).status_code, 400)
+        old = timezone.now() - timedelta(days=365)
+        expired = SyncCursor(changed=(old, 0), deleted=(old, 0)).encode()
+        self.assertEqual(self.client.get("/api/tasks/sync/", {"cursor": expired}).status_code, 410)
+
+        TaskTombstone.objects.create(user=self.user, task_id=999, deleted_at=old)
+        self.assertEqual(services.prune_task_tombstones(), 1)
+
+
+class TaskVersionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, title="t")
+
+    def test_if_match_guards_writes(self):
+        url = f"/api/tasks/{self.task.id}/"
+        resp = self.client.patch(url, {"title": "a"}, format="json", HTTP_IF_MATCH='"1"')
+        self.assertEqual((resp.status_code, resp.data["version"]), (200, 2))
+        resp = self.client.patch(url, {"title": "b"}, format="json", HTTP_IF_MATCH='"1"')
+        self.assertEqual(resp.status_code, 412)
+
+        self.assertEqual(self.client.post(f"{url}toggle/", HTTP_IF_MATCH='W/"2"').data["version"], 3)
+        self.assertEqual(self.client.post(f"{url}change_title/", {"title": "c"}, format="json",
+                                          HTTP_IF_MATCH="stale").status_code, 412)
+        resp = self.client.post(f"{url}change_title/", {"title": "c"}, format="json", HTTP_IF_MATCH="*")
+        self.assertEqual((resp.status_code, resp.data["version"]), (200, 4))
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.is_done, self.task.version), ("c", True, 4))
+
+    def test_stale_instance_rereads_instead_of_losing_update(self):
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        services.toggle_task_done(task=first)
+        services.toggle_task_done(task=second)  # прочитан до первого toggle — перечитывается и повторяет
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.is_done, self.task.version), (False, 3))
+        with self.assertRaises(services.VersionConflict):
+            services.change_title(task=first, title="late", expected_version=2)
+
+    def test_retries_exhausted_without_if_match_is_contention(self):
+        def racing(current):  # конкурент успевает переписать задачу перед каждой попыткой
+            Task.objects.filter(pk=current.pk).update(version=F("version") + 1)
+            return {"title": "lost"}
+
+        with self.assertRaises(services.WriteContention):
+            services._write(Task.objects.get(pk=self.task.pk), racing)
+        with mock.patch.object(services, "_WRITE_ATTEMPTS", 0):
+            resp = self.client.patch(f"/api/tasks/{self.task.id}/", {"title": "u"}, format="json")
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.data["detail"].code, "write_contention")
+
+    def test_bulk_bumps_versions(self):
+        other = Task.objects.create(user=self.user, title="o")
+        resp = self.client.post("/api/tasks/bulk/", {
+            "update": [{"id": self.task.id, "title": "u"}], "toggle": [other.id],
+        }, format="json")
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(sorted(Task.objects.values_list("version", flat=True)), [2, 2])
+
+    def test_bulk_update_checks_item_versions(self):
+        other = Task.objects.create(user=self.user, title="o")
+        Task.objects.filter(pk=self.task.pk).update(version=2)  # кто-то успел записать
+        resp = self.client.post("/api/tasks/bulk/", {
+            "update": [{"id": self.task.id, "title": "u", "version": 1}, {"id": other.id, "title": "v", "version": 1}],
+            "create": [{"title": "new"}],
+        }, format="json")
+        self.assertEqual(resp.status_code, 412)
+        self.assertEqual(resp.data["update"], [f"Task {self.task.id} was modified by another request"])
+        self.assertEqual(sorted(Task.objects.values_list("title", flat=True)), ["o", "t"])  # откатилась вся пачка
+
+        resp = self.client.post("/api/tasks/bulk/", {"update": [{"id": self.task.id, "title": "u", "version": 2}]},
+                                format="json")
+        self.assertEqual((resp.status_code, resp.data["updated"][0]["version"]), (200, 3))
+        self.assertEqual(self.client.post("/api/tasks/bulk/", {"update": [{"id": other.id, "version": "1"}]},
+                                          format="json").status_code, 400)
+
+    def test_bulk_update_writes_only_sent_fields(self):
+        other = Task.objects.create(user=self.user, title="o")
+        a, b = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=other.pk)
+        Task.objects.filter(pk=a.pk).update(due_date=date(2025, 9, 1))  # параллельная запись после чтения
+        services.bulk_apply(user=self.user, update=[(a, {"title": "renamed"}), (b, {"due_date": date(2025, 10, 1)})])
+        self.assertEqual(Task.objects.get(pk=a.pk).due_date, date(2025, 9, 1))
+        self.assertEqual(Task.objects.get(pk=b.pk).due_date, date(2025, 10, 1))
+
+
+class TaskConcurrentWriteTests(TransactionTestCase):
+    """
+    Настоящие потоки поверх общей тестовой БД: ни одно переключение не теряется.
+    Shared-cache SQLite в тестах не ждёт блокировку, а сразу бросает "table is locked" — воркер
+    повторяет вызов (транзакция откатилась целиком). Подписчики событий отключены: их запись
+    после коммита натыкалась бы на те же блокировки, а проверяется здесь сама задача.
+    """
+
+    workers, toggles = 8, 25
+
+    def _run(self, work):
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(self.toggles):
+                    while True:
+                        try:
+                            work()
+                            break
+                        except OperationalError:
+                            time.sleep(0.001)
+            except Exception as exc:  # всплывёт в assert ниже
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.workers)]
+        with mock.patch.object(events, "_handlers", []):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_toggles_keep_every_write(self):
+        task = Task.objects.create(user=User.objects.create_user("owner"), title="t")
+
+        self._run(lambda: services.toggle_task_done(task=Task.objects.get(pk=task.pk)))
+
+        task.refresh_from_db()
+        total = self.workers * self.toggles
+        self.assertEqual((task.version, task.is_done), (1 + total, total % 2 == 1))
+
+    def test_concurrent_if_match_writers_get_conflicts_not_lost_updates(self):
+        task = Task.objects.create(user=User.objects.create_user("owner"), title="t")
+        applied = []
+
+        def guarded():
+            current = Task.objects.get(pk=task.pk)
+            try:
+                services.toggle_task_done(task=current, expected_version=current.version)
+                applied.append(current.version)
+            except services.VersionConflict:
+                pass
+
+        self._run(guarded)
+
+        task.refresh_from_db()
+        self.assertEqual((task.version, task.is_done), (1 + len(applied), len(applied) % 2 == 1))
+        self.assertEqual(sorted(applied), list(range(2, task.version + 1)))  # каждая версия выдана одному писателю
+
+
+class TaskAgendaTests(APITestCase):
+    # воскресенье, 22:30 UTC — в Токио уже понедельник
+    now = datetime(2026, 10, 18, 22, 30, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.tasks = {
+            due: Task.objects.create(user=self.user, title=str(due), due_date=due)
+            for due in (date(2026, 10, 17), date(2026, 10, 18), date(2026, 10, 19), date(2026, 10, 22),
+                        date(2026, 11, 5), date(2027, 3, 1), None)
+        }
+        Task.objects.create(user=self.user, title="done", due_date=date(2026, 10, 18), is_done=True)
+        Task.objects.create(user=User.objects.create_user("other"), title="foreign", due_date=date(2026, 10, 18))
+
+    def _agenda(self, **params):
+        with mock.patch("django.utils.timezone.now", return_value=self.now):
+            resp = self.client.get("/api/tasks/agenda/", params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.data
+
+    def _titles(self, data):
+        return {bucket["key"]: [task["title"] for task in bucket["tasks"]] for bucket in data["buckets"]}
+
+    def test_buckets_follow_user_timezone(self):
+        utc = self._agenda(tz="UTC")
+        self.assertEqual(utc["today"], "2026-10-18")
+        self.assertEqual(self._titles(utc), {
+            "overdue": ["2026-10-17"], "today": ["2026-10-18"], "week": [],
+            "2026-10": ["2026-10-19", "2026-10-22"], "2026-11": ["2026-11-05"], "2026-12": [],
+            "later": ["2027-03-01"], "no_date": ["None"],
+        })
+
+        tokyo = self._agenda(tz="Asia/Tokyo", months=1)
+        self.assertEqual(tokyo["today"], "2026-10-19")
+        self.assertEqual(self._titles(tokyo), {
+            "overdue": ["2026-10-17", "2026-10-18"], "today": ["2026-10-19"], "week": ["2026-10-22"],
+            "2026-10": [], "later": ["2026-11-05", "2027-03-01"], "no_date": ["None"],
+        })
+        self.assertEqual(self.client.get("/api/tasks/agenda/", {"tz": "Mars/Olympus"}).status_code, 400)
+
+    def test_counts_cover_whole_bucket_with_one_query(self):
+        for i in range(4):
+            Task.objects.create(user=self.user, title=f"late {i}", due_date=date(2026, 10, 1 + i))
+        with CaptureQueriesContext(connection) as ctx:
+            data = self._agenda(tz="UTC", per_bucket=2)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + ctx.captured_queries[0]["sql"])
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertIn("USING INDEX task_user_done_due_idx (user_id=? AND is_done=?)", " ".join(plan))
+        overdue = data["buckets"][0]
+        self.assertEqual((overdue["key"], overdue["count"]), ("overdue", 5))
+        self.assertEqual([task["title"] for task in overdue["tasks"]], ["late 0", "late 1"])
+
+    @override_settings(TASK_RESPONSE_CACHE_ENABLED=True)
+    def test_cached_per_day_and_invalidated_by_mutations(self):
+        cache.clear()
+        self._agenda(tz="UTC")
+        with self.assertNumQueries(0):
+            self._agenda(tz="UTC")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            services.toggle_task_done(task=self.tasks[date(2026, 10, 17)])
+        self.assertEqual(self._titles(self._agenda(tz="UTC"))["overdue"], [])
+
+        self.now += timedelta(days=1)  # новый день — новый ключ
+        self.assertEqual(self._agenda(tz="UTC")["today"], "2026-10-19")
+
+
+class DatabaseConnectionTests(APITestCase):
+    def test_sqlite_pragmas_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA cache_size")
+            self.assertLess(cursor.fetchone()[0], 0)  # задан в KiB
+
+    def test_pool_metrics_for_staff_only(self):
+        user = User.objects.create_user("owner", password="pass")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        self.assertEqual(self.client.get("/api/health/db/").status_code, 403)
+
+        user.is_staff = True
+        user.save()  # post_save сбрасывает кэш состояния, где лежит и is_staff
+        resp = self.client.get("/api/health/db/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["pid"], os.getpid())
+        self.assertGreater(resp.data["requests"], 0)
+        default = resp.data["databases"]["default"]
+        self.assertEqual((default["vendor"], default["pool"]), ("sqlite", None))
+
+
+class TaskArchiveTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.work = Tag.objects.create(name="work")
+        self.tasks = [
+            Task.objects.create(user=self.user, title=f"t{i}", is_done=i % 3 != 0, due_date=date(2025, 9, 1 + i))
+            for i in range(9)
+        ]
+        for task in self.tasks[:4]:
+            task.tags.add(self.work)
+        # выполненные t1, t2, t4, t5 — давно; t7, t8 — недавно
+        old = timezone.now() - timedelta(days=400)
+        Task.objects.filter(id__in=[t.id for t in self.tasks[:6]]).update(updated_at=old)
+        self.old_done = [t.id for t in self.tasks[:6] if t.is_done]
+        services.rebuild_task_counters(user_ids=[self.user.id])
+        services.rebuild_tag_usage(user_ids=[self.user.id])
+
+    def _ids(self, **params):
+        ids, url = [], "/api/tasks/"
+        params = {"page_size": 2, **params}
+        while url:
+            resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, 200, resp.content)
+            ids += [row["id"] for row in resp.data["results"]]
+            url, params = resp.data["next"], None
+        return ids
+
+    @override_settings(TASK_SYNC_LAG_SECONDS=0)
+    def test_archived_tasks_leave_sync_as_deleted(self):
+        cursor = self.client.get("/api/tasks/sync/").data["cursor"]
+        services.archive_done_tasks(batch_size=3)
+        page = self.client.get("/api/tasks/sync/", {"cursor": cursor}).data
+        self.assertEqual((page["changed"], page["deleted"]), ([], self.old_done))
+
+    def test_moves_old_done_tasks_in_batches_and_keeps_stats(self):
+        stats = self.client.get("/api/tasks/stats/").data
+        usage = self.client.get("/api/tasks/tags/").data
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(services.archive_done_tasks(batch_size=3), 4)
+        self.assertEqual(sorted(TaskArchive.objects.values_list("id", flat=True)), self.old_done)
+        self.assertFalse(Task.objects.filter(id__in=self.old_done).exists())
+        self.assertEqual(TaskArchiveTag.objects.count(), 2)  # t1, t2 с тегом work
+
+        self.assertEqual(self.client.get("/api/tasks/stats/").data, stats)
+        with override_settings(TASK_STATS_USE_COUNTERS=False):
+            self.assertEqual(self.client.get("/api/tasks/stats/").data, stats)
+        services.rebuild_task_counters(user_ids=[self.user.id])
+        services.rebuild_tag_usage(user_ids=[self.user.id])
+        self.assertEqual(self.client.get("/api/tasks/stats/").data, stats)
+        self.assertEqual(self.client.get("/api/tasks/tags/").data, usage)
+
+        out = StringIO()
+        call_command("archive_done_tasks", stdout=out)
+        self.assertIn("Archived 0 task(s)", out.getvalue())
+        call_command("rebuild_task_counters", "--check", stdout=out)
+        self.assertIn("0 counter(s) out of sync", out.getvalue())
+
+    def test_include_archived_merges_keyset_pages(self):
+        services.archive_done_tasks()
+        everything = sorted((t.id for t in self.tasks), reverse=True)
+        self.assertEqual(self._ids(), [pk for pk in everything if pk not in self.old_done])
+        self.assertEqual(self._ids(include_archived="true"), everything)
+
+        by_due = self._ids(include_archived="true", ordering="due_date")
+        self.assertEqual(by_due, [t.id for t in self.tasks])
+        with_tag = self._ids(include_archived="1", tags_all=str(self.work.id), is_done="true")
+        self.assertEqual(with_tag, sorted(self.old_done[:2], reverse=True))
+
+        with override_settings(TASK_FAST_SERIALIZERS=False):
+            self.assertEqual(self._ids(include_archived="true"), everything)
+        self.assertEqual(self.client.get("/api/tasks/", {"include_archived": "true", "search": "t1"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/tasks/", {"include_archived": "maybe"}).status_code, 400)
+
+
+class TaskJobTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_authenticate(self.user)
+        self.ids = [Task.objects.create(user=self.user, title=f"t{i}").id for i in range(3)]
+
+    def _work(self):
+        """Один проход воркера в потоке теста: claim + run, события заданий — после "коммита"."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return [jobs.run(job) for job in jobs.claim(worker="test", limit=10)]
+
+    def test_bulk_tag_is_accepted_and_runs_in_background(self):
+        resp = self.client.post("/api/tasks/bulk_tag/", {"task_ids": self.ids, "tag_names": ["bg"]}, format="json",
+                                HTTP_PREFER="respond-async")
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(resp["Preference-Applied"], "respond-async")
+        self.assertEqual(resp["Location"], f"http://testserver/api/jobs/{resp.data['id']}/")
+        self.assertEqual((resp.data["kind"], resp.data["status"]), ("bulk_tag", "queued"))
+        self.assertFalse(TaskTag.objects.exists())
+
+        Task.objects.filter(id=self.ids[0]).delete()  # удалили до запуска — задание её пропустит
+        [job] = self._work()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        status = self.client.get(resp["Location"]).data
+        self.assertEqual((status["status"], status["attempts"]), ("succeeded", 1))
+        self.assertEqual(status["result"]["task_ids"], self.ids[1:])
+        self.assertEqual(TaskTag.objects.count(), 2)
+        self.assertEqual(self.client.get("/api/tasks/tags/").data[0]["total"], 2)  # подписчики событий отработали
+
+        self.client.force_authenticate(User.objects.create_user("other"))
+        self.assertEqual(self.client.get(resp["Location"]).status_code, 404)
+
+    def test_export_job_matches_streamed_export(self):
+        url = "/api/tasks/export/?file_format=csv&ordering=id&is_done=false"
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            job_id = self.client.get(url, HTTP_PREFER="respond-async").data["id"]
+            self.assertEqual(self.client.get(f"/api/jobs/{job_id}/download/").status_code, 404)
+            self._work()
+            download = self.client.get(f"/api/jobs/{job_id}/download/")
+            self.assertEqual(download["Content-Disposition"], 'attachment; filename="tasks.csv"')
+            body = b"".join(download.streaming_content)
+            download.close()
+        self.assertEqual(body, b"".join(self.client.get(url).streaming_content))
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        def flaky(job):
+            raise OperationalError("database is locked")
+
+        def duplicate(job):
+            raise IntegrityError("UNIQUE constraint failed")
+
+        registry = {
+            "flaky": jobs.JobType(flaky, max_attempts=2, retry_on=jobs.TRANSIENT_ERRORS),
+            "broken": jobs.JobType(lambda job: 1 / 0, max_attempts=3, retry_on=jobs.TRANSIENT_ERRORS),
+            "duplicate": jobs.JobType(duplicate, max_attempts=3, retry_on=jobs.TRANSIENT_ERRORS),
+        }
+        with mock.patch.dict(jobs._registry, registry), self.assertLogs("apps.ToDoList_app.jobs", "WARNING"):
+            flaky_job, broken_job, duplicate_job = (jobs.enqueue(kind) for kind in ("flaky", "broken", "duplicate"))
+            self._work()
+            for job in (flaky_job, broken_job, duplicate_job):
+                job.refresh_from_db()
+            self.assertEqual((flaky_job.status, flaky_job.attempts), (Job.QUEUED, 1))
+            self.assertGreater(flaky_job.run_after, timezone.now())
+            self.assertEqual((broken_job.status, broken_job.attempts), (Job.FAILED, 1))  # не временная — без повторов
+            self.assertIn("ZeroDivisionError", broken_job.error)
+            self.assertEqual((duplicate_job.status, duplicate_job.attempts), (Job.FAILED, 1))  # DatabaseError, но не временная
+
+            self.assertEqual(jobs.claim(worker="test"), [])  # ждёт backoff
+            Job.objects.filter(id=flaky_job.id).update(run_after=timezone.now())
+            [flaky_job] = self._work()
+            self.assertEqual((flaky_job.status, flaky_job.attempts), (Job.FAILED, 2))
+        with self.assertRaises(ValueError):
+            jobs.enqueue("flaky")
+
+    def test_stale_running_job_is_requeued(self):
+        job = jobs.enqueue("rebuild_task_counters", payload={"user_ids": [self.user.id]})
+        [lost] = jobs.claim(worker="dead")
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+
+        [job] = self._work()
+        self.assertEqual((job.status, job.attempts, job.result), (Job.SUCCEEDED, 2, {"users": 1}))
+        with self.assertLogs("apps.ToDoList_app.jobs", "ERROR"):
+            jobs.run(Job(id=lost.id, kind="nope", status=Job.RUNNING, locked_by="dead", attempts=1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)  # опоздавший воркер итог не перезаписывает
+
+
+class TaskJobWorkerTests(TransactionTestCase):
+    """
+    Воркер целиком: задания из БД, пул потоков, итог в Job. Один поток: shared-cache SQLite в тестах
+    не ждёт блокировку, а сразу бросает "table is locked" (см. TaskConcurrentWriteTests), а с одним
+    потоком опрос очереди не пересекается с выполнением задания.
+    """
+
+    @override_settings(TASK_JOB_RETRY_DELAY=0)
+    def test_worker_drains_queue(self):
+        user = User.objects.create_user("owner")
+        Task.objects.create(user=user, title="t", is_done=True, due_date=date(2025, 9, 1))
+        queued = [jobs.enqueue("rebuild_task_counters", payload={"user_ids": [user.id]}) for _ in range(4)]
+        call_command("archive_done_tasks", "--enqueue", "--days", "0", stdout=StringIO())
+
+        out = StringIO()
+        with mock.patch.object(events, "_handlers", []):  # см. TaskConcurrentWriteTests
+            call_command("run_jobs", "--once", "--threads", "1", "--poll", "0.01", stdout=out)
+        self.assertEqual(list(Job.objects.values_list("status", flat=True).distinct()), [Job.SUCCEEDED], out.getvalue())
+        self.assertEqual(Job.objects.get(kind="archive_done_tasks").result, {"archived": 1})
+        self.assertEqual(Job.objects.get(id=queued[0].id).result, {"users": 1})
+        self.assertIn("Done: 5 succeeded", out.getvalue())
+
+    @override_settings(TASK_JOB_LEASE_SECONDS=0.3)
+    def test_lease_is_renewed_while_job_runs(self):
+        requeued = []
+
+        def slow(job):  # работает дольше lease; requeue_stale() — как у соседнего воркера
+            time.sleep(0.5)
+            while True:
+                try:
+                    requeued.append(jobs.requeue_stale())
+                    return None
+                except OperationalError:  # см. docstring класса
+                    time.sleep(0.01)
+
+        job = Job.objects.create(kind="slow")
+        out = StringIO()
+        with mock.patch.dict(jobs._registry, {"slow": jobs.JobType(slow, max_attempts=1, retry_on=())}):
+            call_command("run_jobs", "--once", "--threads", "1", "--poll", "0.01", stdout=out)
+        job.refresh_from_db()
+        self.assertEqual(requeued, [0])
+        self.assertEqual((job.status, job.attempts), (Job.SUCCEEDED, 1), out.getvalue())
@@ -21,11 +21,12 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
-    "ToDoList_app.apps.TodolistAppConfig",
+    "apps.ToDoList_app.apps.TodolistAppConfig",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "apps.ToDoList_app.middleware.ProfilingMiddleware",  # no-op, пока запрос не выбран для профилирования
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -34,7 +35,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "configconfig.urls"
+ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
     {
@@ -51,8 +52,21 @@ TEMPLATES = [
     },
 ]
 
-WSGI_APPLICATION = "configconfig.wsgi.application"
-ASGI_APPLICATION = "configconfig.asgi.application"
+WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
+
+# SQLite: PRAGMA на каждое новое соединение (init_command). WAL — читатели не ждут писателя;
+# synchronous=NORMAL в WAL не ломает целостность, при сбое ОС теряются лишь последние коммиты;
+# mmap и кэш страниц — меньше read() на горячих индексах. Для :memory: WAL/mmap SQLite молча игнорирует.
+SQLITE_OPTIONS = {
+    "init_command": ";".join([
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+        f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_KIB', str(64 * 1024)))}",  # минус — размер в KiB
+        "PRAGMA temp_store=MEMORY",
+    ]),
+}
 
 # БД по умолчанию переопределяется в local/prod
 DATABASES = {
@@ -65,6 +79,8 @@ DATABASES = {
         "PORT": os.getenv("DB_PORT", ""),
     }
 }
+if DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+    DATABASES["default"]["OPTIONS"] = SQLITE_OPTIONS
 
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -96,10 +112,54 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWT без SELECT по auth_user на каждый запрос (активность — из кэша с TTL)
+        "apps.ToDoList_app.api.v1.authentication.StatelessJWTAuthentication",
     ],
 }
 
+# /tasks/stats/ читает из TaskCounter (O(1)); False — считать агрегатом по задачам
+TASK_STATS_USE_COUNTERS = os.getenv("TASK_STATS_USE_COUNTERS", "true").lower() == "true"
+
+# ?search= по задачам: "" — по СУБД (FTS5 на SQLite, tsvector на PostgreSQL), "like" — без индекса
+TASK_SEARCH_BACKEND = os.getenv("TASK_SEARCH_BACKEND", "")
+
+# Кэш ответов list/retrieve задач (версия на пользователя, ETag/304)
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "todolist"},
+}
+TASK_RESPONSE_CACHE_ENABLED = True
+TASK_RESPONSE_CACHE_TIMEOUT = int(os.getenv("TASK_RESPONSE_CACHE_TIMEOUT", "300"))
+
+# list/retrieve задач собираются из .values() в обход ModelSerializer (вывод идентичен)
+TASK_FAST_SERIALIZERS = True
+
+# Delta-sync /tasks/sync/: изменения моложе LAG не отдаются (ждём коммита параллельных транзакций);
+# надгробия удалённых задач хранятся TOMBSTONE_DAYS (prune_task_tombstones), более старый курсор — 410
+TASK_SYNC_LAG_SECONDS = float(os.getenv("TASK_SYNC_LAG_SECONDS", "2"))
+TASK_SYNC_TOMBSTONE_DAYS = int(os.getenv("TASK_SYNC_TOMBSTONE_DAYS", "30"))
+
+# Архив выполненных задач (archive_done_tasks): выполненные и не менявшиеся дольше N дней уезжают в TaskArchive
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv("TASK_ARCHIVE_AFTER_DAYS", "90"))
+
+# Фоновые задания (jobs.py, воркер manage.py run_jobs): попытки при временных ошибках, пауза перед
+# повтором (удваивается с каждой попыткой), через сколько секунд "running" без ответа воркера снова в очередь
+# (живой воркер продлевает lease своих заданий каждую треть срока)
+TASK_JOB_MAX_ATTEMPTS = int(os.getenv("TASK_JOB_MAX_ATTEMPTS", "3"))
+TASK_JOB_RETRY_DELAY = float(os.getenv("TASK_JOB_RETRY_DELAY", "5"))
+TASK_JOB_LEASE_SECONDS = int(os.getenv("TASK_JOB_LEASE_SECONDS", "600"))
+TASK_JOB_WORKER_THREADS = int(os.getenv("TASK_JOB_WORKER_THREADS", "4"))
+
+# StatelessJWTAuthentication: сколько секунд верить закэшированному is_active
+# (0 — спрашивать БД на каждый запрос, None — не проверять вовсе; в окружении — пустая строка или "none")
+_auth_active_ttl = os.getenv("TASK_AUTH_ACTIVE_TTL", "30").strip()
+TASK_AUTH_ACTIVE_TTL = None if _auth_active_ttl.lower() in ("", "none") else int(_auth_active_ttl)
+TASK_AUTH_ACTIVE_CACHE_SIZE = 10_000
+
+# Профилирование запросов (middleware.ProfilingMiddleware): Server-Timing auth/filter/db/serialize.
+# Заголовок X-Profile от staff или доля случайных запросов; cProfile-дампы — в TASK_PROFILE_DIR (если задан)
+TASK_PROFILE_SAMPLE_RATE = float(os.getenv("TASK_PROFILE_SAMPLE_RATE", "0"))
+TASK_PROFILE_DIR = os.getenv("TASK_PROFILE_DIR", "")
+
 # SimpleJWT
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
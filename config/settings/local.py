@@ -8,6 +8,7 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": SQLITE_OPTIONS,
     }
 }
 
@@ -17,6 +18,9 @@ SPECTACULAR_SETTINGS["SERVE_INCLUDE_SCHEMA"] = True
 # Почта в консоль
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# SQL на запрос: X-Query-Count + warning при превышении бюджета действия / N+1
+MIDDLEWARE += ["apps.ToDoList_app.middleware.QueryBudgetMiddleware"]
+
 # Повыше уровень логов
 LOGGING["root"]["level"] = "DEBUG"
 
@@ -16,9 +16,33 @@ DATABASES = {
         "PASSWORD": os.environ["DB_PASSWORD"],
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        # постоянные соединения: воркер держит соединение DB_CONN_MAX_AGE секунд вместо connect на каждый запрос;
+        # перед повторным использованием Django проверяет, что оно живо (после рестарта БД/балансировщика)
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "true").lower() == "true",
     }
 }
 
+# Пул psycopg (Django 5.1+, нужен psycopg[pool]): общий на процесс, соединения выдаются потокам
+# по запросу — для ASGI/многопоточных воркеров, где CONN_MAX_AGE держал бы по соединению на поток.
+# С пулом постоянные соединения Django должны быть выключены (CONN_MAX_AGE = 0).
+if os.getenv("DB_POOL", "false").lower() == "true":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),  # ожидание свободного соединения, сек
+        },
+    }
+
+# Кэш ответов задач обязан быть общим для всех воркеров: у locmem он свой в каждом процессе,
+# и сброс версии в одном воркере не увидят другие. Без REDIS_URL кэш ответов выключен.
+if os.getenv("REDIS_URL"):
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.environ["REDIS_URL"]}}
+else:
+    TASK_RESPONSE_CACHE_ENABLED = False
+
 # Безопасность
 SECURE_SSL_REDIRECT = os.getenv("SECURE_SSL_REDIRECT", "true").lower() == "true"
 SESSION_COOKIE_SECURE = True
@@ -0,0 +1,25 @@
+from .base import *
+
+# Настройки для прогона тестов: python manage.py test --settings=config.settings.test
+DEBUG = False
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+        "OPTIONS": SQLITE_OPTIONS,
+    }
+}
+
+# Быстрый хешер паролей, чтобы не тормозить создание пользователей
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# locmem живёт между тестами, а id пользователей в тестовой БД повторяются —
+# кэш ответов включаем точечно (override_settings) в тестах кэша
+TASK_RESPONSE_CACHE_ENABLED = False
+
+LOGGING["root"]["level"] = "WARNING"
+
+# Бюджеты SQL-запросов по действиям (TaskViewSet.query_budgets): превышение или N+1 валит тест
+MIDDLEWARE = [*MIDDLEWARE, "apps.ToDoList_app.middleware.QueryBudgetMiddleware"]
+TASK_QUERY_BUDGET_STRICT = True